@@ -41,13 +41,28 @@ class Pairing(TypedDict):
     accessories: list[Any]
 
 
+class CachedPairing(Pairing, total=False):
+    """The entity metadata along with what has been learnt about the accessory."""
+
+    # Whether the accessory accepts subscription updates for more than one
+    # aid in a single request. Missing if it has not been probed yet.
+    batched_subscriptions: bool | None
+    # The raw CoAP GATT database (hex), which CoAP pairings need alongside the
+    # accessories to read and write characteristics without fetching it again.
+    gatt_database: str | None
+
+
 class StorageLayout(TypedDict):
     """Cached pairing metadata needed by aiohomekit."""
 
-    pairings: dict[str, Pairing]
+    pairings: dict[str, CachedPairing]
 
 
 class CharacteristicCacheType(Protocol):
+    # Caches may also have an async_update_map_metadata(homekit_id, **metadata)
+    # method to keep what has been learnt about an accessory, see CachedPairing.
+    # It is optional so that caches written against this interface keep working.
+
     def get_map(self, homekit_id: str) -> Pairing | None:
         pass
 
@@ -63,20 +78,25 @@ class CharacteristicCacheType(Protocol):
 class CharacteristicCacheMemory:
     def __init__(self) -> None:
         """Create a new entity map store."""
-        self.storage_data: dict[str, Pairing] = {}
+        self.storage_data: dict[str, CachedPairing] = {}
 
-    def get_map(self, homekit_id: str) -> Pairing | None:
+    def get_map(self, homekit_id: str) -> CachedPairing | None:
         """Get a pairing cache item."""
         return self.storage_data.get(homekit_id)
 
     def async_create_or_update_map(
         self, homekit_id: str, config_num: int, accessories: list[Any]
-    ) -> Pairing:
+    ) -> CachedPairing:
         """Create a new pairing cache."""
-        data = Pairing(config_num=config_num, accessories=accessories)
+        data = CachedPairing(config_num=config_num, accessories=accessories)
         self.storage_data[homekit_id] = data
         return data
 
+    def async_update_map_metadata(self, homekit_id: str, **metadata: Any) -> None:
+        """Remember what has been learnt about an accessory with its cache."""
+        if (data := self.storage_data.get(homekit_id)) is not None:
+            data.update(metadata)
+
     def async_delete_map(self, homekit_id: str) -> None:
         """Delete pairing cache."""
         if homekit_id not in self.storage_data:
@@ -102,12 +122,17 @@ class CharacteristicCacheFile(CharacteristicCacheMemory):
 
     def async_create_or_update_map(
         self, homekit_id: str, config_num: int, accessories: list[Any]
-    ) -> Pairing:
+    ) -> CachedPairing:
         """Create a new pairing cache."""
         data = super().async_create_or_update_map(homekit_id, config_num, accessories)
         self._do_save()
         return data
 
+    def async_update_map_metadata(self, homekit_id: str, **metadata: Any) -> None:
+        """Remember what has been learnt about an accessory with its cache."""
+        super().async_update_map_metadata(homekit_id, **metadata)
+        self._do_save()
+
     def async_delete_map(self, homekit_id: str) -> None:
         """Delete pairing cache."""
         super().async_delete_map(homekit_id)
@@ -17,12 +17,25 @@
 from __future__ import annotations
 
 from abc import ABCMeta, abstractmethod
+import asyncio
 from collections.abc import Iterable
 from dataclasses import dataclass
 from datetime import timedelta
-from typing import Any, AsyncIterable, Awaitable, Callable, TypedDict, final
+import logging
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Generic,
+    TypedDict,
+    TypeVar,
+    cast,
+    final,
+)
 
 from aiohomekit.characteristic_cache import CharacteristicCacheType
+from aiohomekit.deadline import wait_future
 from aiohomekit.model import Accessories, AccessoriesState, Transport
 from aiohomekit.model.categories import Categories
 from aiohomekit.model.characteristics.characteristic_types import CharacteristicsTypes
@@ -30,6 +43,12 @@ from aiohomekit.model.services.service_types import ServicesTypes
 from aiohomekit.model.status_flags import StatusFlags
 from aiohomekit.utils import async_create_task
 
+logger = logging.getLogger(__name__)
+
+WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
+BatchType = TypeVar("BatchType")
+ResultType = TypeVar("ResultType")
+
 
 class AbstractPairingData(TypedDict, total=False):
 
@@ -52,6 +71,84 @@ class AbstractDescription:
     category: Categories
 
 
+class CoalescedCall(Generic[BatchType, ResultType]):
+    """
+    Merges calls made within a window of each other into one request.
+
+    The first caller starts a new batch and schedules the request, and every
+    caller adds to the batch until it is sent. All the callers get the result
+    of the request, or its error. A request that has already been sent is never
+    joined, so callers never get a result older than their call. A caller that
+    gives up (for example because of its deadline) doesn't cancel the request
+    for the others.
+    """
+
+    def __init__(self, new_batch: Callable[[], BatchType]) -> None:
+        self._new_batch = new_batch
+        self._pending: tuple[BatchType, asyncio.Future] | None = None
+
+    async def call(
+        self,
+        window: float,
+        add: Callable[[BatchType], None],
+        send: Callable[[BatchType], Awaitable[ResultType]],
+    ) -> ResultType:
+        """
+        Add to the pending batch and wait for its result.
+
+        :param window: how long a new batch waits for more calls before `send`
+        :param add: adds this caller's part of the request to the batch
+        :param send: makes the request for a whole batch
+        """
+        if not self._pending:
+            self._pending = (
+                self._new_batch(),
+                asyncio.get_running_loop().create_future(),
+            )
+            async_create_task(self._async_flush(window, send))
+
+        batch, future = self._pending
+        add(batch)
+
+        return await wait_future(asyncio.shield(future))
+
+    async def _async_flush(
+        self, window: float, send: Callable[[BatchType], Awaitable[ResultType]]
+    ) -> None:
+        await asyncio.sleep(window)
+
+        batch, future = self._pending
+        self._pending = None
+
+        try:
+            result = await send(batch)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            return
+
+        future.set_result(result)
+
+
+def coalesce_writes(func: WrapFuncType) -> WrapFuncType:
+    """Define a wrapper to merge put_characteristics calls.
+
+    When the pairing has a write_coalesce_window the writes are queued and sent
+    as one call to the wrapped function, see AbstractPairing._async_coalesce_write.
+    """
+
+    async def _async_wrap(
+        self: AbstractPairing, characteristics: Iterable[tuple[int, int, Any]]
+    ) -> dict[tuple[int, int], Any]:
+        if self.write_coalesce_window is None:
+            return await func(self, characteristics)
+        return await self._async_coalesce_write(func, characteristics)
+
+    return cast(WrapFuncType, _async_wrap)
+
+
 class AbstractPairing(metaclass=ABCMeta):
 
     # The current discovery information for this pairing.
@@ -62,6 +159,11 @@ class AbstractPairing(metaclass=ABCMeta):
     # and BLE advertisements), and also as AccessoryPairingID i pairing data.
     id: str
 
+    # Writes made within this many seconds of the first pending write are sent
+    # as a single put_characteristics call, and only the last value written to
+    # each characteristic is sent. None sends every write straight away.
+    write_coalesce_window: float | None = None
+
     def __init__(self, controller: AbstractController) -> None:
         self.controller = controller
         self.listeners: set[Callable[[dict], None]] = set()
@@ -69,6 +171,9 @@ class AbstractPairing(metaclass=ABCMeta):
         self.availability_listeners: set[Callable[[bool], None]] = set()
         self.config_changed_listeners: set[Callable[[int], None]] = set()
         self._accessories_state: AccessoriesState | None = None
+        self._pending_write: CoalescedCall[
+            dict[tuple[int, int], Any], dict[tuple[int, int], Any]
+        ] = CoalescedCall(dict)
 
     @property
     def accessories_state(self) -> AccessoriesState:
@@ -109,6 +214,15 @@ class AbstractPairing(metaclass=ABCMeta):
     def poll_interval(self) -> timedelta:
         """Returns how often the device should be polled."""
 
+    def should_poll(self, characteristics: Iterable[tuple[int, int]]) -> bool:
+        """
+        Whether a scheduled poll of `characteristics` could find anything new.
+
+        Pairings that can tell that nothing has changed since they last caught
+        up return False so that the poll can be skipped.
+        """
+        return True
+
     def _async_description_update(
         self, description: AbstractDescription | None
     ) -> None:
@@ -121,6 +235,15 @@ class AbstractPairing(metaclass=ABCMeta):
         accessories = Accessories.from_list(cache["accessories"])
         self._accessories_state = AccessoriesState(accessories, config_num)
 
+    def _advertised_config_num(self) -> int | None:
+        """The config number (c#) the accessory is currently advertising, if known."""
+        description = self.description
+        if description is None and (
+            discovery := self.controller.discoveries.get(self.id)
+        ):
+            description = discovery.description
+        return description.config_num if description else None
+
     def restore_accessories_state(
         self, accessories: list[dict[str, Any]], config_num: int
     ) -> None:
@@ -129,13 +252,21 @@ class AbstractPairing(metaclass=ABCMeta):
         self._accessories_state = AccessoriesState(accessories, config_num)
         self._update_accessories_state_cache()
 
-    def _update_accessories_state_cache(self):
-        """Update the cache with the current state of the accessories."""
-        self.controller._char_cache.async_create_or_update_map(
+    def _update_accessories_state_cache(self, **metadata: Any) -> None:
+        """Update the cache with the current state of the accessories.
+
+        The known `metadata` is only kept by caches that have the optional
+        async_update_map_metadata method.
+        """
+        cache = self.controller._char_cache
+        cache.async_create_or_update_map(
             self.id,
             self.config_num,
             self.accessories.serialize(),
         )
+        metadata = {key: value for key, value in metadata.items() if value is not None}
+        if metadata and (update := getattr(cache, "async_update_map_metadata", None)):
+            update(self.id, **metadata)
 
     async def get_primary_name(self) -> str:
         """Return the primary name of the device."""
@@ -150,22 +281,60 @@ class AbstractPairing(metaclass=ABCMeta):
         )
         return accessory_info.value(CharacteristicsTypes.NAME, "")
 
-    @abstractmethod
     async def async_populate_accessories_state(
         self, force_update: bool = False
     ) -> None:
         """Populate the state of all accessories.
 
         This method should try not to fetch all the accessories unless
-        we know the config num is out of date or force_update is True
+        we know the config num is out of date or force_update is True.
+
+        The accessories are loaded from the characteristic cache if they aren't
+        known yet, and only fetched if the cache is empty or the config number
+        the accessory advertises doesn't match it. If the advertised config
+        number isn't known the cache is trusted - a later change will arrive
+        through notify_config_changed.
         """
+        if not self.accessories and not force_update:
+            self._load_accessories_from_cache()
+
+        config_num = self._advertised_config_num()
+        config_changed = (
+            bool(self.accessories)
+            and config_num is not None
+            and config_num != self.config_num
+        )
+
+        if not self.accessories or force_update or config_changed:
+            logger.debug(
+                "%s: Fetching accessories, cached config_num: %s, advertised config_num: %s",
+                self.id,
+                self.config_num,
+                config_num,
+            )
+            await self._async_fetch_accessories()
+            if config_num is not None:
+                self._accessories_state = AccessoriesState(
+                    self._accessories_state.accessories, config_num
+                )
+
+            if config_changed:
+                self._callback_and_save_config_changed(self.config_num)
+            else:
+                self._update_accessories_state_cache()
+
+    async def _async_fetch_accessories(self) -> None:
+        """Fetch the accessories from the accessory and make them the current state."""
+        await self.list_accessories_and_characteristics()
 
     @abstractmethod
     async def close(self) -> None:
         """Close the connection."""
 
     @abstractmethod
-    async def list_accessories_and_characteristics(self) -> list[dict[str, Any]]:
+    async def list_accessories_and_characteristics(
+        self, *, deadline: float | None = None
+    ) -> list[dict[str, Any]]:
         """List all accessories and characteristics."""
 
     @abstractmethod
@@ -180,13 +349,53 @@ class AbstractPairing(metaclass=ABCMeta):
         include_perms=False,
         include_type=False,
         include_events=False,
+        *,
+        deadline: float | None = None,
     ):
-        """Get characteristics."""
+        """Get characteristics.
+
+        Like the other request methods, this takes an optional deadline (a
+        time.monotonic() value) by which the call must complete, including any
+        time spent connecting. DeadlineExceededError is raised if it can't.
+        """
 
     @abstractmethod
-    async def put_characteristics(self, characteristics):
+    async def put_characteristics(
+        self, characteristics, *, deadline: float | None = None
+    ):
         """Put characteristics."""
 
+    async def _async_coalesce_write(
+        self,
+        put_characteristics: Callable[..., Awaitable[dict[tuple[int, int], Any]]],
+        characteristics: Iterable[tuple[int, int, Any]],
+    ) -> dict[tuple[int, int], Any]:
+        """Queue writes to be sent with any others made in the same window.
+
+        Each caller gets the status of its own characteristics from the combined
+        response. A caller whose value was replaced by a later write gets the
+        status of the write that was actually sent.
+        """
+        characteristics = list(characteristics)
+
+        def _add(pending: dict[tuple[int, int], Any]) -> None:
+            for aid, iid, value in characteristics:
+                pending[(aid, iid)] = value
+
+        async def _send(
+            pending: dict[tuple[int, int], Any]
+        ) -> dict[tuple[int, int], Any]:
+            results = await put_characteristics(
+                self, [(aid, iid, value) for (aid, iid), value in pending.items()]
+            )
+            return results or {}
+
+        results = await self._pending_write.call(
+            self.write_coalesce_window, _add, _send
+        )
+        keys = [(aid, iid) for aid, iid, _ in characteristics]
+        return {key: dict(results[key]) for key in keys if key in results}
+
     @abstractmethod
     async def identify(self):
         """Identify the device."""
@@ -7,6 +7,8 @@ from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak.backends.device import BLEDevice
 from bleak_retry_connector import BleakClientWithServiceCache
 
+from aiohomekit.uuid import normalize_uuid
+
 from .const import HAP_MIN_REQUIRED_MTU
 
 BLEAK_EXCEPTIONS = (AttributeError, BleakError)
@@ -22,6 +24,19 @@ class AIOHomeKitBleakClient(BleakClientWithServiceCache):
         super().__init__(address_or_ble_device)
         self._char_cache: dict[tuple[str, str], BleakGATTCharacteristic] = {}
         self._iid_cache: dict[BleakGATTCharacteristic, int] = {}
+        # iids from a GATT database fetched on an earlier connection, by
+        # service and characteristic type
+        self._known_iids: dict[tuple[str, str], int] = {}
+
+    def set_known_iids(self, iids: dict[tuple[str, str], int]) -> None:
+        """
+        Use iids from a GATT database that is still current instead of reading them.
+
+        The iids already looked up may have come from an older database, so
+        they are looked up again.
+        """
+        self._known_iids = iids
+        self._iid_cache.clear()
 
     def get_characteristic(
         self, service_type: str, characteristic_type: str
@@ -52,6 +67,11 @@ class AIOHomeKitBleakClient(BleakClientWithServiceCache):
         """Get the iid of a characteristic."""
         if iid := self._iid_cache.get(char):
             return iid
+        if iid := self._known_iids.get(
+            (normalize_uuid(char.service_uuid), normalize_uuid(char.uuid))
+        ):
+            self._iid_cache[char] = iid
+            return iid
         iid_handle = char.get_descriptor(CHAR_DESCRIPTOR_UUID)
         if iid_handle is None:
             return None
@@ -13,6 +13,8 @@ from aiohomekit.characteristic_cache import CharacteristicCacheType
 from aiohomekit.controller.abstract import AbstractController, AbstractPairingData
 from aiohomekit.controller.ble.manufacturer_data import HomeKitAdvertisement
 from aiohomekit.controller.ble.pairing import BlePairing
+from aiohomekit.controller.ble.signatures import SignatureCache
+from aiohomekit.controller.ble.slots import MAX_CONNECTION_SLOTS, ConnectionSlots
 from aiohomekit.exceptions import AccessoryNotFoundError
 
 from .discovery import BleDiscovery
@@ -31,10 +33,14 @@ class BleController(AbstractController):
         self,
         char_cache: CharacteristicCacheType,
         bleak_scanner_instance: BleakScanner | None = None,
+        max_connection_slots: int = MAX_CONNECTION_SLOTS,
     ) -> None:
         super().__init__(char_cache=char_cache)
+        # Shared by all pairings so they don't fight over the adapter
+        self.connection_slots = ConnectionSlots(max_connection_slots)
         self._scanner = bleak_scanner_instance
         self._ble_futures: dict[str, list[asyncio.Future[BLEDevice]]] = {}
+        self.signature_cache = SignatureCache()
 
     def _device_detected(
         self, device: BLEDevice, advertisement_data: AdvertisementData
@@ -0,0 +1,185 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+import logging
+from typing import Any, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
+
+
+class OperationPriority(IntEnum):
+    """The classes of work a pairing does. Lower values are served first."""
+
+    INTERACTIVE_WRITE = 0
+    INTERACTIVE_READ = 1
+    CATCH_UP_POLL = 2
+    CONFIG_SYNC = 3
+
+
+# Set while an operation runs, so that the operations it starts inherit its
+# priority instead of using their own
+_requested: ContextVar[OperationPriority | None] = ContextVar(
+    "aiohomekit_ble_operation_priority", default=None
+)
+_current: ContextVar[Operation | None] = ContextVar(
+    "aiohomekit_ble_operation", default=None
+)
+
+
+def operation_priority(
+    priority: OperationPriority,
+) -> Callable[[WrapFuncType], WrapFuncType]:
+    """Define a wrapper that runs the operations a method starts at `priority`."""
+
+    def _decorator(func: WrapFuncType) -> WrapFuncType:
+        async def _async_wrap(*args: Any, **kwargs: Any) -> Any:
+            token = _requested.set(priority)
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _requested.reset(token)
+
+        return cast(WrapFuncType, _async_wrap)
+
+    return _decorator
+
+
+class Operation:
+    """A turn at using the connection of a pairing."""
+
+    __slots__ = ("priority",)
+
+    def __init__(self, priority: OperationPriority) -> None:
+        self.priority = priority
+
+    @contextmanager
+    def running(self) -> Iterator[None]:
+        """Mark this as the operation of the current call."""
+        requested = _requested.set(self.priority)
+        current = _current.set(self)
+        try:
+            yield
+        finally:
+            _current.reset(current)
+            _requested.reset(requested)
+
+
+class OperationQueue:
+    """
+    Runs the operations of a pairing one at a time, most urgent first.
+
+    Operations of the same priority run in the order they were queued. Long
+    running operations call `checkpoint` between requests so that a more
+    urgent operation only has to wait for the request in flight.
+    """
+
+    def __init__(self) -> None:
+        self._holder: Operation | None = None
+        self._waiting: dict[
+            OperationPriority, deque[tuple[Operation, asyncio.Future]]
+        ] = {priority: deque() for priority in OperationPriority}
+
+    def locked(self) -> bool:
+        """Whether an operation is running."""
+        return self._holder is not None
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of operations waiting to run."""
+        return sum(len(queue) for queue in self._waiting.values())
+
+    async def acquire(self, priority: OperationPriority) -> Operation:
+        """
+        Wait for a turn, which lasts until it is passed to `release`.
+
+        Inside another operation, the priority of that operation is used instead.
+        """
+        if (requested := _requested.get()) is not None:
+            priority = requested
+        operation = Operation(priority)
+        await self._wait(operation, resume=False)
+        return operation
+
+    def release(self, operation: Operation) -> None:
+        """End the turn of `operation`, if it still has it."""
+        if self._holder is not operation:
+            return
+        self._holder = None
+        self._wake()
+
+    def should_yield(self) -> bool:
+        """Whether a more urgent operation is waiting for the current one."""
+        operation = _current.get()
+        if operation is None or operation is not self._holder:
+            return False
+        return any(
+            queue
+            for priority, queue in self._waiting.items()
+            if priority < operation.priority
+        )
+
+    async def checkpoint(self) -> None:
+        """Let more urgent operations run first, then carry on."""
+        if not self.should_yield():
+            return
+        operation = self._holder
+        logger.debug("Pausing %s for a more urgent operation", operation.priority.name)
+        self._holder = None
+        self._wake()
+        # Carry on ahead of the operations that queued behind us
+        await self._wait(operation, resume=True)
+
+    async def _wait(self, operation: Operation, resume: bool) -> None:
+        if self._holder is None and not self.queue_depth:
+            self._holder = operation
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        queue = self._waiting[operation.priority]
+        if resume:
+            queue.appendleft((operation, future))
+        else:
+            queue.append((operation, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if (operation, future) in queue:
+                queue.remove((operation, future))
+            elif self._holder is operation:
+                # We were given the turn just as we were cancelled, pass it on
+                self.release(operation)
+            raise
+
+    def _wake(self) -> None:
+        for queue in self._waiting.values():
+            while queue:
+                operation, future = queue.popleft()
+                # Skip operations that were cancelled but haven't woken up yet
+                if not future.done():
+                    self._holder = operation
+                    future.set_result(None)
+                    return
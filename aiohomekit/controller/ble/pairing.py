@@ -25,11 +25,13 @@ import struct
 import time
 from typing import TYPE_CHECKING, Any, TypeVar, cast
 
+from bleak.backends.characteristic import BleakGATTCharacteristic
 from bleak.backends.device import BLEDevice
 from bleak.backends.service import BleakGATTServiceCollection
 from bleak.exc import BleakError
 from bleak_retry_connector import ble_device_has_changed
 
+from aiohomekit.deadline import check_deadline, remaining, wait_for, with_deadline
 from aiohomekit.exceptions import (
     AccessoryDisconnectedError,
     AccessoryNotFoundError,
@@ -53,7 +55,7 @@ from aiohomekit.protocol.tlv import TLV
 from aiohomekit.utils import async_create_task
 from aiohomekit.uuid import normalize_uuid
 
-from ..abstract import AbstractPairing, AbstractPairingData
+from ..abstract import AbstractPairing, AbstractPairingData, coalesce_writes
 from .bleak import BLEAK_EXCEPTIONS, AIOHomeKitBleakClient
 from .client import (
     ble_request,
@@ -63,6 +65,8 @@ from .client import (
 from .connection import establish_connection
 from .key import DecryptionKey, EncryptionKey
 from .manufacturer_data import HomeKitAdvertisement
+from .operations import OperationPriority, OperationQueue, operation_priority
+from .slots import ConnectionSlots, user_priority
 from .structs import HAP_TLV, Characteristic as CharacteristicTLV
 from .values import from_bytes, to_bytes
 
@@ -84,6 +88,9 @@ SERVICE_INSTANCE_ID = "E604E95D-A759-4817-87D3-AA005083A0D1"
 
 
 SUBSCRIPTION_RESTORE_DELAY = 0.5
+# Characteristics that notify within this many seconds of each other are
+# read back in a single pass
+EVENT_COALESCE_WINDOW = 0.1
 SKIP_SYNC_SERVICES = {
     ServicesTypes.THREAD_TRANSPORT,
     ServicesTypes.PAIRING,
@@ -94,14 +101,26 @@ BLE_AID = 1  # The aid for BLE devices is always 1
 WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
 
 
-def operation_lock(func: WrapFuncType) -> WrapFuncType:
-    """Define a wrapper to only allow a single operation at a time."""
+def operation_lock(
+    priority: OperationPriority,
+) -> Callable[[WrapFuncType], WrapFuncType]:
+    """Define a wrapper to only allow a single operation at a time, most urgent first."""
 
-    async def _async_wrap(self: BlePairing, *args: Any, **kwargs: Any) -> None:
-        async with self._operation_lock:
-            return await func(self, *args, **kwargs)
+    def _decorator(func: WrapFuncType) -> WrapFuncType:
+        async def _async_wrap(self: BlePairing, *args: Any, **kwargs: Any) -> None:
+            operation = await wait_for(self._operations.acquire(priority), None)
+            try:
+                with operation.running():
+                    return await func(self, *args, **kwargs)
+            finally:
+                self._operations.release(operation)
+                if self._slot_wanted and not self._operations.locked():
+                    # Another pairing is waiting for our connection slot
+                    async_create_task(self._async_close_if_slot_wanted())
 
-    return cast(WrapFuncType, _async_wrap)
+        return cast(WrapFuncType, _async_wrap)
+
+    return _decorator
 
 
 class BlePairing(AbstractPairing):
@@ -153,8 +172,8 @@ class BlePairing(AbstractPairing):
         #   a read/write need to be atomic otherwise we end up having
         #   to guess what encryption counter to use for the decrypt
         self._ble_request_lock = asyncio.Lock()
-        # Only allow a single operation at at time
-        self._operation_lock = asyncio.Lock()
+        # Only allow a single operation at at time, interactive ones first
+        self._operations = OperationQueue()
         # Only allow a single attempt to sync config at a time
         self._config_lock = asyncio.Lock()
         # Only subscribe to characteristics one at a time
@@ -162,6 +181,14 @@ class BlePairing(AbstractPairing):
 
         self._restore_subscriptions_timer: asyncio.TimerHandle | None = None
 
+        # Notified iids waiting to be read back
+        self._pending_events: set[int] = set()
+        self._events_timer: asyncio.TimerHandle | None = None
+        self._events_task: asyncio.Task | None = None
+
+        # Set when another pairing is waiting for our connection slot
+        self._slot_wanted = False
+
     @property
     def address(self) -> str:
         """Return the address of the device."""
@@ -274,6 +301,9 @@ class BlePairing(AbstractPairing):
     async def _async_request_under_lock(
         self, opcode: OpCode, char: Characteristic, data: bytes | None = None
     ) -> bytes:
+        # A request that is already on the air is allowed to finish, but don't
+        # start another one once the caller has run out of time.
+        check_deadline()
         endpoint = self.client.get_characteristic(char.service.type, char.type)
         if not self.client or not self.client.is_connected:
             logger.debug("%s: Client not connected", self.name)
@@ -303,12 +333,43 @@ class BlePairing(AbstractPairing):
         self._encryption_key = None
         self._decryption_key = None
         self._notifications = set()
+        self._slot_wanted = False
+        if slots := self._connection_slots:
+            slots.release(self)
         if self._restore_subscriptions_timer:
             self._restore_subscriptions_timer.cancel()
             self._restore_subscriptions_timer = None
+        self._pending_events.clear()
+        if self._events_timer:
+            self._events_timer.cancel()
+            self._events_timer = None
+
+    @property
+    def _connection_slots(self) -> ConnectionSlots | None:
+        # Pairings created without a BleController connect without a slot
+        return getattr(self.controller, "connection_slots", None)
+
+    def _async_yield_slot(self) -> None:
+        """Disconnect as soon as we are idle, another pairing needs the slot."""
+        logger.debug("%s: Connection slot wanted by another pairing", self.name)
+        self._slot_wanted = True
+        if not self._operations.locked():
+            async_create_task(self._async_close_if_slot_wanted())
+
+    @operation_lock(OperationPriority.CONFIG_SYNC)
+    async def _async_close_if_slot_wanted(self) -> None:
+        # Don't pull the connection from under an operation that started since
+        if self._slot_wanted:
+            await self.close()
+            self._slot_wanted = False
+            if slots := self._connection_slots:
+                slots.release(self)
 
     async def _ensure_connected(self):
+        slots = self._connection_slots
         if self.client and self.client.is_connected:
+            if slots:
+                slots.touch(self)
             return
         async with self._connection_lock:
             # Check again while holding the lock
@@ -316,7 +377,7 @@ class BlePairing(AbstractPairing):
                 return
             if not self.device and (
                 discovery := await self.controller.async_get_discovery(
-                    self.address, DISCOVER_TIMEOUT
+                    self.address, remaining(DISCOVER_TIMEOUT)
                 )
             ):
                 self.device = discovery.device
@@ -325,12 +386,19 @@ class BlePairing(AbstractPairing):
                 raise AccessoryNotFoundError(
                     f"{self.name}: Could not find {self.address}"
                 )
-            self.client = await establish_connection(
-                self.device,
-                self.name,
-                self._async_disconnected,
-                cached_services=self._cached_services,
-            )
+            if slots:
+                await wait_for(slots.acquire(self, self._async_yield_slot), None)
+            try:
+                self.client = await establish_connection(
+                    self.device,
+                    self.name,
+                    self._async_disconnected,
+                    cached_services=self._cached_services,
+                )
+            except BaseException:
+                if slots:
+                    slots.release(self)
+                raise
             self._cached_services = self.client.services
             logger.debug(
                 "%s: Connected, processing subscriptions: %s",
@@ -349,42 +417,64 @@ class BlePairing(AbstractPairing):
         # Find the GATT Characteristic object for this iid
         endpoint = self.client.get_characteristic(char.service.type, char.type)
 
-        # We only want to allow one in flight read
-        # and one pending read at a time since there
-        # may be a notify storm and the read it always
-        # going to give us the latest value anyways
-        max_callback_enforcer = asyncio.Semaphore(2)
-
-        async def _async_callback() -> None:
-            if max_callback_enforcer.locked():
-                # Already one being read now, and one pending
-                return
-            async with max_callback_enforcer:
-                if not self.client or not self.client.is_connected:
-                    # Client disconnected
-                    return
-                logger.debug("%s: Retrieving event for iid: %s", self.name, iid)
-                if results := await self._get_characteristics_without_retry(
-                    [(BLE_AID, iid)]
-                ):
-                    for listener in self.listeners:
-                        listener(results)
-
         def _callback(id: int, data: bytes) -> None:
             logger.debug("%s: Received event for iid=%s: %s", self.name, iid, data)
             if data != b"":
                 # We should only poll on empty messages, otherwise we may poll
                 # the device every second on DBUS systems.
                 return
-            if max_callback_enforcer.locked():
-                # Already one being read now, and one pending
-                return
-            async_create_task(_async_callback())
+            self._async_queue_event(iid)
 
         logger.debug("%s: Subscribing to iid: %s", self.name, iid)
         await self.client.start_notify(endpoint, _callback)
         self._notifications.add(iid)
 
+    def _async_queue_event(self, iid: int) -> None:
+        """Read back a notified characteristic along with any that notify soon after."""
+        self._pending_events.add(iid)
+        if self._events_timer or self._events_task:
+            # There may be a notify storm, and the read will always give us
+            # the latest value anyways
+            return
+        self._events_timer = asyncio.get_running_loop().call_later(
+            EVENT_COALESCE_WINDOW, self._async_start_event_read
+        )
+
+    def _async_start_event_read(self) -> None:
+        self._events_timer = None
+        self._events_task = async_create_task(self._async_read_events())
+
+    async def _async_read_events(self) -> None:
+        """Read the notified characteristics and deliver them as one event."""
+        try:
+            # Anything that notifies during a read is picked up by the next pass
+            while self._pending_events:
+                if not self.client or not self.client.is_connected:
+                    # Client disconnected
+                    self._pending_events.clear()
+                    return
+                iids = sorted(self._pending_events)
+                self._pending_events.clear()
+                logger.debug("%s: Retrieving events for iids: %s", self.name, iids)
+                try:
+                    # One characteristic failing doesn't lose the other events
+                    results = await self._get_characteristics_without_retry(
+                        [(BLE_AID, iid) for iid in iids], skip_failed=True
+                    )
+                except (
+                    AccessoryDisconnectedError,
+                    *BLEAK_EXCEPTIONS,
+                    AccessoryNotFoundError,
+                    ValueError,
+                ) as exc:
+                    logger.debug("%s: Failed to retrieve events: %s", self.name, exc)
+                    return
+                if results:
+                    for listener in self.listeners:
+                        listener(results)
+        finally:
+            self._events_task = None
+
     async def _async_pair_verify(self) -> None:
         async with self._ble_request_lock:
             session_id, derive = await drive_pairing_state_machine(
@@ -403,6 +493,7 @@ class BlePairing(AbstractPairing):
             self._session_id = session_id
             self._derive = derive
 
+    @operation_lock(OperationPriority.CONFIG_SYNC)
     async def _async_process_config_changed(self) -> None:
         """Handle config changed seen from the advertisement."""
         try:
@@ -420,7 +511,7 @@ class BlePairing(AbstractPairing):
             "%s: Polling subscriptions for changes during disconnection", self.name
         )
         try:
-            results = await self.get_characteristics(list(self.subscriptions))
+            results = await self._async_poll_subscriptions()
         except (
             AccessoryDisconnectedError,
             *BLEAK_EXCEPTIONS,
@@ -434,15 +525,23 @@ class BlePairing(AbstractPairing):
         for listener in self.listeners:
             listener(results)
 
+    @operation_priority(OperationPriority.CATCH_UP_POLL)
+    async def _async_poll_subscriptions(self) -> dict[tuple[int, int], dict[str, Any]]:
+        """Read every subscribed characteristic, behind interactive operations."""
+        return await self.get_characteristics(list(self.subscriptions))
+
     async def _async_fetch_gatt_database(self) -> Accessories:
         logger.debug("%s: Fetching GATT database", self.name)
         accessory = Accessory()
         accessory.aid = 1
         # Never use the cache when fetching the GATT database
+        self.client.set_known_iids({})
         services = await self.client.get_services()
-        for service in services:
-            s = accessory.add_service(normalize_uuid(service.uuid))
 
+        # The iids are a cheap fingerprint of the database, reading a signature
+        # takes a write and a read for every characteristic
+        iids: dict[BleakGATTCharacteristic, int] = {}
+        for service in services:
             for char in service.characteristics:
                 if normalize_uuid(char.uuid) == SERVICE_INSTANCE_ID:
                     continue
@@ -451,32 +550,52 @@ class BlePairing(AbstractPairing):
                 if iid is None:
                     logger.debug("%s: No iid for %s", self.name, char.uuid)
                     continue
+                iids[char] = iid
+
+        fingerprint = (
+            self.description.category if self.description else None,
+            self.description.config_num if self.description else None,
+            tuple(
+                (normalize_uuid(char.service_uuid), normalize_uuid(char.uuid), iid)
+                for char, iid in iids.items()
+            ),
+        )
+        signature_cache = self.controller.signature_cache
+        signatures = signature_cache.get(fingerprint)
+        if signatures is not None and not await self._async_verify_signatures(
+            iids, signatures
+        ):
+            logger.debug(
+                "%s: Signatures differ from an accessory with the same layout",
+                self.name,
+            )
+            signatures = None
 
-                tid = random.randint(1, 254)
-                for data in encode_pdu(
-                    OpCode.CHAR_SIG_READ,
-                    tid,
-                    iid,
-                ):
-                    await self.client.write_gatt_char(
-                        char,
-                        data,
-                        "write-without-response" not in char.properties,
-                    )
+        if signatures is not None:
+            logger.debug(
+                "%s: Reusing signatures from an identical accessory", self.name
+            )
+        else:
+            signatures = {}
+            for char, iid in iids.items():
+                signatures[iid] = await self._async_read_signature(char, iid)
+            signature_cache.set(fingerprint, signatures)
 
-                payload = await self.client.read_gatt_char(char)
+        for service in services:
+            s = accessory.add_service(normalize_uuid(service.uuid))
 
-                status, _, signature = decode_pdu(tid, payload)
-                if status != PDUStatus.SUCCESS:
+            for char in service.characteristics:
+                if (iid := iids.get(char)) is None:
+                    continue
+                if (decoded := signatures[iid]) is None:
                     continue
-
-                decoded = CharacteristicTLV.decode(signature).to_dict()
 
                 hap_char = s.add_char(normalize_uuid(char.uuid))
                 logger.debug("%s: char: %s decoded: %s", self.name, char, decoded)
 
                 hap_char.iid = iid
-                hap_char.perms = decoded["perms"]
+                # Signatures can be shared with identical accessories
+                hap_char.perms = list(decoded["perms"])
                 # Some vendor characteristics have no format
                 # See https://github.com/home-assistant/core/issues/76104
                 if "format" in decoded:
@@ -494,6 +613,56 @@ class BlePairing(AbstractPairing):
 
         return accessories
 
+    async def _async_verify_signatures(
+        self,
+        iids: dict[BleakGATTCharacteristic, int],
+        signatures: dict[int, dict[str, Any] | None],
+    ) -> bool:
+        """
+        Check cached signatures against one read from this accessory.
+
+        Products that share a layout can still differ in their ranges, so a
+        characteristic with a range is checked when there is one.
+        """
+        if not iids:
+            return True
+        chars = list(iids)
+        char = next(
+            (
+                char
+                for char in chars
+                if (decoded := signatures[iids[char]])
+                and ("minValue" in decoded or "maxValue" in decoded)
+            ),
+            chars[0],
+        )
+        iid = iids[char]
+        return await self._async_read_signature(char, iid) == signatures[iid]
+
+    async def _async_read_signature(
+        self, char: BleakGATTCharacteristic, iid: int
+    ) -> dict[str, Any] | None:
+        """Read and decode the signature of a characteristic, if it has one."""
+        tid = random.randint(1, 254)
+        for data in encode_pdu(
+            OpCode.CHAR_SIG_READ,
+            tid,
+            iid,
+        ):
+            await self.client.write_gatt_char(
+                char,
+                data,
+                "write-without-response" not in char.properties,
+            )
+
+        payload = await self.client.read_gatt_char(char)
+
+        status, _, signature = decode_pdu(tid, payload)
+        if status != PDUStatus.SUCCESS:
+            return None
+
+        return CharacteristicTLV.decode(signature).to_dict()
+
     async def close(self) -> None:
         async with self._connection_lock:
             await self._close_while_locked()
@@ -512,7 +681,8 @@ class BlePairing(AbstractPairing):
         self._async_reset_connection_state()
         logger.debug("%s: Connection closed from close call", self.name)
 
-    @operation_lock
+    @with_deadline
+    @operation_lock(OperationPriority.CONFIG_SYNC)
     @retry_bluetooth_connection_error()
     async def list_accessories_and_characteristics(self) -> list[dict[str, Any]]:
         await self._populate_accessories_and_characteristics()
@@ -562,7 +732,7 @@ class BlePairing(AbstractPairing):
         except BleakError as ex:
             raise AccessoryDisconnectedError(f"{self.name} connection failed: {ex}")
 
-    @operation_lock
+    @operation_lock(OperationPriority.CONFIG_SYNC)
     @retry_bluetooth_connection_error()
     async def _async_populate_accessories_state(
         self, force_update: bool = False
@@ -600,16 +770,30 @@ class BlePairing(AbstractPairing):
                 new_config_num = self.description.config_num if self.description else 0
                 self._accessories_state = AccessoriesState(accessories, new_config_num)
                 update_values = True
+            elif not self._encryption_key:
+                # The cached database is current, so there is no need to read
+                # the iid descriptors again on this connection
+                self.client.set_known_iids(self._gatt_iids())
 
             if not self._encryption_key:
                 await self._async_pair_verify()
 
-            if update_values:
-                await self._populate_char_values(config_changed)
-                self._update_accessories_state_cache()
+        # Reading every value can pause for interactive operations, and they
+        # take the config lock to check the connection
+        if update_values:
+            await self._populate_char_values(config_changed)
+            self._update_accessories_state_cache()
 
-            if config_changed:
-                self._callback_and_save_config_changed(self.config_num)
+        if config_changed:
+            self._callback_and_save_config_changed(self.config_num)
+
+    def _gatt_iids(self) -> dict[tuple[str, str], int]:
+        """The iid of each characteristic in the GATT database, by service and type."""
+        return {
+            (service.type, char.type): char.iid
+            for service in self.accessories.aid(BLE_AID).services
+            for char in service.characteristics
+        }
 
     def _restore_subscriptions(self):
         """Restore subscriptions after after connecting."""
@@ -642,7 +826,7 @@ class BlePairing(AbstractPairing):
                         "%s: Could not start notify for %s: %s", self.name, iid, ex
                     )
 
-    @operation_lock
+    @operation_lock(OperationPriority.CONFIG_SYNC)
     @retry_bluetooth_connection_error()
     async def _process_config_changed(self, config_num: int) -> None:
         """Process a config change.
@@ -651,7 +835,7 @@ class BlePairing(AbstractPairing):
         """
         await self._populate_accessories_and_characteristics()
 
-    @operation_lock
+    @operation_lock(OperationPriority.INTERACTIVE_READ)
     @retry_bluetooth_connection_error()
     async def list_pairings(self):
         request_tlv = TLV.encode_list(
@@ -693,6 +877,7 @@ class BlePairing(AbstractPairing):
                 r["controllerType"] = controller_type
         return tmp
 
+    @with_deadline
     @retry_bluetooth_connection_error()
     async def get_characteristics(
         self,
@@ -700,21 +885,29 @@ class BlePairing(AbstractPairing):
     ) -> dict[tuple[int, int], dict[str, Any]]:
         return await self._get_characteristics_without_retry(characteristics)
 
-    @operation_lock
+    @operation_lock(OperationPriority.INTERACTIVE_READ)
     async def _get_characteristics_without_retry(
         self,
         characteristics: list[tuple[int, int]],
+        skip_failed: bool = False,
     ) -> dict[tuple[int, int], dict[str, Any]]:
         await self._populate_accessories_and_characteristics()
         accessory_chars = self.accessories.aid(1).characteristics
         return await self._get_characteristics_while_connected(
-            [accessory_chars.iid(iid) for _, iid in characteristics]
+            [accessory_chars.iid(iid) for _, iid in characteristics], skip_failed
         )
 
     async def _get_characteristics_while_connected(
         self,
         characteristics: list[Characteristic],
+        skip_failed: bool = False,
     ) -> dict[tuple[int, int], dict[str, Any]]:
+        """
+        Read characteristics one at a time.
+
+        With skip_failed, characteristics the accessory refuses to read are
+        left out of the results instead of failing the others.
+        """
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(
                 "%s: Reading characteristics: %s",
@@ -724,33 +917,45 @@ class BlePairing(AbstractPairing):
 
         results = {}
 
-        async with self._ble_request_lock:
-            for char in characteristics:
-                data = await self._async_request_under_lock(OpCode.CHAR_READ, char)
-                decoded = dict(TLV.decode_bytes(data))[1]
+        for char in characteristics:
+            # Bulk reads only hold up an interactive operation for one request
+            await self._operations.checkpoint()
+            async with self._ble_request_lock:
+                try:
+                    data = await self._async_request_under_lock(OpCode.CHAR_READ, char)
+                except ValueError as exc:
+                    if not skip_failed:
+                        raise
+                    logger.debug("%s: Failed to read %s: %s", self.name, char, exc)
+                    continue
+            decoded = dict(TLV.decode_bytes(data))[1]
+
+            logger.debug(
+                "%s: Read characteristic got data, expected format is %s: data=%s decoded=%s",
+                self.name,
+                char.format,
+                data,
+                decoded,
+            )
 
+            try:
+                results[(BLE_AID, char.iid)] = {"value": from_bytes(char, decoded)}
+            except struct.error as ex:
                 logger.debug(
-                    "%s: Read characteristic got data, expected format is %s: data=%s decoded=%s",
+                    "%s: Failed to decode characteristic for %s from %s: %s",
                     self.name,
-                    char.format,
-                    data,
+                    char,
                     decoded,
+                    ex,
                 )
 
-                try:
-                    results[(BLE_AID, char.iid)] = {"value": from_bytes(char, decoded)}
-                except struct.error as ex:
-                    logger.debug(
-                        "%s: Failed to decode characteristic for %s from %s: %s",
-                        self.name,
-                        char,
-                        decoded,
-                        ex,
-                    )
-
         return results
 
-    @operation_lock
+    @with_deadline
+    @coalesce_writes
+    # Inside the coalescing, so the batched write keeps it
+    @user_priority
+    @operation_lock(OperationPriority.INTERACTIVE_WRITE)
     @retry_bluetooth_connection_error()
     async def put_characteristics(
         self, characteristics: list[tuple[int, int, Any]]
@@ -803,7 +1008,8 @@ class BlePairing(AbstractPairing):
         return results
 
     # No retry since disconnected events are ok as well
-    @operation_lock
+    @with_deadline
+    @operation_lock(OperationPriority.INTERACTIVE_READ)
     async def subscribe(self, characteristics):
         new_chars = await super().subscribe(characteristics)
         if not new_chars or not self.client or not self.client.is_connected:
@@ -817,7 +1023,8 @@ class BlePairing(AbstractPairing):
     async def unsubscribe(self, characteristics):
         pass
 
-    @operation_lock
+    @user_priority
+    @operation_lock(OperationPriority.INTERACTIVE_WRITE)
     @retry_bluetooth_connection_error()
     async def identify(self):
         await self._populate_accessories_and_characteristics()
@@ -833,7 +1040,8 @@ class BlePairing(AbstractPairing):
             ]
         )
 
-    @operation_lock
+    @user_priority
+    @operation_lock(OperationPriority.INTERACTIVE_WRITE)
     @retry_bluetooth_connection_error()
     async def add_pairing(
         self, additional_controller_pairing_identifier, ios_device_ltpk, permissions
@@ -889,7 +1097,8 @@ class BlePairing(AbstractPairing):
                 )
             raise UnknownError(f"{self.name}: Add pairing failed: unknown error")
 
-    @operation_lock
+    @user_priority
+    @operation_lock(OperationPriority.INTERACTIVE_WRITE)
     @retry_bluetooth_connection_error(attempts=10)
     async def remove_pairing(self, pairingId: str):
         await self._populate_accessories_and_characteristics()
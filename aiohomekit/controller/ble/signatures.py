@@ -0,0 +1,54 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Enough for a house full of a few different products
+MAX_SIGNATURE_CACHE_SIZE = 32
+
+Signatures = dict[int, Optional[dict[str, Any]]]
+
+
+class SignatureCache:
+    """
+    Decoded characteristic signatures by GATT database fingerprint.
+
+    Identical accessories only have their signatures read once. The least
+    recently used databases are forgotten once the cache is full.
+    """
+
+    def __init__(self, max_size: int = MAX_SIGNATURE_CACHE_SIZE) -> None:
+        self._max_size = max_size
+        self._signatures: OrderedDict[Hashable, Signatures] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def get(self, fingerprint: Hashable) -> Signatures | None:
+        """The signatures of a database, if an accessory with it has been seen."""
+        if (signatures := self._signatures.get(fingerprint)) is not None:
+            self._signatures.move_to_end(fingerprint)
+        return signatures
+
+    def set(self, fingerprint: Hashable, signatures: Signatures) -> None:
+        """Remember the signatures of a database."""
+        self._signatures[fingerprint] = signatures
+        self._signatures.move_to_end(fingerprint)
+        while len(self._signatures) > self._max_size:
+            self._signatures.popitem(last=False)
@@ -0,0 +1,174 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from contextvars import Context, ContextVar
+from enum import IntEnum
+import logging
+from typing import Any, Hashable, TypeVar, cast
+
+logger = logging.getLogger(__name__)
+
+WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
+
+# Most adapters can only hold a handful of connections at once
+MAX_CONNECTION_SLOTS = 3
+
+
+class Priority(IntEnum):
+    """How urgently a connection is needed. Lower values are served first."""
+
+    USER = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar(
+    "aiohomekit_ble_priority", default=Priority.BACKGROUND
+)
+
+
+def get_priority() -> Priority:
+    """Return the priority of the current call."""
+    return _priority.get()
+
+
+def user_priority(func: WrapFuncType) -> WrapFuncType:
+    """Define a wrapper that gives a method's connection priority over background work."""
+
+    async def _async_wrap(*args: Any, **kwargs: Any) -> Any:
+        token = _priority.set(Priority.USER)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            _priority.reset(token)
+
+    return cast(WrapFuncType, _async_wrap)
+
+
+class ConnectionSlots:
+    """
+    Shares the adapter's connection slots between the pairings of a controller.
+
+    A pairing holds a slot for as long as it is connected. When all the slots
+    are taken, pairings wait for one in priority order and then in the order
+    they asked, and the holder that has been idle the longest is asked to
+    disconnect to make room. A pairing that is already connected never waits.
+    """
+
+    def __init__(self, max_slots: int = MAX_CONNECTION_SLOTS) -> None:
+        if max_slots < 1:
+            raise ValueError("Must allow at least one connection")
+        self.max_slots = max_slots
+        # Holders in least recently used order, with how to ask them to yield
+        self._holders: dict[Hashable, Callable[[], None]] = {}
+        self._yielding: set[Hashable] = set()
+        self._waiting: dict[
+            Priority, dict[Hashable, tuple[asyncio.Future, Callable[[], None]]]
+        ] = {priority: {} for priority in Priority}
+
+    @property
+    def active(self) -> int:
+        """The number of slots in use."""
+        return len(self._holders)
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of pairings waiting for a slot."""
+        return sum(len(queue) for queue in self._waiting.values())
+
+    def holds(self, key: Hashable) -> bool:
+        """Whether `key` holds a slot."""
+        return key in self._holders
+
+    async def acquire(
+        self,
+        key: Hashable,
+        yield_slot: Callable[[], None],
+        priority: Priority | None = None,
+    ) -> None:
+        """
+        Wait for a slot for `key`, which keeps it until it calls `release`.
+
+        :param yield_slot: called when another pairing is waiting and `key`
+            should disconnect as soon as it is idle
+        :param priority: defaults to the priority of the current call
+        """
+        if key in self._holders:
+            # Reuse the connection that is already open
+            self._holders[key] = self._holders.pop(key)
+            return
+
+        if len(self._holders) < self.max_slots and not self.queue_depth:
+            self._holders[key] = yield_slot
+            return
+
+        if priority is None:
+            priority = get_priority()
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[priority][key] = (future, yield_slot)
+        logger.debug(
+            "%s: Waiting for a connection slot (%d queued, %d active)",
+            key,
+            self.queue_depth,
+            self.active,
+        )
+        self._ask_to_yield()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            queue = self._waiting[priority]
+            if queue.get(key, (None,))[0] is future:
+                del queue[key]
+            elif future.done() and not future.cancelled():
+                # We were handed a slot just as we were cancelled, pass it on
+                self.release(key)
+            raise
+
+    def touch(self, key: Hashable) -> None:
+        """Note that `key` has just used its connection."""
+        if key in self._holders:
+            self._holders[key] = self._holders.pop(key)
+
+    def release(self, key: Hashable) -> None:
+        """Give up the slot held by `key`, if it has one."""
+        if self._holders.pop(key, None) is None:
+            return
+        self._yielding.discard(key)
+
+        for queue in self._waiting.values():
+            while queue:
+                waiter = next(iter(queue))
+                future, yield_slot = queue.pop(waiter)
+                # Skip waiters that were cancelled but haven't woken up yet
+                if not future.done():
+                    self._holders[waiter] = yield_slot
+                    future.set_result(None)
+                    return
+
+    def _ask_to_yield(self) -> None:
+        """Ask one more holder to make room, if there are more waiters than that."""
+        if len(self._yielding) >= self.queue_depth:
+            return
+        for key, yield_slot in self._holders.items():
+            if key not in self._yielding:
+                self._yielding.add(key)
+                # Don't hand the asking pairing's priorities to the holder
+                Context().run(yield_slot)
+                return
@@ -17,6 +17,7 @@
 from __future__ import annotations
 
 import asyncio
+import ipaddress
 import logging
 import random
 import struct
@@ -29,9 +30,11 @@ from aiocoap.numbers.codes import Code
 from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives.ciphers.aead import ChaCha20Poly1305
 
+from aiohomekit.deadline import remaining, wait_for
 from aiohomekit.exceptions import (
     AccessoryDisconnectedError,
     AuthenticationError,
+    DeadlineExceededError,
     EncryptionError,
     UnknownError,
 )
@@ -77,7 +80,7 @@ class EncryptionContext:
     send_ctr: int
     send_ctx: ChaCha20Poly1305
 
-    def __init__(self, recv_ctx, send_ctx, event_ctx, uri, coap_ctx):
+    def __init__(self, recv_ctx, send_ctx, event_ctx, uri, coap_ctx, shared=False):
         self.recv_ctr = 0
         self.recv_ctx = recv_ctx
         self.send_ctr = 0
@@ -86,6 +89,8 @@ class EncryptionContext:
         self.event_ctx = event_ctx
 
         self.coap_ctx = coap_ctx
+        # A shared context is used by other connections and must not be shut down
+        self.shared = shared
         self.lock = asyncio.Lock()
         self.uri = uri
 
@@ -154,21 +159,44 @@ class EncryptionContext:
                 "Failed flailing attempts to resynchronize, self-destructing in 3, 2, 1..."
             )
 
-            await self.coap_ctx.shutdown()
+            if not self.shared:
+                await self.coap_ctx.shutdown()
             self.coap_ctx = None
             raise EncryptionError("Decryption of PDU POST response failed")
 
     async def post_bytes(self, payload: bytes, timeout: int = 16.0):
         async with self.lock:
+            budget = remaining(timeout)
             payload = self.encrypt(payload)
 
+            request = Message(code=Code.POST, payload=payload, uri=self.uri)
             try:
-                request = Message(code=Code.POST, payload=payload, uri=self.uri)
-                response = await asyncio.wait_for(
-                    self.coap_ctx.request(request).response, timeout=timeout
-                )
-            except (NetworkError, asyncio.TimeoutError):
+                response_future = self.coap_ctx.request(request).response
+            except NetworkError:
+                raise AccessoryDisconnectedError("Request timeout")
+
+            # Time the request out with a plain timer rather than wait_for, which
+            # would cost an extra task and its cancellation on every request.
+            timed_out = False
+
+            def _timeout() -> None:
+                nonlocal timed_out
+                timed_out = True
+                response_future.cancel()
+
+            timer = asyncio.get_running_loop().call_later(budget, _timeout)
+            try:
+                response = await response_future
+            except asyncio.CancelledError:
+                if not timed_out:
+                    raise
+                if budget < timeout:
+                    raise DeadlineExceededError("Deadline exceeded") from None
+                raise AccessoryDisconnectedError("Request timeout") from None
+            except NetworkError:
                 raise AccessoryDisconnectedError("Request timeout")
+            finally:
+                timer.cancel()
 
             if response.code != Code.CHANGED:
                 logger.warning(f"CoAP POST returned unexpected code {response}")
@@ -239,17 +267,107 @@ class EventResource(resource.Resource):
         return Message(code=Code.VALID)
 
 
+def _host_key(host: str) -> str:
+    """Normalise an IP address so that the same host always gives the same key."""
+    try:
+        address = ipaddress.ip_address(host.split("%")[0])
+    except ValueError:
+        return host
+    if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+        return str(address.ipv4_mapped)
+    return str(address)
+
+
+class EventRouter(resource.Resource):
+    """Passes events on to the connection for the address they came from."""
+
+    def __init__(self, connections: dict[str, CoAPHomeKitConnection]):
+        super().__init__()
+        self.connections = connections
+
+    async def render_put(self, request):
+        remote = request.remote
+        if sockaddr := getattr(remote, "sockaddr", None):
+            host = sockaddr[0]
+        else:
+            host = remote.hostinfo
+
+        connection = self.connections.get(_host_key(host))
+        if connection is None or not connection.is_connected:
+            logger.debug(f"CoAP event from unknown accessory {remote}")
+            return Message(code=Code.NOT_FOUND)
+
+        return await connection.event_resource.render_put(request)
+
+
+class SharedCoAPContext:
+    """
+    A CoAP endpoint shared by all the CoAP connections of a controller.
+
+    Every accessory is reached through the same UDP socket, message ID space
+    and retransmission timers, rather than each pairing running its own.
+    Events are routed to the connection for the address they came from.
+    """
+
+    def __init__(self) -> None:
+        self._context: Context | None = None
+        self._lock = asyncio.Lock()
+        self._connections: dict[str, CoAPHomeKitConnection] = {}
+
+    async def get(self) -> Context:
+        """Return the shared context, creating it the first time."""
+        async with self._lock:
+            if self._context is None:
+                root = resource.Site()
+                root.add_resource([], EventRouter(self._connections))
+                self._context = await Context.create_server_context(
+                    root, bind=("::", 0)
+                )
+            return self._context
+
+    def register(self, connection: CoAPHomeKitConnection) -> None:
+        """Send events from the accessory's address to `connection`."""
+        self._connections[_host_key(connection.host)] = connection
+
+    def unregister(self, connection: CoAPHomeKitConnection) -> None:
+        """Stop sending events from the accessory's address to `connection`."""
+        key = _host_key(connection.host)
+        if self._connections.get(key) is connection:
+            del self._connections[key]
+
+    async def shutdown(self) -> None:
+        """Shut the shared context down, ending the sessions of every connection."""
+        self._connections.clear()
+        async with self._lock:
+            if self._context is not None:
+                context, self._context = self._context, None
+                await context.shutdown()
+
+
 class CoAPHomeKitConnection:
-    def __init__(self, owner, host, port):
+    def __init__(self, owner, host, port, context: SharedCoAPContext | None = None):
+        self.host = host
         self.address = f"[{host}]:{port}"
         self.connection_lock = asyncio.Lock()
         self.enc_ctx = None
         self.owner = owner
         self.pair_setup_client = None
-
-    async def reconnect_soon(self, updated_ip_port=None):
+        # Without a shared context each session gets a context of its own
+        self.context = context
+        self.event_resource = EventResource(self)
+        # The GATT database, also kept raw so it can be cached
+        self.info: Pdu09Database | None = None
+        self.raw_info: bytes | None = None
+
+    async def reconnect_soon(self, updated_ip_port=None) -> bool:
+        """
+        Move the connection to a new address.
+
+        Any session with the old address is dropped, and True is returned so
+        the owner can re-establish it.
+        """
         if updated_ip_port is None:
-            return
+            return False
         old_address = self.address
         new_ip = updated_ip_port["AccessoryIP"]
         new_port = updated_ip_port["AccessoryPort"]
@@ -257,27 +375,47 @@ class CoAPHomeKitConnection:
         logger.debug(
             f"Device address update from zeroconf: old={old_address} new={new_address}"
         )
-        if old_address != new_address:
-            self.address = new_address
-            await self.enc_ctx.coap_ctx.shutdown()
-            self.enc_ctx = None
-            # XXX can't .connect here w/o pairing_data
-        return
+        if old_address == new_address:
+            return False
+
+        if self.context:
+            self.context.unregister(self)
+        self.host = new_ip
+        self.address = new_address
+        if not self.enc_ctx:
+            return False
+
+        # Nothing can use the old session while it is shut down
+        coap_ctx, self.enc_ctx = self.enc_ctx.coap_ctx, None
+        await self._release_context(coap_ctx)
+        return True
+
+    async def _client_context(self) -> Context:
+        if self.context:
+            return await self.context.get()
+        return await Context.create_client_context()
+
+    async def _release_context(self, coap_ctx: Context | None) -> None:
+        if coap_ctx is not None and not self.context:
+            await coap_ctx.shutdown()
 
     async def do_identify(self):
-        client = await Context.create_client_context()
+        client = await self._client_context()
         uri = "coap://%s/0" % (self.address)
 
         request = Message(code=Code.POST, payload=b"", uri=uri)
-        response = await asyncio.wait_for(client.request(request).response, timeout=4.0)
-
-        await client.shutdown()
+        try:
+            response = await asyncio.wait_for(
+                client.request(request).response, timeout=4.0
+            )
+        finally:
+            await self._release_context(client)
         client = None
 
         return response.code == Code.CHANGED
 
     async def do_pair_setup(self, with_auth):
-        self.pair_setup_client = await Context.create_client_context()
+        self.pair_setup_client = await self._client_context()
         uri = "coap://%s/1" % (self.address)
         logger.debug(f"Pair setup 1/2 uri={uri}")
 
@@ -299,7 +437,7 @@ class CoAPHomeKitConnection:
                 return salt, srpB
             except Exception:
                 logger.warning("Pair setup 1/2 failed!")
-                await self.pair_setup_client.shutdown()
+                await self._release_context(self.pair_setup_client)
                 raise
 
     async def do_pair_setup_finish(self, pin, salt, srpB):
@@ -323,11 +461,11 @@ class CoAPHomeKitConnection:
                 break
             except Exception:
                 logger.warning("Pair setup 2/2 failed!")
-                await self.pair_setup_client.shutdown()
+                await self._release_context(self.pair_setup_client)
                 raise
 
         logger.debug(f"Paired with CoAP HAP accessory at {self.address}!")
-        await self.pair_setup_client.shutdown()
+        await self._release_context(self.pair_setup_client)
         self.pair_setup_client = None
 
         return pairing
@@ -335,11 +473,15 @@ class CoAPHomeKitConnection:
     async def do_pair_verify(self, pairing_data):
         if self.is_connected:
             logger.warning("Connecting to connected device?")
-            await self.enc_ctx.coap_ctx.shutdown()
+            await self._release_context(self.enc_ctx.coap_ctx)
             self.enc_ctx = None
 
-        root = resource.Site()
-        coap_client = await Context.create_server_context(root, bind=("::", 0))
+        if self.context:
+            coap_client = await self.context.get()
+        else:
+            root = resource.Site()
+            root.add_resource([], self.event_resource)
+            coap_client = await Context.create_server_context(root, bind=("::", 0))
         uri = "coap://%s/2" % (self.address)
         logger.debug(f"Pair verify uri={uri}")
 
@@ -350,7 +492,7 @@ class CoAPHomeKitConnection:
             try:
                 payload = TLV.encode_list(request)
                 request = Message(code=Code.POST, payload=payload, uri=uri)
-                response = await asyncio.wait_for(
+                response = await wait_for(
                     coap_client.request(request).response, timeout=8.0
                 )
                 payload = TLV.decode_bytes(response.payload, expected=expected)
@@ -361,7 +503,7 @@ class CoAPHomeKitConnection:
                 break
             except Exception:
                 # clean up coap context
-                await coap_client.shutdown()
+                await self._release_context(coap_client)
                 coap_client = None
                 # re-raise any exception
                 raise
@@ -376,11 +518,12 @@ class CoAPHomeKitConnection:
         uri = "coap://%s/" % (self.address)
 
         self.enc_ctx = EncryptionContext(
-            recv_ctx, send_ctx, event_ctx, uri, coap_client
+            recv_ctx, send_ctx, event_ctx, uri, coap_client, shared=bool(self.context)
         )
+        if self.context:
+            self.context.register(self)
 
         logger.debug(f"Connected to CoAP HAP accessory at {self.address}!")
-        root.add_resource([], EventResource(self))
 
         return True
 
@@ -392,6 +535,8 @@ class CoAPHomeKitConnection:
 
             try:
                 await self.do_pair_verify(pairing_data)
+            except DeadlineExceededError:
+                raise
             except asyncio.TimeoutError:
                 logger.warning("Pair verify timed out")
                 raise AccessoryDisconnectedError("Pair verify timed out")
@@ -399,8 +544,10 @@ class CoAPHomeKitConnection:
                 logger.warning("Pair verify failed", exc_info=exc)
                 raise AccessoryDisconnectedError("Pair verify failed")
 
-            # we need the info this provides to be able to read/write characteristics
-            await self.get_accessory_info()
+            # we need the info this provides to be able to read/write characteristics,
+            # unless it was loaded from the cache or a previous connection
+            if self.info is None:
+                await self.get_accessory_info()
 
             return
 
@@ -413,6 +560,7 @@ class CoAPHomeKitConnection:
 
         try:
             self.info = Pdu09Database.decode(body)
+            self.raw_info = body
             logger.debug(f"Get accessory info: {self.info.to_dict()!r}")
         except Exception as exc:
             logger.error(f"TLV decode failed: {body.hex()}", exc_info=exc)
@@ -2,6 +2,10 @@ from __future__ import annotations
 
 from typing import Any
 
+from zeroconf.asyncio import AsyncZeroconf
+
+from aiohomekit.characteristic_cache import CharacteristicCacheType
+from aiohomekit.controller.coap.connection import SharedCoAPContext
 from aiohomekit.controller.coap.discovery import CoAPDiscovery
 from aiohomekit.controller.coap.pairing import CoAPPairing
 from aiohomekit.zeroconf import HAP_TYPE_UDP, ZeroconfController
@@ -14,6 +18,19 @@ class CoAPController(ZeroconfController):
     pairings: dict[str, CoAPPairing]
     aliases: dict[str, CoAPPairing]
 
+    def __init__(
+        self,
+        char_cache: CharacteristicCacheType,
+        zeroconf_instance: AsyncZeroconf,
+    ):
+        super().__init__(char_cache, zeroconf_instance)
+        # One CoAP endpoint for every accessory rather than a socket per pairing
+        self.coap_context = SharedCoAPContext()
+
+    async def async_stop(self):
+        await super().async_stop()
+        await self.coap_context.shutdown()
+
     def _make_discovery(self, discovery) -> CoAPDiscovery:
         return CoAPDiscovery(self, discovery)
 
@@ -32,7 +32,10 @@ class CoAPDiscovery(ZeroconfDiscovery):
         super().__init__(description)
         self.controller = controller
         self.connection = CoAPHomeKitConnection(
-            None, description.address, description.port
+            None,
+            description.address,
+            description.port,
+            getattr(controller, "coap_context", None),
         )
 
     def __repr__(self):
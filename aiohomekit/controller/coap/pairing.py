@@ -23,12 +23,17 @@ from aiohomekit.controller.abstract import (
     AbstractController,
     AbstractPairing,
     AbstractPairingData,
+    coalesce_writes,
 )
-from aiohomekit.exceptions import AccessoryDisconnectedError
+from aiohomekit.deadline import wait_for, with_deadline
+from aiohomekit.exceptions import AccessoryDisconnectedError, DeadlineExceededError
 from aiohomekit.model import Accessories, AccessoriesState, Transport
+from aiohomekit.utils import async_create_task
 from aiohomekit.uuid import normalize_uuid
+from aiohomekit.zeroconf import HomeKitService
 
 from .connection import CoAPHomeKitConnection
+from .structs import Pdu09Database
 
 logger = logging.getLogger(__name__)
 
@@ -42,11 +47,16 @@ class CoAPPairing(AbstractPairing):
         self.id = pairing_data["AccessoryPairingID"]
 
         self.connection = CoAPHomeKitConnection(
-            self, pairing_data["AccessoryIP"], pairing_data["AccessoryPort"]
+            self,
+            pairing_data["AccessoryIP"],
+            pairing_data["AccessoryPort"],
+            getattr(controller, "coap_context", None),
         )
         self.connection_future = None
         self.connection_lock = asyncio.Condition()
         self.pairing_data = pairing_data
+        # The config number advertised while we weren't connected to act on
+        self._pending_config_num: int | None = None
 
     @property
     def is_connected(self):
@@ -67,6 +77,32 @@ class CoAPPairing(AbstractPairing):
         """Returns how often the device should be polled."""
         return timedelta(minutes=1)
 
+    def _async_description_update(self, description: HomeKitService | None) -> None:
+        """Update the description of the accessory as zeroconf sees it change."""
+        super()._async_description_update(description)
+        if description and (
+            self.pairing_data["AccessoryIP"] not in description.addresses
+            or self.pairing_data["AccessoryPort"] != description.port
+        ):
+            # e.g. a different Thread border router is now routing to it
+            self.pairing_data["AccessoryIP"] = description.address
+            self.pairing_data["AccessoryPort"] = description.port
+            async_create_task(self.reconnect_soon())
+
+        if (
+            description
+            and self.accessories
+            and description.config_num != self.config_num
+        ):
+            if self.connection.is_connected:
+                self.notify_config_changed(description.config_num)
+            else:
+                # The cached GATT database is stale, the next connection reads
+                # it again and then the accessories are refreshed
+                self.connection.info = None
+                self.connection.raw_info = None
+                self._pending_config_num = description.config_num
+
     async def _ensure_connected(self):
         # let in one coroutine at a time
         async with self.connection_lock:
@@ -81,7 +117,7 @@ class CoAPPairing(AbstractPairing):
             else:
                 # we'll wait on the primary coroutine & copy how it returns
                 # this drops the lock and reacquires it when we're notified
-                await self.connection_lock.wait()
+                await wait_for(self.connection_lock.wait(), None)
                 # if the primary coroutine failed to connect, we also raise
                 if not self.connection.is_connected:
                     raise AccessoryDisconnectedError(
@@ -93,6 +129,8 @@ class CoAPPairing(AbstractPairing):
             # await the connection outside of the lock
             # this allows other coroutines to show up & wait
             await self.connection_future
+        except DeadlineExceededError:
+            raise
         except BaseException:
             raise AccessoryDisconnectedError("failed to connect")
         else:
@@ -104,6 +142,9 @@ class CoAPPairing(AbstractPairing):
                 )
                 await self.connection.subscribe_to(list(self.subscriptions))
             self._callback_availability_changed(True)
+            if (config_num := self._pending_config_num) is not None:
+                self._pending_config_num = None
+                self.notify_config_changed(config_num)
         finally:
             # until we re-acquire the lock & clear connection_future,
             # other coroutines that show up will all hit the .wait() path.
@@ -135,6 +176,7 @@ class CoAPPairing(AbstractPairing):
         await self._ensure_connected()
         return await self.connection.do_identify()
 
+    @with_deadline
     async def list_accessories_and_characteristics(self) -> list[dict[str, Any]]:
         await self._ensure_connected()
 
@@ -163,17 +205,26 @@ class CoAPPairing(AbstractPairing):
         )
         self._callback_and_save_config_changed(config_num)
 
-    async def async_populate_accessories_state(
-        self, force_update: bool = False
-    ) -> bool:
-        """Populate the state of all accessories.
+    def _load_accessories_from_cache(self) -> None:
+        cache = self.controller._char_cache.get_map(self.id)
+        if not cache or not (gatt_database := cache.get("gatt_database")):
+            # Without the GATT database the cached accessories can't be used
+            return
 
-        This method should try not to fetch all the accessories unless
-        we know the config num is out of date or force_update is True
-        """
-        if not self.accessories or force_update:
-            await self.list_accessories_and_characteristics()
+        super()._load_accessories_from_cache()
+        if self.connection.info is None:
+            raw_info = bytes.fromhex(gatt_database)
+            self.connection.info = Pdu09Database.decode(raw_info)
+            self.connection.raw_info = raw_info
+
+    def _update_accessories_state_cache(self) -> None:
+        """Update the cache with the current state of the accessories."""
+        raw_info = self.connection.raw_info
+        super()._update_accessories_state_cache(
+            gatt_database=raw_info.hex() if raw_info else None
+        )
 
+    @with_deadline
     async def get_characteristics(
         self,
         characteristics,
@@ -181,10 +232,13 @@ class CoAPPairing(AbstractPairing):
         await self._ensure_connected()
         return await self.connection.read_characteristics(characteristics)
 
+    @with_deadline
+    @coalesce_writes
     async def put_characteristics(self, characteristics):
         await self._ensure_connected()
         return await self.connection.write_characteristics(characteristics)
 
+    @with_deadline
     async def subscribe(self, characteristics):
         await self._ensure_connected()
         new_subs = await super().subscribe(set(characteristics))
@@ -193,6 +247,7 @@ class CoAPPairing(AbstractPairing):
             return
         return await self.connection.subscribe_to(list(new_subs))
 
+    @with_deadline
     async def unsubscribe(self, characteristics):
         await self._ensure_connected()
         await super().unsubscribe(set(characteristics))
@@ -225,6 +280,12 @@ class CoAPPairing(AbstractPairing):
         # So we can just re-read from pairing data.
         # This is kinda gross but there is a longer term plan to refactor
         # this API away, so will do for now
-        address = self.pairing_data["AccessoryAddress"]
-        port = self.pairing_data["AccessoryPort"]
-        await self.connection.reconnect_soon(f"{address}:{port}")
+        if not await self.connection.reconnect_soon(self.pairing_data):
+            return
+
+        # Set the session up again now rather than on the next request. The
+        # accessory database is kept, so this is only a pair verify.
+        try:
+            await self._ensure_connected()
+        except AccessoryDisconnectedError as exc:
+            logger.debug("Failed to reconnect after address change: %s", exc)
@@ -15,6 +15,7 @@
 #
 
 from dataclasses import dataclass, field
+from functools import cached_property
 import struct
 from typing import Sequence
 
@@ -325,19 +326,33 @@ class Pdu09Database(TLVStruct):
     def accessories(self) -> list[Pdu09Accessory]:
         return [container.accessory for container in self._accessories]
 
-    def find_characteristic_by_aid_iid(self, aid, iid):
+    @cached_property
+    def _characteristics_by_aid_iid(
+        self,
+    ) -> dict[tuple[int, int], Pdu09Characteristic]:
+        index = {}
         for accessory in self.accessories:
-            if accessory.instance_id == aid:
-                return accessory.find_characteristic_by_iid(iid)
-        return None
+            for service in accessory.services:
+                for characteristic in service.characteristics:
+                    index.setdefault(
+                        (accessory.instance_id, characteristic.instance_id),
+                        characteristic,
+                    )
+        return index
+
+    @cached_property
+    def _characteristics_by_iid(self) -> dict[int, Pdu09Characteristic]:
+        index = {}
+        for (_, iid), characteristic in self._characteristics_by_aid_iid.items():
+            index.setdefault(iid, characteristic)
+        return index
+
+    def find_characteristic_by_aid_iid(self, aid, iid):
+        return self._characteristics_by_aid_iid.get((aid, iid))
 
     # return first matching iid
     def find_characteristic_by_iid(self, iid):
-        for accessory in self.accessories:
-            characteristic = accessory.find_characteristic_by_iid(iid)
-            if characteristic:
-                return characteristic
-        return None
+        return self._characteristics_by_iid.get(iid)
 
     def to_dict(self):
         return [accessory.to_dict() for accessory in self.accessories]
@@ -13,22 +13,32 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+from __future__ import annotations
 
 import asyncio
+from collections import deque
+import ipaddress
+from itertools import zip_longest
 import logging
-from typing import TYPE_CHECKING
+import socket
+import struct
+import time
+from typing import TYPE_CHECKING, Callable
 
-from aiohomekit.crypto.chacha20poly1305 import (
-    ChaCha20Poly1305Decryptor,
-    ChaCha20Poly1305Encryptor,
-)
+from chacha20poly1305_reuseable import ChaCha20Poly1305Reusable
+from cryptography.exceptions import InvalidTag
+
+from aiohomekit.controller.ip.reconnect import ReconnectScheduler, reconnect_interval
+from aiohomekit.deadline import check_deadline, remaining, wait_future
 from aiohomekit.exceptions import (
     AccessoryDisconnectedError,
     AccessoryNotFoundError,
     AuthenticationError,
     ConnectionError,
+    DeadlineExceededError,
     HomeKitException,
     HttpErrorResponse,
+    ProtocolError,
     TimeoutError,
 )
 import aiohomekit.hkjson as hkjson
@@ -43,13 +53,196 @@ logger = logging.getLogger(__name__)
 if TYPE_CHECKING:
     from aiohomekit.controller.ip.controller import IpController
 
+# Have the kernel notice a silently dropped accessory after ~25s
+# (10s idle + 3 probes 5s apart) instead of waiting for a request to time out
+TCP_KEEPALIVE_IDLE = 10
+TCP_KEEPALIVE_INTERVAL = 5
+TCP_KEEPALIVE_COUNT = 3
+
+# How long a heartbeat request can take before the session is considered dead
+HEARTBEAT_TIMEOUT = 5
+
+# How long to wait for the response to a request before dropping the connection
+RESPONSE_TIMEOUT = 30
+
+# How long a connection attempt can take
+CONNECT_TIMEOUT = 10
+
+# How long to give a connection attempt before also trying the next address
+HAPPY_EYEBALLS_DELAY = 0.25
+
+
+def _address_family(host: str) -> int:
+    """The address family of an IP address, or AF_UNSPEC for a hostname."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return socket.AF_UNSPEC
+    return socket.AF_INET6 if address.version == 6 else socket.AF_INET
+
+
+def _order_addresses(addresses: list[str], preferred_family: int) -> list[str]:
+    """
+    Order addresses for connection racing.
+
+    Address families take turns (RFC 8305), starting with `preferred_family`
+    and otherwise keeping the order the addresses were advertised in.
+    """
+    by_family: dict[int, list[str]] = {}
+    for address in dict.fromkeys(addresses):
+        by_family.setdefault(_address_family(address), []).append(address)
+
+    families = sorted(by_family, key=lambda family: family != preferred_family)
+    return [
+        address
+        for turn in zip_longest(*(by_family[family] for family in families))
+        for address in turn
+        if address is not None
+    ]
+
+
+async def _connect_socket(host: str, port: int) -> socket.socket:
+    """Open a non-blocking TCP socket to host:port."""
+    loop = asyncio.get_running_loop()
+    family, type_, proto, _, sockaddr = (
+        await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    )[0]
+
+    sock = socket.socket(family, type_, proto)
+    try:
+        sock.setblocking(False)
+        await loop.sock_connect(sock, sockaddr)
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+async def _race_sockets(hosts: list[str], port: int) -> tuple[str, socket.socket]:
+    """
+    Connect to whichever of `hosts` answers first.
+
+    A new attempt is started every HAPPY_EYEBALLS_DELAY seconds, or as soon as
+    the latest one fails, until one succeeds. The other attempts are then
+    abandoned.
+
+    :raises OSError: if every attempt failed
+    """
+    attempts: dict[asyncio.Future, str] = {}
+    pending = list(hosts)
+    error: OSError | None = None
+
+    try:
+        while pending or attempts:
+            if pending:
+                host = pending.pop(0)
+                attempts[asyncio.ensure_future(_connect_socket(host, port))] = host
+
+            done, _ = await asyncio.wait(
+                attempts,
+                timeout=HAPPY_EYEBALLS_DELAY if pending else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            for attempt in done:
+                host = attempts.pop(attempt)
+                try:
+                    return host, attempt.result()
+                except OSError as exc:
+                    logger.debug("Connecting to %s:%s failed: %s", host, port, exc)
+                    error = exc
+    finally:
+        for attempt in attempts:
+            if not attempt.cancel() and not attempt.exception():
+                # Lost the race by finishing at the same time as the winner
+                attempt.result().close()
+
+    raise error or OSError("No addresses to connect to")
+
+
+class _ConcurrencyLimit:
+    """
+    Like a semaphore, but the limit can be changed while it is held.
+
+    Requests that are already running keep counting against a lowered limit, so
+    no new request starts until enough of them have finished.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    async def acquire(self) -> None:
+        # Waiting for a free slot counts against the caller's deadline too
+        check_deadline()
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await wait_future(future)
+        except (asyncio.CancelledError, DeadlineExceededError):
+            if future.done() and not future.cancelled() and not future.exception():
+                # We were given a slot just as we were cancelled, pass it on
+                self.release()
+            elif future in self._waiters:
+                self._waiters.remove(future)
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = limit
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.active < self.limit:
+            future = self._waiters.popleft()
+            # Skip requests that were cancelled but haven't woken up yet
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+
+def _configure_socket(transport: asyncio.Transport) -> None:
+    """Turn on TCP keepalive and disable Nagle's algorithm where supported."""
+    sock = transport.get_extra_info("socket")
+    if sock is None:
+        return
+
+    try:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+
+        # Linux
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, TCP_KEEPALIVE_IDLE)
+        # macOS
+        elif hasattr(socket, "TCP_KEEPALIVE"):
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, TCP_KEEPALIVE_IDLE
+            )
+        if hasattr(socket, "TCP_KEEPINTVL"):
+            sock.setsockopt(
+                socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, TCP_KEEPALIVE_INTERVAL
+            )
+        if hasattr(socket, "TCP_KEEPCNT"):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, TCP_KEEPALIVE_COUNT)
+    except OSError as exc:
+        logger.debug("Unable to set socket options: %s", exc)
+
 
 class InsecureHomeKitProtocol(asyncio.Protocol):
     def __init__(self, connection):
         self.connection = connection
         self.host = ":".join((connection.host, str(connection.port)))
         self.result_cbs = []
-        self.current_response = HttpResponse()
+        self._body_consumers: dict[asyncio.Future, Callable[[bytes], None]] = {}
+        self.current_response = HttpResponse(self._response_headers_received)
 
     def connection_made(self, transport):
         super().connection_made(transport)
@@ -58,7 +251,15 @@ class InsecureHomeKitProtocol(asyncio.Protocol):
     def connection_lost(self, exception):
         self.connection._connection_lost(exception)
 
-    async def send_bytes(self, payload):
+    async def send_bytes(
+        self, payload, body_consumer: Callable[[bytes], None] | None = None
+    ):
+        """
+        Send a request and wait for its response.
+
+        :param body_consumer: if given, the body of the response is passed to it
+            piece by piece as it is received instead of being kept in the response
+        """
         if self.transport.is_closing():
             # FIXME: It would be nice to try and wait for the reconnect in future.
             # In that case we need to make sure we do it at a layer above send_bytes otherwise
@@ -68,22 +269,61 @@ class InsecureHomeKitProtocol(asyncio.Protocol):
             # queued writes can happy.
             raise AccessoryDisconnectedError("Transport is closed")
 
-        self.transport.write(payload)
+        # Nothing (including the encryption counters) may change if the deadline
+        # has already passed
+        timeout = remaining(RESPONSE_TIMEOUT)
+        self.transport.write(self._encode_payload(payload))
 
         # We return a future so that our caller can block on a reply
         # We can send many requests and dispatch the results in order
         # Should mean we don't need locking around request/reply cycles
-        result = asyncio.Future()
+        loop = asyncio.get_running_loop()
+        result = loop.create_future()
         self.result_cbs.append(result)
+        if body_consumer:
+            self._body_consumers[result] = body_consumer
 
+        # A plain timer fails the future directly, which is a lot cheaper than
+        # the extra task and cancellation that wait_for costs on every request.
+        timer = loop.call_later(
+            timeout, self._response_timed_out, result, timeout < RESPONSE_TIMEOUT
+        )
         try:
-            return await asyncio.wait_for(result, 30)
-        except asyncio.TimeoutError:
-            self.transport.write_eof()
-            self.transport.close()
-            raise AccessoryDisconnectedError("Timeout while waiting for response")
+            return await result
+        finally:
+            timer.cancel()
+            self._body_consumers.pop(result, None)
+
+    def _encode_payload(self, payload):
+        return payload
+
+    def _response_headers_received(self, response: HttpResponse) -> None:
+        if response.get_http_name().lower() != "http" or not self.result_cbs:
+            return
+        if body_consumer := self._body_consumers.get(self.result_cbs[0]):
+            response.set_body_consumer(body_consumer)
+
+    def _response_timed_out(
+        self, result: asyncio.Future, deadline_exceeded: bool
+    ) -> None:
+        if result.done():
+            return
+
+        if deadline_exceeded:
+            # The caller ran out of time but the connection is left alone; the
+            # late response will be matched to this future and dropped.
+            result.set_exception(DeadlineExceededError("Deadline exceeded"))
+            return
+
+        result.set_exception(
+            AccessoryDisconnectedError("Timeout while waiting for response")
+        )
+        self.transport.write_eof()
+        self.transport.close()
 
     def data_received(self, data):
+        self.connection._last_activity = time.monotonic()
+
         while data:
             data = self.current_response.parse(data)
 
@@ -98,7 +338,7 @@ class InsecureHomeKitProtocol(asyncio.Protocol):
                 else:
                     raise RuntimeError("Unknown http type")
 
-                self.current_response = HttpResponse()
+                self.current_response = HttpResponse(self._response_headers_received)
 
     def eof_received(self):
         self.close()
@@ -109,7 +349,8 @@ class InsecureHomeKitProtocol(asyncio.Protocol):
         # fire, so set them to an error state.
         while self.result_cbs:
             result = self.result_cbs.pop(0)
-            result.set_exception(AccessoryDisconnectedError("Connection closed"))
+            if not result.done():
+                result.set_exception(AccessoryDisconnectedError("Connection closed"))
 
 
 class SecureHomeKitProtocol(InsecureHomeKitProtocol):
@@ -124,30 +365,44 @@ class SecureHomeKitProtocol(InsecureHomeKitProtocol):
         self.a2c_key = a2c_key
         self.c2a_key = c2a_key
 
-        self.encryptor = ChaCha20Poly1305Encryptor(self.c2a_key)
-        self.decryptor = ChaCha20Poly1305Decryptor(self.a2c_key)
-
-    async def send_bytes(self, payload):
-        buffer = b""
-
-        while len(payload) > 0:
-            current = payload[:1024]
-            payload = payload[1024:]
-
-            len_bytes = len(current).to_bytes(2, byteorder="little")
-            cnt_bytes = self.c2a_counter.to_bytes(8, byteorder="little")
-            self.c2a_counter += 1
+        # The 96-bit nonces are 4 zero bytes followed by the 64-bit little endian
+        # message counter, so the buffers are reused and only the counter updated.
+        self._c2a_cipher = ChaCha20Poly1305Reusable(self.c2a_key)
+        self._c2a_nonce = bytearray(12)
+        self._a2c_cipher = ChaCha20Poly1305Reusable(self.a2c_key)
+        self._a2c_nonce = bytearray(12)
 
-            data = self.encryptor.encrypt(
-                len_bytes,
-                cnt_bytes,
-                bytes([0, 0, 0, 0]),
-                current,
-            )
+    def _encode_payload(self, payload):
+        """
+        Encrypt payload into 1024 byte frames to be sent in one write.
 
-            buffer += len_bytes + data
+        The output buffer is sized up front and each frame is encrypted from a
+        view of the payload, so large bodies don't pay for repeated slicing and
+        concatenation.
+        """
+        payload_length = len(payload)
+        frame_count = -(-payload_length // 1024)
+        buffer = bytearray(payload_length + frame_count * 18)
+        nonce = self._c2a_nonce
+
+        with memoryview(payload) as view:
+            offset = 0
+            for start in range(0, payload_length, 1024):
+                frame_length = min(1024, payload_length - start)
+                len_bytes = frame_length.to_bytes(2, "little")
+                struct.pack_into("<Q", nonce, 4, self.c2a_counter)
+                self.c2a_counter += 1
+
+                buffer[offset : offset + 2] = len_bytes
+                offset += 2
+                buffer[offset : offset + frame_length + 16] = self._c2a_cipher.encrypt(
+                    nonce,
+                    bytes(view[start : start + frame_length]),
+                    len_bytes,
+                )
+                offset += frame_length + 16
 
-        return await super().send_bytes(buffer)
+        return buffer
 
     def data_received(self, data):
         """
@@ -158,52 +413,74 @@ class SecureHomeKitProtocol(InsecureHomeKitProtocol):
 
         The blocks are expected to be in order - there is no protocol level support for
         interleaving of HTTP messages.
+
+        The buffer is walked with a read offset and only compacted once per call, and
+        all the blocks that were decrypted are handed to the HTTP layer in one go.
         """
+        if self._incoming_buffer:
+            self._incoming_buffer += data
+            buffer = self._incoming_buffer
+        else:
+            buffer = data
 
-        self._incoming_buffer += data
+        buffer_length = len(buffer)
+        offset = 0
+        decrypted = []
+        failed = False
+        nonce = self._a2c_nonce
 
-        while len(self._incoming_buffer) >= 2:
-            block_length_bytes = self._incoming_buffer[:2]
-            block_length = int.from_bytes(block_length_bytes, "little")
-            exp_length = block_length + 18
+        with memoryview(buffer) as view:
+            while buffer_length - offset >= 2:
+                block_length = view[offset] | (view[offset + 1] << 8)
+                block_end = offset + 2 + block_length + 16
 
-            if len(self._incoming_buffer) < exp_length:
-                # Not enough data yet
-                return
+                if buffer_length < block_end:
+                    # Not enough data yet
+                    break
 
-            # Drop the length from the top of the buffer as we have already parsed it
-            del self._incoming_buffer[:2]
+                struct.pack_into("<Q", nonce, 4, self.a2c_counter)
 
-            block = self._incoming_buffer[:block_length]
-            del self._incoming_buffer[:block_length]
-            tag = self._incoming_buffer[:16]
-            del self._incoming_buffer[:16]
+                try:
+                    decrypted.append(
+                        self._a2c_cipher.decrypt(
+                            nonce,
+                            bytes(view[offset + 2 : block_end]),
+                            bytes(view[offset : offset + 2]),
+                        )
+                    )
+                except InvalidTag:
+                    failed = True
+                    break
 
-            decrypted = self.decryptor.decrypt(
-                block_length_bytes,
-                self.a2c_counter.to_bytes(8, byteorder="little"),
-                bytes([0, 0, 0, 0]),
-                block + tag,
-            )
+                self.a2c_counter += 1
+                offset = block_end
 
-            if decrypted is False:
-                # FIXME: Does raising here drop the connection or do we call close on transport ourselves
-                raise RuntimeError("Could not decrypt block")
+        if buffer is self._incoming_buffer:
+            del buffer[:offset]
+        else:
+            self._incoming_buffer = bytearray(buffer[offset:])
 
-            self.a2c_counter += 1
+        if decrypted:
+            super().data_received(b"".join(decrypted))
 
-            super().data_received(decrypted)
+        if failed:
+            # FIXME: Does raising here drop the connection or do we call close on transport ourselves
+            raise RuntimeError("Could not decrypt block")
 
 
 class HomeKitConnection:
-    def __init__(self, owner, host, port, concurrency_limit=1):
+    def __init__(self, owner, host, port, concurrency_limit=1, addresses=None):
         self.owner = owner
         self.host = host
         self.port = port
 
+        # Every address the accessory advertises, which are raced when connecting
+        self.addresses: list[str] = addresses or [host]
+        # The address family of the last address that could be connected to
+        self._preferred_family = socket.AF_UNSPEC
+
         self.closing = False
         self.closed = False
-        self._retry_interval = 0.5
 
         self.transport = None
         self.protocol = None
@@ -214,13 +491,108 @@ class HomeKitConnection:
 
         self._connect_lock = asyncio.Lock()
 
-        self._concurrency_limit = asyncio.Semaphore(concurrency_limit)
+        self._concurrency_limit = _ConcurrencyLimit(concurrency_limit)
+        self._in_flight = 0
         self._reconnect_wait_task = None
 
+        # An optional request that is made when the session has been idle for
+        # heartbeat_interval seconds, see set_heartbeat
+        self.heartbeat_interval: float | None = None
+        self.heartbeat_timeout: float = HEARTBEAT_TIMEOUT
+        self.heartbeat_target: str | None = None
+        self._heartbeat_task: asyncio.Task | None = None
+        self._last_activity = 0.0
+
     @property
     def is_connected(self):
         return self.transport and self.protocol and not self.closed
 
+    @property
+    def reconnect_scheduler(self) -> ReconnectScheduler | None:
+        """The scheduler that limits concurrent reconnects, if any."""
+        return None
+
+    @property
+    def concurrency_limit(self) -> int:
+        """The number of requests that can be in flight at once."""
+        return self._concurrency_limit.limit
+
+    def set_concurrency_limit(self, limit: int) -> None:
+        """
+        Set how many requests can be pipelined on the connection at once.
+
+        Responses are matched to requests in the order they were sent, so this
+        only works with accessories that process requests strictly in order. If a
+        pipelined request fails the connection falls back to one request at a time.
+
+        Requests that are already in flight count towards the new limit.
+        """
+        if limit < 1:
+            raise ValueError("Concurrency limit must be at least 1")
+        self._concurrency_limit.set_limit(limit)
+
+    def set_heartbeat(self, interval: float | None, target: str | None = None) -> None:
+        """
+        Check the session is still alive when it has been idle for `interval` seconds.
+
+        The check is a GET of `target` (which should be cheap, like a single
+        characteristic) that has to complete within heartbeat_timeout seconds. If it
+        doesn't the session is closed and a reconnect is started. Pass an interval of
+        None to turn the heartbeat off.
+        """
+        self.heartbeat_interval = interval
+        if target:
+            self.heartbeat_target = target
+
+        self._stop_heartbeat()
+        if self.is_connected:
+            self._start_heartbeat()
+
+    def _start_heartbeat(self) -> None:
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            return
+        if not self.heartbeat_interval:
+            return
+        if not self.heartbeat_target:
+            return
+        self._heartbeat_task = async_create_task(self._heartbeat())
+
+    def _stop_heartbeat(self) -> None:
+        if self._heartbeat_task:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+
+    async def _heartbeat(self) -> None:
+        while self.is_connected and self.heartbeat_interval:
+            idle = time.monotonic() - self._last_activity
+            if idle < self.heartbeat_interval:
+                await asyncio.sleep(self.heartbeat_interval - idle)
+                continue
+
+            try:
+                await asyncio.wait_for(
+                    self.get(self.heartbeat_target), self.heartbeat_timeout
+                )
+            except (AccessoryDisconnectedError, asyncio.TimeoutError) as exc:
+                logger.debug(
+                    "%s: Heartbeat failed, closing session: %s", self.host, exc
+                )
+            except Exception:
+                # Without a heartbeat a dead session would go unnoticed, so start
+                # over with a fresh one
+                logger.exception(
+                    "%s: Unexpected error during heartbeat, closing session",
+                    self.host,
+                )
+            else:
+                continue
+
+            self._heartbeat_task = None
+            if self.transport:
+                # This will start a reconnect via _connection_lost
+                self.transport.close()
+            return
+
     def _start_connector(self):
         """
         Start a reconnect background task.
@@ -241,6 +613,11 @@ class HomeKitConnection:
         self._connector = async_create_task(self._reconnect())
         self._connector.add_done_callback(done_callback)
 
+    @property
+    def is_reconnecting(self) -> bool:
+        """Whether a reconnect is in progress."""
+        return self._connector is not None
+
     async def reconnect_soon(self) -> None:
         """Reconnect to the device if disconnected.
 
@@ -248,7 +625,12 @@ class HomeKitConnection:
         and the reconnect proceeds.
 
         If a reconnect is not a progress, the connect loop is started.
+
+        As the device was just seen, it goes to the front of the reconnect queue.
         """
+        if scheduler := self.reconnect_scheduler:
+            scheduler.prioritize(self)
+
         if self._reconnect_wait_task:
             # If a reconnect wait is running, cancel it so the reconnect
             # tries right away
@@ -398,7 +780,9 @@ class HomeKitConnection:
         body = TLV.decode_bytes(response.body, expected=expected)
         return body
 
-    async def request(self, method, target, headers=None, body=None):
+    async def request(
+        self, method, target, headers=None, body=None, body_consumer=None
+    ):
         """
         Sends a HTTP request to the current transport and returns an awaitable
         that can be used to wait for the response.
@@ -409,6 +793,8 @@ class HomeKitConnection:
         :param target: A URI to call the method on
         :param headers: a list of (header, value) tuples (optional)
         :param body: The body of the request (optional)
+        :param body_consumer: Receives the body of the response as it arrives
+            instead of it being kept in the response (optional)
         """
         if not self.protocol:
             raise AccessoryDisconnectedError(
@@ -442,11 +828,31 @@ class HomeKitConnection:
         # https://github.com/jlusiardi/homekit_python/issues/12
         # https://github.com/jlusiardi/homekit_python/issues/16
 
-        async with self._concurrency_limit:
+        await self._concurrency_limit.acquire()
+        try:
             if not self.protocol:
                 raise AccessoryDisconnectedError("Tried to send while not connected")
             logger.debug("%s: raw request: %r", self.host, request_bytes)
-            resp = await self.protocol.send_bytes(request_bytes)
+
+            pipelined = self._in_flight > 0
+            self._in_flight += 1
+            try:
+                resp = await self.protocol.send_bytes(request_bytes, body_consumer)
+            except DeadlineExceededError:
+                # The caller ran out of time, which says nothing about pipelining
+                raise
+            except AccessoryDisconnectedError:
+                if pipelined and self.concurrency_limit > 1:
+                    logger.warning(
+                        "%s: Pipelined request failed, only sending one request at a time",
+                        self.host,
+                    )
+                    self.set_concurrency_limit(1)
+                raise
+            finally:
+                self._in_flight -= 1
+        finally:
+            self._concurrency_limit.release()
 
         if resp.code >= 400 and resp.code <= 499:
             logger.debug(f"Got HTTP error {resp.code} for {method} against {target}")
@@ -465,6 +871,7 @@ class HomeKitConnection:
         """
         self.closing = True
 
+        self._stop_heartbeat()
         await self._stop_connector()
 
         if self.transport:
@@ -480,6 +887,8 @@ class HomeKitConnection:
         """
         logger.debug("Connection %r lost.", self)
 
+        self._stop_heartbeat()
+
         if not self.closing:
             self._start_connector()
 
@@ -493,14 +902,15 @@ class HomeKitConnection:
         """_connect_once must only ever be called from _reconnect to ensure its done with a lock."""
         loop = asyncio.get_event_loop()
 
-        logger.debug("Attempting connection to %s:%s", self.host, self.port)
+        hosts = _order_addresses([self.host, *self.addresses], self._preferred_family)
+        logger.debug("Attempting connection to %s port %s", hosts, self.port)
 
         try:
-            self.transport, self.protocol = await asyncio.wait_for(
-                loop.create_connection(
-                    lambda: InsecureHomeKitProtocol(self), self.host, self.port
-                ),
-                timeout=10,
+            host, sock = await asyncio.wait_for(
+                _race_sockets(hosts, self.port), timeout=CONNECT_TIMEOUT
+            )
+            self.transport, self.protocol = await loop.create_connection(
+                lambda: InsecureHomeKitProtocol(self), sock=sock
             )
 
         except asyncio.TimeoutError:
@@ -509,6 +919,14 @@ class HomeKitConnection:
         except OSError as e:
             raise ConnectionError(str(e))
 
+        if host != self.host:
+            logger.debug("Connected to %s instead of %s", host, self.host)
+            self.host = host
+        self._preferred_family = sock.family
+
+        _configure_socket(self.transport)
+        self._last_activity = time.monotonic()
+
         if self.owner:
             await self.owner.connection_made(False)
 
@@ -525,12 +943,18 @@ class HomeKitConnection:
             # Reconnect already in progress.
             return
         async with self._connect_lock:
-            interval = 0.5
+            attempt = 0
+            scheduler = self.reconnect_scheduler
 
             logger.debug("Starting reconnect loop to %s:%s", self.host, self.port)
             while not self.closing:
+                attempt += 1
+                interval = reconnect_interval(attempt)
                 try:
-                    return await self._connect_once()
+                    if not scheduler:
+                        return await self._connect_once()
+                    async with scheduler.slot(self):
+                        return await self._connect_once()
 
                 except AuthenticationError:
                     # Authentication errors should bubble up because auto-reconnect is unlikely to help
@@ -550,7 +974,6 @@ class HomeKitConnection:
                         "Unexpected error whilst trying to connect to accessory. Will retry."
                     )
 
-                interval = min(60, 1.5 * interval)
                 self._reconnect_wait_task = asyncio.ensure_future(
                     asyncio.sleep(interval)
                 )
@@ -584,18 +1007,31 @@ class HomeKitConnection:
 
 
 class SecureHomeKitConnection(HomeKitConnection):
-    def __init__(self, owner, pairing_data):
+    def __init__(self, owner, pairing_data, concurrency_limit=1):
         super().__init__(
             owner,
             pairing_data["AccessoryIP"],
             pairing_data["AccessoryPort"],
+            concurrency_limit=concurrency_limit,
         )
         self.pairing_data = pairing_data
 
+        # Used for session resume
+        self._session_id: bytes | None = None
+        self._derive: Callable[[bytes, bytes], bytes] | None = None
+
     @property
     def is_connected(self):
         return super().is_connected and self.is_secure
 
+    @property
+    def reconnect_scheduler(self) -> ReconnectScheduler | None:
+        if not self.owner:
+            return None
+        # Pairings created by a bare Controller (rather than an IpController)
+        # reconnect without a shared scheduler
+        return getattr(self.owner.controller, "reconnect_scheduler", None)
+
     async def _connect_once(self):
         """_connect_once must only ever be called from _reconnect to ensure its done with a lock."""
         self.is_secure = False
@@ -606,13 +1042,14 @@ class SecureHomeKitConnection(HomeKitConnection):
                 discovery = await controller.async_find(
                     self.pairing_data["AccessoryPairingID"]
                 )
-                if self.host != discovery.description.address:
+                if self.host not in discovery.description.addresses:
                     logger.debug(
                         "Host changed from %s to %s",
                         self.host,
                         discovery.description.address,
                     )
                     self.host = discovery.description.address
+                self.addresses = discovery.description.addresses
 
                 if self.port != discovery.description.port:
                     logger.debug(
@@ -626,23 +1063,29 @@ class SecureHomeKitConnection(HomeKitConnection):
 
         await super()._connect_once()
 
-        state_machine = get_session_keys(self.pairing_data)
+        # Resume material can only be used once, if resuming fails in any way the
+        # next attempt will do a full pair verify.
+        session_id, derive = self._session_id, self._derive
+        self._session_id = self._derive = None
 
-        request, expected = state_machine.send(None)
-        while True:
-            try:
-                response = await self.post_tlv(
-                    "/pair-verify",
-                    body=request,
-                    expected=expected,
-                )
-                request, expected = state_machine.send(response)
-            except StopIteration as result:
-                # If the state machine raises a StopIteration then we have session keys
-                _, derive = result.value
-                c2a_key = derive(b"Control-Salt", b"Control-Write-Encryption-Key")
-                a2c_key = derive(b"Control-Salt", b"Control-Read-Encryption-Key")
-                break
+        try:
+            session_id, derive = await self._pair_verify(session_id, derive)
+        except ProtocolError as exc:
+            if not session_id:
+                raise
+            if self.transport.is_closing():
+                raise AccessoryDisconnectedError(
+                    "Connection closed after failed session resume"
+                ) from exc
+            logger.debug(
+                "%s: Session resume failed, doing a full pair verify: %s",
+                self.host,
+                exc,
+            )
+            session_id, derive = await self._pair_verify()
+
+        c2a_key = derive(b"Control-Salt", b"Control-Write-Encryption-Key")
+        a2c_key = derive(b"Control-Salt", b"Control-Read-Encryption-Key")
 
         # Secure session has been negotiated - switch protocol so all future messages are encrypted
         self.protocol = SecureHomeKitProtocol(
@@ -657,5 +1100,38 @@ class SecureHomeKitConnection(HomeKitConnection):
 
         logger.debug("Secure connection to %s:%s established", self.host, self.port)
 
+        # Keep what we need to resume this session when we next reconnect
+        self._session_id = session_id
+        self._derive = derive
+
         if self.owner:
             await self.owner.connection_made(True)
+
+        self._start_heartbeat()
+
+    async def _pair_verify(
+        self,
+        session_id: bytes | None = None,
+        derive: Callable[[bytes, bytes], bytes] | None = None,
+    ) -> tuple[bytes, Callable[[bytes, bytes], bytes]]:
+        """
+        Run pair verify on the current connection.
+
+        If `session_id` and `derive` from an earlier session are passed the
+        accessory is asked to resume it, which skips the expensive key exchange.
+        Accessories that can't resume answer with a full pair verify instead.
+        """
+        state_machine = get_session_keys(self.pairing_data, session_id, derive)
+
+        request, expected = state_machine.send(None)
+        while True:
+            try:
+                response = await self.post_tlv(
+                    "/pair-verify",
+                    body=request,
+                    expected=expected,
+                )
+                request, expected = state_machine.send(response)
+            except StopIteration as result:
+                # If the state machine raises a StopIteration then we have session keys
+                return result.value
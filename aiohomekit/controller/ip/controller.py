@@ -2,8 +2,12 @@ from __future__ import annotations
 
 from typing import Any
 
+from zeroconf.asyncio import AsyncZeroconf
+
+from aiohomekit.characteristic_cache import CharacteristicCacheType
 from aiohomekit.controller.ip.discovery import IpDiscovery
 from aiohomekit.controller.ip.pairing import IpPairing
+from aiohomekit.controller.ip.reconnect import ReconnectScheduler
 from aiohomekit.zeroconf import HAP_TYPE_TCP, ZeroconfController
 
 
@@ -13,6 +17,16 @@ class IpController(ZeroconfController):
     discoveries: dict[str, IpDiscovery]
     pairings: dict[str, IpPairing]
 
+    def __init__(
+        self,
+        char_cache: CharacteristicCacheType,
+        zeroconf_instance: AsyncZeroconf,
+    ):
+        super().__init__(char_cache, zeroconf_instance)
+        # Shared by all pairings so they don't all pair-verify at once after
+        # a network outage or a restart
+        self.reconnect_scheduler = ReconnectScheduler()
+
     def _make_discovery(self, discovery) -> IpDiscovery:
         return IpDiscovery(self, discovery)
 
@@ -36,7 +36,12 @@ class IpDiscovery(ZeroconfDiscovery):
     def __init__(self, controller, description: HomeKitService):
         super().__init__(description)
         self.controller = controller
-        self.connection = HomeKitConnection(None, description.address, description.port)
+        self.connection = HomeKitConnection(
+            None,
+            description.address,
+            description.port,
+            addresses=description.addresses,
+        )
 
     def __repr__(self):
         return f"IPDiscovery(host={self.description.address}, port={self.description.port})"
@@ -14,7 +14,10 @@
 # limitations under the License.
 #
 
+from __future__ import annotations
+
 import asyncio
+from collections.abc import Container, Iterable
 from datetime import timedelta
 from itertools import groupby
 import logging
@@ -25,10 +28,14 @@ from aiohomekit.controller.abstract import (
     AbstractController,
     AbstractPairing,
     AbstractPairingData,
+    CoalescedCall,
+    coalesce_writes,
 )
+from aiohomekit.deadline import wait_for, with_deadline
 from aiohomekit.exceptions import (
     AccessoryDisconnectedError,
     AuthenticationError,
+    DeadlineExceededError,
     HttpErrorResponse,
     HttpException,
     InvalidError,
@@ -39,10 +46,13 @@ import aiohomekit.hkjson as hkjson
 from aiohomekit.http import HttpContentTypes
 from aiohomekit.model import Accessories, AccessoriesState, Transport
 from aiohomekit.model.characteristics import CharacteristicsTypes
+from aiohomekit.model.stream import AccessoriesStreamParser
 from aiohomekit.protocol import error_handler
 from aiohomekit.protocol.statuscodes import to_status_code
 from aiohomekit.protocol.tlv import TLV
+from aiohomekit.utils import async_create_task
 from aiohomekit.uuid import normalize_uuid
+from aiohomekit.zeroconf import HomeKitService
 
 from .connection import SecureHomeKitConnection
 
@@ -73,20 +83,40 @@ class IpPairing(AbstractPairing):
     """
 
     def __init__(
-        self, controller: AbstractController, pairing_data: AbstractPairingData
+        self,
+        controller: AbstractController,
+        pairing_data: AbstractPairingData,
+        concurrency_limit: int = 1,
     ) -> None:
         """
         Initialize a Pairing by using the data either loaded from file or obtained after calling
         Controller.perform_pairing().
 
         :param pairing_data:
+        :param concurrency_limit: how many requests can be pipelined on the secure session
         """
         super().__init__(controller)
         self.id = pairing_data["AccessoryPairingID"]
         self.pairing_data = pairing_data
-        self.connection = SecureHomeKitConnection(self, self.pairing_data)
+        self.connection = SecureHomeKitConnection(
+            self, self.pairing_data, concurrency_limit=concurrency_limit
+        )
         self.supports_subscribe = True
 
+        # Reads from callers in the same event loop tick are merged into one request
+        self.read_coalesce_window = 0.0
+        self._pending_read: CoalescedCall[
+            set[tuple[int, int]], dict[tuple[int, int], dict[str, Any]]
+        ] = CoalescedCall(set)
+
+        self._batched_subscriptions: bool | None = None
+
+        # Characteristics with a working event subscription on the current session
+        self._live_subscriptions: set[tuple[int, int]] = set()
+        # The state number (s#) the accessory advertised when we last caught up
+        self._polled_state_num: int | None = None
+        self._state_poll_task: asyncio.Task | None = None
+
     @property
     def is_connected(self) -> bool:
         return self.connection.is_connected
@@ -106,6 +136,123 @@ class IpPairing(AbstractPairing):
         """Returns how often the device should be polled."""
         return timedelta(minutes=1)
 
+    def _async_description_update(self, description: HomeKitService | None) -> None:
+        """Update the description of the accessory as zeroconf sees it change."""
+        old = self.description
+        super()._async_description_update(description)
+        if not description:
+            return
+
+        config_changed = (
+            self.accessories
+            and self.connection.is_connected
+            and description.config_num != self.config_num
+        )
+        if config_changed:
+            logger.debug(
+                "%s: Config number has changed from %s to %s",
+                self.connection.host,
+                self.config_num,
+                description.config_num,
+            )
+            self.notify_config_changed(description.config_num)
+
+        if self.connection.is_reconnecting and (
+            not old
+            or old.address != description.address
+            or old.port != description.port
+        ):
+            # The accessory has (re)appeared or moved, don't wait for the backoff
+            async_create_task(self.connection.reconnect_soon())
+
+        if self._polled_state_num is None:
+            self._polled_state_num = description.state_num
+        elif (
+            # A config change refreshes everything anyway
+            not config_changed
+            and self.connection.is_connected
+            and self.subscriptions
+            and description.state_num != self._polled_state_num
+            and not self._state_poll_task
+        ):
+            # The number will eventually roll over so any change means
+            # something happened that we may not have been sent an event for
+            logger.debug(
+                "%s: State number changed to %s; Triggering catch-up poll",
+                self.connection.host,
+                description.state_num,
+            )
+            self._state_poll_task = async_create_task(
+                self._async_process_state_changed(description.state_num)
+            )
+
+    async def _async_process_state_changed(self, state_num: int) -> None:
+        """Poll the subscribed characteristics after the s# changed."""
+        try:
+            results = await self.get_characteristics(list(self.subscriptions))
+        except AccessoryDisconnectedError as exc:
+            logger.debug(
+                "%s: Failed to poll after state change: %s", self.connection.host, exc
+            )
+            return
+        finally:
+            self._state_poll_task = None
+
+        self._polled_state_num = state_num
+        self._callback_listeners(results)
+
+    def should_poll(self, characteristics: Iterable[tuple[int, int]]) -> bool:
+        """
+        Whether a scheduled poll of `characteristics` could find anything new.
+
+        A poll is not needed while the session is up, every characteristic has a
+        working event subscription and the accessory hasn't advertised a new
+        state number (s#) since we last caught up, as any change would have
+        been sent as an event or triggered a catch-up poll.
+        """
+        state_num = self.description.state_num if self.description else None
+        return not (
+            self.connection.is_connected
+            and state_num is not None
+            and state_num == self._polled_state_num
+            and self._live_subscriptions.issuperset(characteristics)
+        )
+
+    def set_concurrency_limit(self, limit: int) -> None:
+        """
+        Allow up to limit requests to be in flight on the secure session at once.
+
+        This is off (1) by default as not all accessories cope with pipelined
+        requests. If the accessory drops a pipelined request the connection falls
+        back to 1 by itself.
+        """
+        self.connection.set_concurrency_limit(limit)
+
+    def set_heartbeat_interval(self, interval: float | None) -> None:
+        """
+        Check the session is alive by reading a characteristic when it's been idle.
+
+        If the accessory doesn't answer within a few seconds the session is closed
+        and a reconnect is started, so a dropped accessory is noticed quickly. The
+        accessory's name characteristic is read, so this only starts once the
+        accessories are known. Pass None to turn it off (the default).
+        """
+        self.connection.set_heartbeat(interval, self._heartbeat_target())
+
+    def _heartbeat_target(self) -> str | None:
+        if not self.accessories:
+            return None
+        accessory = self.accessories[0]
+        info = accessory.accessory_information
+        if not info or not info.has(CharacteristicsTypes.NAME):
+            return None
+        name = info[CharacteristicsTypes.NAME]
+        return f"/characteristics?id={accessory.aid}.{name.iid}"
+
+    def _update_heartbeat(self) -> None:
+        if self.connection.heartbeat_interval and not self.connection.heartbeat_target:
+            self.set_heartbeat_interval(self.connection.heartbeat_interval)
+
     def event_received(self, event):
         self._callback_listeners(format_characteristic_list(event))
 
@@ -120,6 +267,14 @@ class IpPairing(AbstractPairing):
         if not secure:
             return
 
+        self._update_heartbeat()
+
+        # Subscriptions don't carry over to a new session, and listeners poll
+        # on the empty event below to catch up on anything missed meanwhile
+        self._live_subscriptions = set()
+        if self.description:
+            self._polled_state_num = self.description.state_num
+
         # Let our listeners know the connection is available again
         self._callback_listeners(EMPTY_EVENT)
 
@@ -128,7 +283,7 @@ class IpPairing(AbstractPairing):
 
     async def _ensure_connected(self):
         try:
-            await asyncio.wait_for(self.connection.ensure_connection(), 10)
+            await wait_for(self.connection.ensure_connection(), 10)
         except asyncio.TimeoutError:
             raise AccessoryDisconnectedError(
                 f"Timeout while waiting for connection to device {self.connection.host}:{self.connection.port}"
@@ -149,6 +304,7 @@ class IpPairing(AbstractPairing):
         await self.connection.close()
         await asyncio.sleep(0)
 
+    @with_deadline
     async def list_accessories_and_characteristics(self) -> list[dict[str, Any]]:
         """
         This retrieves a current set of accessories and characteristics behind this pairing.
@@ -172,6 +328,34 @@ class IpPairing(AbstractPairing):
         self._accessories_state = AccessoriesState(
             Accessories.from_list(accessories), self.config_num or 0
         )
+        self._update_heartbeat()
+        return accessories
+
+    @with_deadline
+    async def async_stream_accessories(
+        self, aids: Container[int] | None = None
+    ) -> Accessories:
+        """
+        Fetch the accessories, building the model as the response arrives.
+
+        Unlike list_accessories_and_characteristics the JSON is never held in
+        full, which keeps the peak memory use down for large bridges.
+
+        :param aids: only build the accessories with these aids. The result is
+            then only returned, the accessories state of the pairing is left alone.
+        :return: the accessories
+        """
+        await self._ensure_connected()
+
+        parser = AccessoriesStreamParser(aids)
+        await self.connection.request("GET", "/accessories", body_consumer=parser.feed)
+        accessories = parser.finish()
+
+        if aids is None:
+            self._accessories_state = AccessoriesState(
+                accessories, self.config_num or 0
+            )
+            self._update_heartbeat()
         return accessories
 
     async def list_pairings(self):
@@ -222,6 +406,7 @@ class IpPairing(AbstractPairing):
                 r["controllerType"] = controller_type
         return tmp
 
+    @with_deadline
     async def get_characteristics(
         self,
         characteristics,
@@ -245,16 +430,43 @@ class IpPairing(AbstractPairing):
         await self._ensure_connected()
 
         if not self.accessories:
-            await self.list_accessories_and_characteristics()
+            await self.async_stream_accessories()
 
-        url = "/characteristics?id=" + ",".join(
-            str(x[0]) + "." + str(x[1]) for x in set(characteristics)
+        characteristics = set(characteristics)
+        results = await self._read_characteristics(characteristics)
+
+        # The results are shared with the other callers in the batch, so each
+        # caller gets its own copy of its own slice of them.
+        return {key: dict(results[key]) for key in characteristics if key in results}
+
+    async def _read_characteristics(
+        self, characteristics: set[tuple[int, int]]
+    ) -> dict[tuple[int, int], dict[str, Any]]:
+        """
+        Read characteristics, sharing a request with any other pending reads.
+
+        All the characteristics requested within read_coalesce_window seconds of
+        each other (by default, the same event loop tick) are fetched with a single
+        GET. A read that is already on the wire is not joined, so callers never see
+        values older than their call.
+        """
+        return await self._pending_read.call(
+            self.read_coalesce_window,
+            lambda pending: pending.update(characteristics),
+            self._send_read,
         )
 
+    async def _send_read(
+        self, characteristics: set[tuple[int, int]]
+    ) -> dict[tuple[int, int], dict[str, Any]]:
+        url = "/characteristics?id=" + ",".join(
+            str(x[0]) + "." + str(x[1]) for x in characteristics
+        )
         response = await self.connection.get_json(url)
-
         return format_characteristic_list(response)
 
+    @with_deadline
+    @coalesce_writes
     async def put_characteristics(self, characteristics):
         """
         Update the values of writable characteristics. The characteristics have to be identified by accessory id (aid),
@@ -270,7 +482,7 @@ class IpPairing(AbstractPairing):
         await self._ensure_connected()
 
         if not self.accessories:
-            await self.list_accessories_and_characteristics()
+            await self.async_stream_accessories()
 
         data = []
         characteristics_set = set()
@@ -295,6 +507,7 @@ class IpPairing(AbstractPairing):
 
         return {}
 
+    @with_deadline
     async def subscribe(self, characteristics):
         await super().subscribe(set(characteristics))
 
@@ -313,11 +526,22 @@ class IpPairing(AbstractPairing):
             return {}
 
         try:
-            return await self._update_subscriptions(characteristics, True)
+            status = await self._update_subscriptions(characteristics, True)
+        except DeadlineExceededError:
+            # The caller ran out of time, which says nothing about push support
+            raise
         except AccessoryDisconnectedError:
             self.supports_subscribe = False
             return {}
 
+        self._live_subscriptions.update(
+            key
+            for key in characteristics
+            if key not in status or status[key]["status"] == 0
+        )
+        return status
+
+    @with_deadline
     async def unsubscribe(self, characteristics):
         if not self.connection.is_connected:
             # If not connected no need to unsubscribe
@@ -326,6 +550,7 @@ class IpPairing(AbstractPairing):
 
         await self._ensure_connected()
         char_set = set(characteristics)
+        self._live_subscriptions.difference_update(char_set)
         status = await self._update_subscriptions(characteristics, False)
         for id_tuple in status:
             char_set.discard(id_tuple)
@@ -333,51 +558,101 @@ class IpPairing(AbstractPairing):
         await super().unsubscribe(char_set)
         return status
 
+    @property
+    def batched_subscriptions(self) -> bool | None:
+        """
+        Whether the accessory accepts subscription changes for several aids at once.
+
+        This is None until it has been probed. The answer is kept in the
+        characteristic cache so it only needs probing once.
+        """
+        if self._batched_subscriptions is None:
+            if cache := self.controller._char_cache.get_map(self.id):
+                self._batched_subscriptions = cache.get("batched_subscriptions")
+        return self._batched_subscriptions
+
+    def _set_batched_subscriptions(self, supported: bool) -> None:
+        logger.debug(
+            "%s: Batched subscriptions supported: %s", self.connection.host, supported
+        )
+        self._batched_subscriptions = supported
+        if self.accessories:
+            self._update_accessories_state_cache()
+
+    def _update_accessories_state_cache(self) -> None:
+        """Update the cache with the current state of the accessories."""
+        super()._update_accessories_state_cache(
+            batched_subscriptions=self.batched_subscriptions
+        )
+
     async def _update_subscriptions(self, characteristics, ev):
         """Subscribe or unsubscribe to characteristics."""
-        status = {}
-        # We do one aid at a time to match what iOS does
-        # even though its inefficient
-        # https://github.com/home-assistant/core/issues/37996
-        #
         # Prebuild the payloads to avoid the set size changing
         # between await calls
         char_payloads = [
             [{"aid": aid, "iid": iid, "ev": ev} for aid, iid in aid_iids]
-            for _, aid_iids in groupby(characteristics, key=itemgetter(0))
+            for _, aid_iids in groupby(sorted(characteristics), key=itemgetter(0))
         ]
+
+        if len(char_payloads) > 1 and self.batched_subscriptions is not False:
+            # Send every aid in one request. Some accessories only cope with one
+            # aid at a time (like iOS does it), so the first time we see a
+            # pairing we probe and remember the answer.
+            # https://github.com/home-assistant/core/issues/37996
+            probing = self.batched_subscriptions is None
+            try:
+                status = await self._put_subscriptions(
+                    [row for char_payload in char_payloads for row in char_payload]
+                )
+            except HttpErrorResponse:
+                # Losing the connection or running out of time doesn't tell us
+                # anything, so only a definite answer is remembered
+                if not probing:
+                    raise
+                self._set_batched_subscriptions(False)
+            else:
+                if not probing:
+                    return status
+                if all(row["status"] == 0 for row in status.values()):
+                    self._set_batched_subscriptions(True)
+                    return status
+                # We can't tell an accessory that only handled the first aid from
+                # characteristics that really failed, so assume the worst.
+                self._set_batched_subscriptions(False)
+
+        # We do one aid at a time to match what iOS does
+        # even though its inefficient
+        status = {}
         for char_payload in char_payloads:
-            response = await self.connection.put_json(
-                "/characteristics",
-                {"characteristics": char_payload},
-            )
-            if response:
-                # An empty body is a success response
-                for row in response.get("characteristics", []):
-                    status[(row["aid"], row["iid"])] = {
-                        "status": row["status"],
-                        "description": to_status_code(row["status"]).description,
-                    }
+            status.update(await self._put_subscriptions(char_payload))
 
         return status
 
-    async def async_populate_accessories_state(
-        self, force_update: bool = False
-    ) -> bool:
-        """Populate the state of all accessories.
+    async def _put_subscriptions(self, char_payload):
+        status = {}
+        response = await self.connection.put_json(
+            "/characteristics",
+            {"characteristics": char_payload},
+        )
+        if response:
+            # An empty body is a success response
+            for row in response.get("characteristics", []):
+                status[(row["aid"], row["iid"])] = {
+                    "status": row["status"],
+                    "description": to_status_code(row["status"]).description,
+                }
+        return status
 
-        This method should try not to fetch all the accessories unless
-        we know the config num is out of date or force_update is True
-        """
-        if not self.accessories or force_update:
-            await self.list_accessories_and_characteristics()
+    async def _async_fetch_accessories(self) -> None:
+        # Only the model is needed, so there is no need to keep the whole body
+        await self.async_stream_accessories()
 
     async def _process_config_changed(self, config_num: int) -> None:
         """Process a config change.
 
         This method is called when the config num changes.
         """
-        await self.list_accessories_and_characteristics()
+        await self.async_stream_accessories()
         self._accessories_state = AccessoriesState(
             self._accessories_state.accessories, config_num
         )
@@ -396,7 +671,7 @@ class IpPairing(AbstractPairing):
         await self._ensure_connected()
 
         if not self.accessories:
-            await self.list_accessories_and_characteristics()
+            await self.async_stream_accessories()
 
         # we are looking for a characteristic of the identify type
         identify_type = CharacteristicsTypes.IDENTIFY
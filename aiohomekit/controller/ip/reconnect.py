@@ -0,0 +1,140 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+import logging
+import random
+from typing import Hashable
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_INITIAL_INTERVAL = 0.5
+RECONNECT_MAX_INTERVAL = 60
+RECONNECT_BACKOFF_FACTOR = 1.5
+MAX_CONCURRENT_RECONNECTS = 4
+
+
+def reconnect_interval(attempt: int) -> float:
+    """
+    How long to wait before reconnect attempt number `attempt` (starting at 1).
+
+    The wait grows by RECONNECT_BACKOFF_FACTOR per attempt up to
+    RECONNECT_MAX_INTERVAL, and a random amount of up to half of it is taken off
+    so that connections that dropped at the same time don't retry in lock-step.
+    """
+    interval = min(
+        RECONNECT_MAX_INTERVAL,
+        RECONNECT_INITIAL_INTERVAL * RECONNECT_BACKOFF_FACTOR**attempt,
+    )
+    return random.uniform(interval / 2, interval)
+
+
+class ReconnectScheduler:
+    """
+    Limits how many connections can be set up (TCP connect and pair-verify) at once.
+
+    It is shared by all the pairings of a controller. Connections wait for a slot
+    in the order they asked for one, except that connections to accessories that
+    were recently seen on the network (see `prioritize`) go first as they are the
+    most likely to succeed.
+    """
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT_RECONNECTS) -> None:
+        if max_concurrent < 1:
+            raise ValueError("Must allow at least one concurrent reconnect")
+        self.max_concurrent = max_concurrent
+        self._active = 0
+        self._seen: dict[Hashable, asyncio.Future] = {}
+        self._waiting: dict[Hashable, asyncio.Future] = {}
+        self._recently_seen: set[Hashable] = set()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of connections waiting for a reconnect slot."""
+        return len(self._seen) + len(self._waiting)
+
+    @property
+    def active(self) -> int:
+        """The number of connections currently being set up."""
+        return self._active
+
+    def prioritize(self, key: Hashable) -> None:
+        """
+        Move a connection to the front of the queue.
+
+        If the connection isn't waiting for a slot yet, it will go to the front the
+        next time it asks for one.
+        """
+        if future := self._waiting.pop(key, None):
+            self._seen[key] = future
+        elif key not in self._seen:
+            self._recently_seen.add(key)
+
+    @asynccontextmanager
+    async def slot(self, key: Hashable) -> AsyncIterator[None]:
+        """Wait for a reconnect slot for `key` and hold it for the duration of the block."""
+        await self._acquire(key)
+        try:
+            yield
+        finally:
+            self._release()
+
+    async def _acquire(self, key: Hashable) -> None:
+        seen = key in self._recently_seen
+        self._recently_seen.discard(key)
+
+        if self._active < self.max_concurrent and not self.queue_depth:
+            self._active += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        if seen:
+            self._seen[key] = future
+        else:
+            self._waiting[key] = future
+
+        logger.debug(
+            "%s: Waiting for a reconnect slot (%d queued, %d active)",
+            key,
+            self.queue_depth,
+            self._active,
+        )
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if self._seen.get(key) is future:
+                del self._seen[key]
+            elif self._waiting.get(key) is future:
+                del self._waiting[key]
+            elif future.done() and not future.cancelled():
+                # We were handed a slot just as we were cancelled, pass it on
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        for queue in (self._seen, self._waiting):
+            while queue:
+                future = queue.pop(next(iter(queue)))
+                # Skip waiters that were cancelled but haven't woken up yet
+                if not future.done():
+                    future.set_result(None)
+                    return
+        self._active -= 1
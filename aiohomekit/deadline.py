@@ -0,0 +1,154 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Per-call deadlines.
+
+A deadline is an absolute time.monotonic() value. The public pairing methods
+take one as a `deadline` keyword argument, and it is kept in a context variable
+for the duration of the call so that the connect, pair-verify and request
+code below it can cap their own timeouts with `remaining` and `wait_for`,
+without it having to be passed through every layer.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from typing import Any, Awaitable, Callable, TypeVar, cast
+
+from aiohomekit.exceptions import DeadlineExceededError
+
+T = TypeVar("T")
+WrapFuncType = TypeVar("WrapFuncType", bound=Callable[..., Any])
+
+_deadline: ContextVar[float | None] = ContextVar("aiohomekit_deadline", default=None)
+
+
+def get_deadline() -> float | None:
+    """Return the deadline of the current call, if it has one."""
+    return _deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: float | None) -> Iterator[None]:
+    """
+    Apply a deadline to everything awaited in the block.
+
+    A deadline can only be made earlier, never later, by a nested scope.
+    """
+    current = _deadline.get()
+    if deadline is None or (current is not None and current <= deadline):
+        yield
+        return
+
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(timeout: float | None = None) -> float | None:
+    """
+    How long an operation that would normally get `timeout` seconds may take.
+
+    :raises DeadlineExceededError: if the deadline of the current call has passed
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return timeout
+
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise DeadlineExceededError("Deadline exceeded")
+
+    if timeout is None:
+        return left
+    return min(timeout, left)
+
+
+def check_deadline() -> None:
+    """
+    Fail fast if the deadline of the current call has already passed.
+
+    :raises DeadlineExceededError: if the deadline of the current call has passed
+    """
+    remaining()
+
+
+async def wait_for(aw: Awaitable[T], timeout: float | None) -> T:
+    """
+    Like asyncio.wait_for, but also bounded by the deadline of the current call.
+
+    :raises DeadlineExceededError: if the deadline expired first
+    :raises asyncio.TimeoutError: if `timeout` expired first
+    """
+    try:
+        budget = remaining(timeout)
+    except DeadlineExceededError:
+        if asyncio.iscoroutine(aw):
+            aw.close()
+        raise
+
+    try:
+        return await asyncio.wait_for(aw, budget)
+    except asyncio.TimeoutError:
+        if budget != timeout:
+            raise DeadlineExceededError("Deadline exceeded") from None
+        raise
+
+
+async def wait_future(future: asyncio.Future[T]) -> T:
+    """
+    Await a future, failing it if the deadline of the current call passes first.
+
+    Unlike wait_for this needs no extra task, just a timer, so it is cheap
+    enough for every request. Only pass a future nobody else waits for.
+
+    :raises DeadlineExceededError: if the deadline expired first
+    """
+    budget = remaining()
+    if budget is None:
+        return await future
+
+    timer = asyncio.get_running_loop().call_later(budget, _deadline_exceeded, future)
+    try:
+        return await future
+    finally:
+        timer.cancel()
+
+
+def _deadline_exceeded(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_exception(DeadlineExceededError("Deadline exceeded"))
+
+
+def with_deadline(func: WrapFuncType) -> WrapFuncType:
+    """
+    Define a wrapper that adds a `deadline` keyword argument to a method.
+
+    The call fails with DeadlineExceededError without doing anything if the
+    deadline has already passed.
+    """
+
+    async def _async_wrap(*args: Any, deadline: float | None = None, **kwargs: Any):
+        with deadline_scope(deadline):
+            check_deadline()
+            return await func(*args, **kwargs)
+
+    return cast(WrapFuncType, _async_wrap)
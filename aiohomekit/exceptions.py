@@ -234,6 +234,11 @@ class TimeoutError(ConnectionError):
     """Connection timeout."""
 
 
+class DeadlineExceededError(TimeoutError):
+
+    """The deadline passed to an operation expired before it could complete."""
+
+
 class ConfigLoadingError(HomeKitException):
     """
     Used on problems loading some config. This includes but may not be limited to:
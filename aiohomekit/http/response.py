@@ -14,6 +14,9 @@
 # limitations under the License.
 #
 
+from __future__ import annotations
+
+from collections.abc import Callable
 import logging
 from typing import Union
 
@@ -28,13 +31,31 @@ class HttpResponse:
     STATE_BODY = 2
     STATE_DONE = 3
 
-    def __init__(self) -> None:
+    # Sub-states of STATE_BODY for chunked transfer encoding
+    CHUNK_SIZE = 0
+    CHUNK_DATA = 1
+    CHUNK_DATA_END = 2
+    CHUNK_TRAILER = 3
+
+    def __init__(
+        self, on_headers: Callable[[HttpResponse], None] | None = None
+    ) -> None:
+        """
+        :param on_headers: called once the status line and headers have been
+            parsed, before any of the body - e.g. to `set_body_consumer`
+        """
+        self._on_headers = on_headers
+        self._body_consumer: Callable[[bytes], None] | None = None
         self._state = HttpResponse.STATE_PRE_STATUS
         self._raw_response = bytearray()
         self._is_ready = False
         self._is_chunked = False
         self._had_empty_chunk = False
         self._content_length = -1
+        self._chunk_state = HttpResponse.CHUNK_SIZE
+        self._chunk_remaining = 0
+        self._body_parts = []
+        self._body_length = 0
         self.version = None
         self.code = None
         self.reason = None
@@ -42,12 +63,66 @@ class HttpResponse:
         self.body = bytearray()
 
     def parse(self, part: Union[bytearray, bytes]) -> bytearray:
-        self._raw_response += part
-        pos = self._raw_response.find(b"\r\n")
+        """
+        Feed the next piece of the byte stream into the parser.
+
+        The parser walks the data with a read offset rather than slicing after
+        every line. Only a partial line (a status line, header or chunk size)
+        is carried over between calls - body bytes are collected as slices and
+        joined once the response is complete.
+
+        :return: Any bytes that follow a complete response (the start of the
+            next response), or an empty bytearray if more data is needed.
+        """
+        if self._raw_response:
+            self._raw_response += part
+            data = self._raw_response
+        else:
+            data = part
+
+        with memoryview(data) as view:
+            pos = self._parse_head(data, 0)
+
+            if self._state == HttpResponse.STATE_BODY:
+                if self._is_chunked:
+                    pos = self._parse_chunked(data, view, pos)
+                elif self._content_length > 0:
+                    pos = self._parse_content(view, pos)
+
+            if self._body_consumer and self._body_parts:
+                for body_part in self._body_parts:
+                    self._body_consumer(body_part)
+                self._body_parts = []
+
+        if self.is_read_completely():
+            self._state = HttpResponse.STATE_DONE
+            if self._body_parts:
+                self.body = bytearray().join(self._body_parts)
+                self._body_parts = []
+
+            # Whatever is left in the buffer is part of the next request
+            remaining = bytearray(data[pos:])
+            self._raw_response = bytearray()
+            if remaining:
+                logger.debug("Bytes left in buffer after parsing packet: %r", remaining)
+            return remaining
+
+        if data is self._raw_response:
+            del self._raw_response[:pos]
+        else:
+            self._raw_response = bytearray(data[pos:])
+
+        return bytearray()
+
+    def _parse_head(self, data: Union[bytearray, bytes], pos: int) -> int:
+        while self._state < HttpResponse.STATE_BODY:
+            eol = data.find(b"\r\n", pos)
+            if eol == -1:
+                break
+
+            line = bytes(data[pos:eol])
+            pos = eol + 2
 
-        while pos != -1 and self._state < HttpResponse.STATE_BODY:
-            line = self._raw_response[:pos]
-            self._raw_response = self._raw_response[pos + 2 :]
             if self._state == HttpResponse.STATE_PRE_STATUS:
                 # parse status line
                 line = line.split(b" ", 2)
@@ -58,11 +133,13 @@ class HttpResponse:
                 self.reason = line[2].decode()
                 self._state = HttpResponse.STATE_HEADERS
 
-            elif self._state == HttpResponse.STATE_HEADERS and line == b"":
+            elif line == b"":
                 # this is the empty line after the headers
                 self._state = HttpResponse.STATE_BODY
+                if self._on_headers:
+                    self._on_headers(self)
 
-            elif self._state == HttpResponse.STATE_HEADERS:
+            else:
                 # parse a header line
                 line = line.split(b":", 1)
                 name = line[0].decode().strip().title()
@@ -73,48 +150,81 @@ class HttpResponse:
                 elif name == "Content-Length":
                     self._content_length = int(value)
                 self.headers.append((name, value))
-            else:
-                raise HttpException("Unknown parser state")
-
-            pos = self._raw_response.find(b"\r\n")
-
-        if self._state == HttpResponse.STATE_BODY and self._is_chunked:
-            pos = self._raw_response.find(b"\r\n")
-            while pos > -1:
-                line = self._raw_response[:pos]
-                self._raw_response = self._raw_response[pos + 2 :]
-                length = int(line, 16)
-                if length + 2 > len(self._raw_response):
-                    self._raw_response = line + b"\r\n" + self._raw_response
-                    # the remaining bytes in raw response are not sufficient. bail out and wait for an other call.
+
+        return pos
+
+    def _parse_chunked(
+        self, data: Union[bytearray, bytes], view: memoryview, pos: int
+    ) -> int:
+        # This is the hot path for large bodies, so the chunk state lives in
+        # locals for the duration of the loop.
+        end = len(data)
+        state = self._chunk_state
+        remaining = self._chunk_remaining
+        parts = self._body_parts
+
+        while True:
+            if state == HttpResponse.CHUNK_DATA:
+                available = end - pos
+                if available == 0:
                     break
+                if available > remaining:
+                    available = remaining
+                parts.append(view[pos : pos + available].tobytes())
+                self._body_length += available
+                pos += available
+                remaining -= available
+                if remaining == 0:
+                    state = HttpResponse.CHUNK_DATA_END
 
-                if length == 0:
-                    self._had_empty_chunk = True
-                    self._state = HttpResponse.STATE_DONE
-                    self._raw_response = self._raw_response[length + 2 :]
+            elif state == HttpResponse.CHUNK_DATA_END:
+                # Chunk data is followed by a CRLF
+                if end - pos < 2:
                     break
+                pos += 2
+                state = HttpResponse.CHUNK_SIZE
 
-                line = self._raw_response[:length]
-                self.body += line
-                self._raw_response = self._raw_response[length + 2 :]
+            else:
+                eol = data.find(b"\r\n", pos)
+                if eol == -1:
+                    break
+                line = data[pos:eol]
+                pos = eol + 2
 
-                pos = self._raw_response.find(b"\r\n")
+                if state == HttpResponse.CHUNK_TRAILER:
+                    # Trailers are ignored, an empty line ends the response
+                    if not line:
+                        self._had_empty_chunk = True
+                        break
+                    continue
 
-        if self._state == HttpResponse.STATE_BODY and self._content_length > 0:
-            remaining = self._content_length - len(self.body)
-            self.body += self._raw_response[:remaining]
-            self._raw_response = self._raw_response[remaining:]
+                remaining = int(line.split(b";", 1)[0], 16)
+                if remaining == 0:
+                    state = HttpResponse.CHUNK_TRAILER
+                else:
+                    state = HttpResponse.CHUNK_DATA
 
-        if self.is_read_completely():
-            # Whatever is left in the buffer is part of the next request
-            if len(self._raw_response) > 0:
-                logger.debug(
-                    "Bytes left in buffer after parsing packet: %r", self._raw_response
-                )
-            return self._raw_response
+        self._chunk_state = state
+        self._chunk_remaining = remaining
+        return pos
 
-        return bytearray()
+    def _parse_content(self, view: memoryview, pos: int) -> int:
+        available = min(self._content_length - self._body_length, len(view) - pos)
+        if available > 0:
+            # The slice is copied out of the view as the buffer it points at
+            # is recycled for the next call.
+            self._body_parts.append(view[pos : pos + available].tobytes())
+            self._body_length += available
+            pos += available
+        return pos
+
+    def set_body_consumer(self, consumer: Callable[[bytes], None]) -> None:
+        """
+        Pass the body to `consumer` piece by piece as it arrives.
+
+        The body isn't kept, so `body` is left empty once the response is complete.
+        """
+        self._body_consumer = consumer
 
     def read(self):
         """
@@ -132,7 +242,7 @@ class HttpResponse:
             return False
 
         if self._content_length != -1:
-            return len(self.body) == self._content_length
+            return self._body_length == self._content_length
 
         return True
 
@@ -62,12 +62,21 @@ class Transport(Enum):
 class Services:
     def __init__(self):
         self._services: list[Service] = []
+        self._iid_index: dict[int, Service] = {}
 
     def __iter__(self) -> Iterator[Service]:
         return iter(self._services)
 
     def iid(self, iid: int) -> Service:
-        return next(filter(lambda service: service.iid == iid, self._services))
+        service = self._iid_index.get(iid)
+        if service is None or service.iid != iid:
+            # iids can be reassigned after a service is added (e.g. when
+            # loading an entity map), so rebuild the index on a miss.
+            self._iid_index = _build_iid_index(self._services)
+            service = self._iid_index.get(iid)
+            if service is None:
+                raise StopIteration
+        return service
 
     def filter(
         self,
@@ -128,18 +137,34 @@ class Services:
 
     def append(self, service: Service):
         self._services.append(service)
+        self._iid_index.setdefault(service.iid, service)
 
 
 class Characteristics:
     def __init__(self, services: Services) -> None:
         self._services = services
+        self._iid_index: dict[int, Characteristic] = {}
 
-    def iid(self, iid: int) -> Characteristic | None:
+    def __iter__(self) -> Iterator[Characteristic]:
         for service in self._services:
-            for char in service.characteristics:
-                if char.iid == iid:
-                    return char
-        return None
+            yield from service.characteristics
+
+    def iid(self, iid: int) -> Characteristic | None:
+        char = self._iid_index.get(iid)
+        if char is None or char.iid != iid:
+            self._iid_index = _build_iid_index(self)
+            char = self._iid_index.get(iid)
+        return char
+
+
+def _build_iid_index(
+    items: Iterable[Service | Characteristic],
+) -> dict[int, Service | Characteristic]:
+    """Map iid to item, keeping the first item if an iid is repeated."""
+    index = {}
+    for item in items:
+        index.setdefault(item.iid, item)
+    return index
 
 
 class Accessory:
@@ -291,6 +316,8 @@ class Accessories:
 
     def __init__(self) -> None:
         self.accessories = []
+        self._aid_index: dict[int, Accessory] = {}
+        self._aid_iid_index: dict[tuple[int, int], Characteristic] = {}
 
     def __iter__(self) -> Iterator[Accessory]:
         return iter(self.accessories)
@@ -312,6 +339,9 @@ class Accessories:
 
     def add_accessory(self, accessory: Accessory) -> None:
         self.accessories.append(accessory)
+        self._aid_index.setdefault(accessory.aid, accessory)
+        for char in accessory.characteristics:
+            self._aid_iid_index.setdefault((accessory.aid, char.iid), char)
 
     def serialize(self) -> entity_map.Accesories:
         accessories_list = []
@@ -324,15 +354,34 @@ class Accessories:
         return hkjson.dumps(d)
 
     def aid(self, aid) -> Accessory:
-        return next(filter(lambda accessory: accessory.aid == aid, self.accessories))
+        accessory = self._aid_index.get(aid)
+        if accessory is None or accessory.aid != aid:
+            self._aid_index = {}
+            for accessory in self.accessories:
+                self._aid_index.setdefault(accessory.aid, accessory)
+            accessory = self._aid_index.get(aid)
+            if accessory is None:
+                raise StopIteration
+        return accessory
+
+    def characteristic(self, aid: int, iid: int) -> Characteristic | None:
+        """Find a characteristic by its (aid, iid) without scanning the model."""
+        char = self._aid_iid_index.get((aid, iid))
+        if char is not None and char.iid == iid and char.service.accessory.aid == aid:
+            return char
+
+        try:
+            char = self.aid(aid).characteristics.iid(iid)
+        except StopIteration:
+            return None
+
+        if char is not None:
+            self._aid_iid_index[(aid, iid)] = char
+        return char
 
     def process_changes(self, changes: dict[tuple[int, int], Any]) -> None:
         for ((aid, iid), value) in changes.items():
-            accessory = self.aid(aid)
-            if not accessory:
-                continue
-
-            char = accessory.characteristics.iid(iid)
+            char = self.characteristic(aid, iid)
             if not char:
                 continue
 
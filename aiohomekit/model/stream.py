@@ -0,0 +1,149 @@
+#
+# Copyright 2022 aiohomekit team
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from __future__ import annotations
+
+from collections.abc import Container
+import re
+from typing import Union
+
+import aiohomekit.hkjson as hkjson
+from aiohomekit.uuid import normalize_uuid
+
+from . import Accessories, Accessory
+
+# A complete string (skipped as a whole so brackets inside it are ignored), the
+# opening quote of a string that hasn't been fully received yet, or a bracket.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|"|[][{}]', re.DOTALL)
+
+_QUOTE = ord('"')
+_OPEN_ARRAY = ord("[")
+_OPEN = frozenset(b"{[")
+_ACCESSORIES_KEY = b'"accessories"'
+
+
+class AccessoriesStreamParser:
+    """
+    Build Accessories from an /accessories document as it is received.
+
+    The document is fed in as many pieces as it arrives in. Each entry of the
+    "accessories" array is decoded and turned into an Accessory as soon as its
+    closing brace arrives, after which its JSON is dropped - so at most one
+    accessory's worth of raw and decoded JSON is held at a time, rather than the
+    whole body and the whole dict tree alongside the model.
+    """
+
+    def __init__(self, aids: Container[int] | None = None) -> None:
+        """
+        :param aids: if given, only accessories with these aids are built
+        """
+        self.accessories = Accessories()
+        self._aids = aids
+        self._buffer = bytearray()
+        self._pos = 0
+        self._depth = 0
+        self._start = -1
+        self._key_is_accessories = False
+        self._in_accessories = False
+        self._seen_accessories = False
+        self._error: Exception | None = None
+
+    def feed(self, data: Union[bytes, bytearray]) -> None:
+        """
+        Feed the next piece of the document into the parser.
+
+        This never raises, as it is called while the response is being read.
+        Any error is kept and raised by `finish`.
+        """
+        if self._error:
+            return
+
+        self._buffer += data
+        try:
+            self._parse()
+        except Exception as exc:
+            self._error = exc
+            self._buffer = bytearray()
+
+    def finish(self) -> Accessories:
+        """
+        Return the accessories once the whole document has been fed in.
+
+        :raises ValueError: if the document was incomplete or unbalanced. An
+            accessory that can't be decoded raises whatever hkjson.loads raised.
+        """
+        if self._error:
+            raise self._error
+        if self._depth or not self._seen_accessories:
+            raise ValueError("Incomplete accessories document")
+        return self.accessories
+
+    def _parse(self) -> None:
+        buffer = self._buffer
+        pos = len(buffer)
+
+        for match in _TOKEN.finditer(buffer, self._pos):
+            start, end = match.span()
+            char = buffer[start]
+
+            if char == _QUOTE:
+                if end - start == 1:
+                    # The rest of the string hasn't arrived yet
+                    pos = start
+                    break
+                if self._depth == 1:
+                    self._key_is_accessories = buffer[start:end] == _ACCESSORIES_KEY
+
+            elif char in _OPEN:
+                self._depth += 1
+                if (
+                    self._depth == 2
+                    and self._key_is_accessories
+                    and char == _OPEN_ARRAY
+                ):
+                    self._in_accessories = self._seen_accessories = True
+                elif self._depth == 3 and self._in_accessories:
+                    self._start = start
+
+            else:
+                self._depth -= 1
+                if self._depth < 0:
+                    raise ValueError("Unbalanced accessories document")
+                if self._depth == 2 and self._start != -1:
+                    self._add_accessory(buffer[self._start : end])
+                    self._start = -1
+                elif self._depth == 1:
+                    self._in_accessories = False
+
+        # Drop everything that has been dealt with
+        keep = pos if self._start == -1 else min(pos, self._start)
+        del buffer[:keep]
+        self._pos = pos - keep
+        if self._start != -1:
+            self._start -= keep
+
+    def _add_accessory(self, data: bytearray) -> None:
+        accessory = hkjson.loads(data)
+        if self._aids is not None and accessory["aid"] not in self._aids:
+            return
+
+        for service in accessory["services"]:
+            service["type"] = normalize_uuid(service["type"])
+
+            for characteristic in service["characteristics"]:
+                characteristic["type"] = normalize_uuid(characteristic["type"])
+
+        self.accessories.add_accessory(Accessory.create_from_dict(accessory))
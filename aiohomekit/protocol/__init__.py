@@ -461,15 +461,16 @@ def get_session_keys(
 
     request_tlv = [(TLV.kTLVType_State, TLV.M1), (TLV.kTLVType_PublicKey, ios_key_pub)]
 
-    # If session_id is provided we can request that the accessory resumes it
-    if session_id and derive:
-        request_tlv = resume_m1(session_id, ios_key_pub, derive)
-
     step2_expectations = [
         TLV.kTLVType_State,
         TLV.kTLVType_PublicKey,
         TLV.kTLVType_EncryptedData,
     ]
+
+    # If session_id is provided we can request that the accessory resumes it
+    if session_id and derive:
+        request_tlv = resume_m1(session_id, ios_key_pub, derive)
+        step2_expectations += [TLV.kTLVType_Method, TLV.kTLVType_SessionID]
     response_tlv = yield (request_tlv, step2_expectations)
 
     #
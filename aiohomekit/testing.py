@@ -30,6 +30,7 @@ from aiohomekit.controller.abstract import (
     AbstractPairingData,
     FinishPairing,
 )
+from aiohomekit.deadline import with_deadline
 from aiohomekit.exceptions import AccessoryNotFoundError
 from aiohomekit.model import Accessories, AccessoriesState, Transport
 from aiohomekit.model.categories import Categories
@@ -263,10 +264,12 @@ class FakePairing(AbstractPairing):
         )
         self._callback_and_save_config_changed(config_num)
 
+    @with_deadline
     async def list_accessories_and_characteristics(self):
         """Fake implementation of list_accessories_and_characteristics."""
         return self.accessories.serialize()
 
+    @with_deadline
     async def get_characteristics(self, characteristics):
         """Fake implementation of get_characteristics."""
         if not self.available:
@@ -283,6 +286,7 @@ class FakePairing(AbstractPairing):
 
         return results
 
+    @with_deadline
     async def put_characteristics(self, characteristics):
         """Fake implementation of put_characteristics."""
         filtered = []
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
 import enum
 import logging
 import re
@@ -17,8 +18,12 @@ T = TypeVar("T")
 
 
 def async_create_task(coroutine: Awaitable[T], *, name=None) -> asyncio.Task[T]:
-    """Wrapper for asyncio.create_task that logs errors."""
-    task = asyncio.create_task(coroutine, name=name)
+    """Wrapper for asyncio.create_task that logs errors.
+
+    The task outlives the call that created it, so it starts from an empty
+    context instead of inheriting the deadline and priorities of that call.
+    """
+    task = contextvars.Context().run(asyncio.create_task, coroutine, name=name)
     task.add_done_callback(_handle_task_result)
     return task
 
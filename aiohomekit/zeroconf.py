@@ -24,7 +24,7 @@ import logging
 from typing import AsyncIterable
 
 from zeroconf import ServiceListener, Zeroconf
-from zeroconf.asyncio import AsyncServiceInfo, AsyncZeroconf
+from zeroconf.asyncio import AsyncServiceBrowser, AsyncServiceInfo, AsyncZeroconf
 
 from aiohomekit.characteristic_cache import CharacteristicCacheType
 from aiohomekit.controller.abstract import AbstractController, AbstractDiscovery
@@ -32,6 +32,7 @@ from aiohomekit.exceptions import AccessoryNotFoundError
 from aiohomekit.model import Categories
 from aiohomekit.model.feature_flags import FeatureFlags
 from aiohomekit.model.status_flags import StatusFlags
+from aiohomekit.utils import async_create_task
 
 HAP_TYPE_TCP = "_hap._tcp.local."
 HAP_TYPE_UDP = "_hap._udp.local."
@@ -116,10 +117,31 @@ class ZeroconfDiscovery(AbstractDiscovery):
         self.description = description
 
 
+class _DiscoveryListener(ServiceListener):
+    """Passes the changes a service browser sees on to a ZeroconfController."""
+
+    def __init__(self, controller: ZeroconfController) -> None:
+        self.controller = controller
+
+    def add_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+        self.controller._async_service_updated(zc, type_, name)
+
+    def update_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+        self.controller._async_service_updated(zc, type_, name)
+
+    def remove_service(self, zc: Zeroconf, type_: str, name: str) -> None:
+        self.controller._async_service_removed(name)
+
+
 class ZeroconfController(AbstractController):
 
     """
     Base class for HAP protocols that rely on Zeroconf discovery.
+
+    Once started, a service browser keeps `discoveries` up to date as
+    accessories appear, change their TXT records or go away, and passes the
+    changes on to the matching pairing. Finding a device is then a dict lookup
+    rather than a round of mDNS queries.
     """
 
     hap_type: str
@@ -131,53 +153,102 @@ class ZeroconfController(AbstractController):
     ):
         super().__init__(char_cache)
         self._async_zeroconf_instance = zeroconf_instance
+        self._browser: AsyncServiceBrowser | None = None
+        # Service name to device id, as removals only carry the name
+        self._names: dict[str, str] = {}
+        self._requests: dict[str, asyncio.Task] = {}
 
     async def async_start(self):
         zc = self._async_zeroconf_instance.zeroconf
         if not zc:
             return self
 
-        # FIXME: Ideally we want to attach to the zeroconf instance here and monitor for
-        # 1. Hostname/port changes
-        # 2. C# getting incremented
-        # zc.async_add_listener(self, None)
+        self._browser = AsyncServiceBrowser(
+            zc, self.hap_type, handlers=_DiscoveryListener(self)
+        )
+        return self
 
     async def async_stop(self):
-        # FIXME: Detach from zeroconf instance
-        pass
+        for task in self._requests.values():
+            task.cancel()
+        self._requests.clear()
+
+        if self._browser:
+            await self._browser.async_cancel()
+            self._browser = None
 
     async def async_find(self, device_id: str) -> ZeroconfDiscovery:
         device_id = device_id.lower()
 
-        async for device in self.async_discover():
-            if device.description.id == device_id:
+        if self._browser:
+            # The browser has already seen everything there is to find
+            if device := self.discoveries.get(device_id):
                 return device
+        else:
+            async for device in self.async_discover():
+                if device.description.id == device_id:
+                    return device
 
         raise AccessoryNotFoundError(f"Accessory with device id {device_id} not found")
 
     async def async_discover(self) -> AsyncIterable[ZeroconfDiscovery]:
-        zc = self._async_zeroconf_instance.zeroconf
-        infos = [
-            AsyncServiceInfo(self.hap_type, record.alias)
-            for record in zc.cache.get_all_by_details(self.hap_type, TYPE_PTR, CLASS_IN)
-        ]
+        if not self._browser:
+            zc = self._async_zeroconf_instance.zeroconf
+            infos = [
+                AsyncServiceInfo(self.hap_type, record.alias)
+                for record in zc.cache.get_all_by_details(
+                    self.hap_type, TYPE_PTR, CLASS_IN
+                )
+            ]
+
+            await asyncio.gather(*(self._async_handle_service(info) for info in infos))
+
+        for device in list(self.discoveries.values()):
+            yield device
 
-        await asyncio.gather(*(self._async_handle_service(info) for info in infos))
+    def _async_service_updated(self, zc: Zeroconf, type_: str, name: str) -> None:
+        """Refresh a device that the service browser saw appear or change."""
+        info = AsyncServiceInfo(type_, name)
+        if info.load_from_cache(zc):
+            self._handle_service_info(info)
+            return
 
-        for device in self.discoveries.values():
-            yield device
+        if task := self._requests.pop(name, None):
+            task.cancel()
+        task = self._requests[name] = async_create_task(
+            self._async_handle_service(info)
+        )
+        task.add_done_callback(
+            lambda _: self._requests.pop(name, None)
+            if self._requests.get(name) is task
+            else None
+        )
+
+    def _async_service_removed(self, name: str) -> None:
+        """Forget a device that the service browser saw go away."""
+        if task := self._requests.pop(name, None):
+            task.cancel()
+        if (device_id := self._names.pop(name, None)) is not None:
+            self.discoveries.pop(device_id, None)
 
     async def _async_handle_service(self, info: AsyncServiceInfo):
         """Add a device that became visible via zeroconf."""
         # AsyncServiceInfo already tries 3x
         await info.async_request(self._async_zeroconf_instance.zeroconf, _TIMEOUT_MS)
+        self._handle_service_info(info)
 
+    def _handle_service_info(self, info: AsyncServiceInfo) -> None:
         try:
             description = HomeKitService.from_service_info(info)
         except ValueError:
             logger.debug("Not a valid homekit device")
             return
 
+        self._names[info.name] = description.id
+
+        if pairing := self.pairings.get(description.id):
+            pairing._async_description_update(description)
+
         if description.id in self.discoveries:
             self.discoveries[description.id]._update_from_discovery(description)
             return
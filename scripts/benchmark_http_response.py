@@ -0,0 +1,81 @@
+#! env python
+"""
+Benchmark HttpResponse.parse against the accessory fixtures.
+
+Each fixture is wrapped in a chunked and a Content-Length response and fed to
+the parser in TCP sized pieces, the way InsecureHomeKitProtocol.data_received
+sees it.
+
+    python scripts/benchmark_http_response.py [--piece-size 1024] [--chunk-size 1000]
+"""
+
+import argparse
+import pathlib
+import timeit
+
+from aiohomekit.http.response import HttpResponse
+
+FIXTURES = pathlib.Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def chunked_response(body: bytes, chunk_size: int = 1000) -> bytes:
+    out = bytearray(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/hap+json\r\n"
+        b"Transfer-Encoding: chunked\r\n"
+        b"\r\n"
+    )
+    for i in range(0, len(body), chunk_size):
+        chunk = body[i : i + chunk_size]
+        out += b"%x\r\n" % len(chunk) + chunk + b"\r\n"
+    out += b"0\r\n\r\n"
+    return bytes(out)
+
+
+def content_length_response(body: bytes) -> bytes:
+    return (
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/hap+json\r\n"
+        b"Content-Length: %d\r\n"
+        b"\r\n" % len(body)
+    ) + body
+
+
+def feed(parts):
+    response = HttpResponse()
+    for part in parts:
+        response.parse(part)
+    assert response.is_read_completely()
+    return response
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--piece-size", type=int, default=1024)
+    parser.add_argument("--number", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--scale", type=int, default=1, help="repeat each body N times")
+    args = parser.parse_args()
+
+    for path in sorted(FIXTURES.glob("*.json")):
+        body = path.read_bytes() * args.scale
+
+        for kind, raw in (
+            ("chunked", chunked_response(body, args.chunk_size)),
+            ("length", content_length_response(body)),
+        ):
+            parts = [
+                raw[i : i + args.piece_size]
+                for i in range(0, len(raw), args.piece_size)
+            ]
+            assert feed(parts).body == body
+
+            elapsed = timeit.timeit(lambda: feed(parts), number=args.number)
+            print(
+                f"{path.name:40} {kind:8} {len(body):>9} bytes "
+                f"{elapsed / args.number * 1000:8.3f} ms/response"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ import io
 import json
 from json.decoder import JSONDecodeError
 import logging
+import os
 import select
 import socket
 from socketserver import ThreadingMixIn
@@ -83,6 +84,7 @@ class AccessoryServer(ThreadingMixIn, HTTPServer):
         self.data = AccessoryServerData(config_file)
         self.data.increase_configuration_number()
         self.sessions = {}
+        self.resumable_sessions = {}
         self.zeroconf = Zeroconf()
         self.mdns_type = "_hap._tcp.local."
         self.mdns_name = self.data.name + "._hap._tcp.local."
@@ -458,7 +460,12 @@ class AccessoryRequestHandler(BaseHTTPRequestHandler):
         try:
             # make connection non blocking so the select can work
             self.connection.setblocking(0)
-            ready = select.select([self.connection], [], [], 1)
+
+            # pipelined requests may already be in the read buffer, where select can't see them
+            if self.rfile.peek(1):
+                ready = ([self.connection], [], [])
+            else:
+                ready = select.select([self.connection], [], [], 1)
 
             # no data was to be received, so we count up to track how many seconds in total this happened
             if not ready[0]:
@@ -875,6 +882,9 @@ class AccessoryRequestHandler(BaseHTTPRequestHandler):
     def _post_pair_verify(self):
         d_req = TLV.decode_bytes(self.body)
 
+        if self._resume_pair_verify(dict(d_req)):
+            return
+
         # Order is not consistent, so force things in to order specified in spec
         d_req = tlv_reorder(
             d_req,
@@ -1025,22 +1035,15 @@ class AccessoryRequestHandler(BaseHTTPRequestHandler):
 
             #
             shared_secret = self.server.sessions[self.session_id]["shared_secret"]
+            self._set_session_keys(shared_secret)
 
-            controller_to_accessory_key = hkdf_derive(
-                shared_secret, b"Control-Salt", b"Control-Write-Encryption-Key"
+            resume_session_id = hkdf_derive(
+                shared_secret,
+                b"Pair-Verify-ResumeSessionID-Salt",
+                b"Pair-Verify-ResumeSessionID-Info",
+                length=8,
             )
-            self.server.sessions[self.session_id][
-                "controller_to_accessory_key"
-            ] = controller_to_accessory_key
-            self.server.sessions[self.session_id]["controller_to_accessory_count"] = 0
-
-            accessory_to_controller_key = hkdf_derive(
-                shared_secret, b"Control-Salt", b"Control-Read-Encryption-Key"
-            )
-            self.server.sessions[self.session_id][
-                "accessory_to_controller_key"
-            ] = accessory_to_controller_key
-            self.server.sessions[self.session_id]["accessory_to_controller_count"] = 0
+            self.server.resumable_sessions[resume_session_id] = shared_secret
 
             d_res.append(
                 (
@@ -1056,6 +1059,84 @@ class AccessoryRequestHandler(BaseHTTPRequestHandler):
 
         self.send_error(HttpStatusCodes.METHOD_NOT_ALLOWED)
 
+    def _set_session_keys(self, shared_secret):
+        controller_to_accessory_key = hkdf_derive(
+            shared_secret, b"Control-Salt", b"Control-Write-Encryption-Key"
+        )
+        self.server.sessions[self.session_id][
+            "controller_to_accessory_key"
+        ] = controller_to_accessory_key
+        self.server.sessions[self.session_id]["controller_to_accessory_count"] = 0
+
+        accessory_to_controller_key = hkdf_derive(
+            shared_secret, b"Control-Salt", b"Control-Read-Encryption-Key"
+        )
+        self.server.sessions[self.session_id][
+            "accessory_to_controller_key"
+        ] = accessory_to_controller_key
+        self.server.sessions[self.session_id]["accessory_to_controller_count"] = 0
+
+    def _resume_pair_verify(self, d_req):
+        """
+        Resume an earlier session if M1 asks for it and we still know it.
+
+        Returns False if a normal pair verify should be done instead.
+        """
+        method = d_req.get(TLV.kTLVType_Method)
+        if not method or int.from_bytes(method, "little") != TLV.kTLVMethod_Resume:
+            return False
+
+        old_session_id = bytes(d_req.get(TLV.kTLVType_SessionID, b""))
+        shared_secret = self.server.resumable_sessions.pop(old_session_id, None)
+        if shared_secret is None:
+            return False
+
+        ios_device_pub_key = bytes(d_req[TLV.kTLVType_PublicKey])
+        request_key = hkdf_derive(
+            shared_secret,
+            ios_device_pub_key + old_session_id,
+            b"Pair-Resume-Request-Info",
+        )
+        decrypted = ChaCha20Poly1305Decryptor(request_key).decrypt(
+            b"",
+            b"PR-Msg01",
+            bytes([0, 0, 0, 0]),
+            d_req[TLV.kTLVType_EncryptedData],
+        )
+        if decrypted != b"":
+            return False
+
+        session_id = os.urandom(8)
+        response_key = hkdf_derive(
+            shared_secret,
+            ios_device_pub_key + session_id,
+            b"Pair-Resume-Response-Info",
+        )
+        auth_tag = ChaCha20Poly1305Encryptor(response_key).encrypt(
+            b"",
+            b"PR-Msg02",
+            bytes([0, 0, 0, 0]),
+            b"",
+        )
+
+        shared_secret = hkdf_derive(
+            shared_secret,
+            ios_device_pub_key + session_id,
+            b"Pair-Resume-Shared-Secret-Info",
+        )
+        self._set_session_keys(shared_secret)
+        self.server.resumable_sessions[session_id] = shared_secret
+
+        self._send_response_tlv(
+            [
+                (TLV.kTLVType_State, TLV.M2),
+                (TLV.kTLVType_Method, TLV.kTLVMethod_Resume.to_bytes(1, "little")),
+                (TLV.kTLVType_SessionID, session_id),
+                (TLV.kTLVType_EncryptedData, auth_tag),
+            ]
+        )
+        return True
+
     def _post_pairings(self):
         d_req = TLV.decode_bytes(self.body)
 
@@ -1167,6 +1248,7 @@ class AccessoryRequestHandler(BaseHTTPRequestHandler):
 
             # 3) remove pairing and republish device
             server_data.remove_peer(d_req[2][1])
+            self.server.resumable_sessions.clear()
             self.server.publish_device()
 
             d_res.append(
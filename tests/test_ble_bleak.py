@@ -0,0 +1,28 @@
+from unittest import mock
+
+from aiohomekit.controller.ble.bleak import AIOHomeKitBleakClient
+from aiohomekit.model.characteristics import CharacteristicsTypes
+from aiohomekit.model.services import ServicesTypes
+
+
+async def test_get_characteristic_iid_uses_known_iids():
+    client = AIOHomeKitBleakClient("AA:BB:CC:DD:EE:FF")
+    client.read_gatt_descriptor = mock.AsyncMock(return_value=b"\x22\x00")
+    char = mock.Mock(
+        service_uuid=ServicesTypes.PAIRING.lower(),
+        uuid=CharacteristicsTypes.PAIR_VERIFY.lower(),
+    )
+
+    client.set_known_iids(
+        {(ServicesTypes.PAIRING, CharacteristicsTypes.PAIR_VERIFY): 17}
+    )
+    assert await client.get_characteristic_iid(char) == 17
+    assert not client.read_gatt_descriptor.called
+
+    other = mock.Mock(service_uuid=ServicesTypes.PAIRING, uuid="1234")
+    assert await client.get_characteristic_iid(other) == 0x22
+    client.read_gatt_descriptor.assert_awaited_once()
+
+    # Fetching the database again must not reuse iids from the old one
+    client.set_known_iids({})
+    assert await client.get_characteristic_iid(char) == 0x22
@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+
+from aiohomekit.controller.ble.operations import (
+    OperationPriority,
+    OperationQueue,
+    operation_priority,
+)
+from aiohomekit.utils import async_create_task
+
+
+async def _run(queue, priority, name, order, work=None):
+    operation = await queue.acquire(priority)
+    try:
+        with operation.running():
+            order.append(name)
+            if work:
+                await work()
+    finally:
+        queue.release(operation)
+
+
+async def test_operations_run_most_urgent_first():
+    queue = OperationQueue()
+    order = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.ensure_future(
+            _run(queue, OperationPriority.CONFIG_SYNC, "sync", order, release.wait)
+        )
+    ]
+    await asyncio.sleep(0)
+    for priority, name in (
+        (OperationPriority.CATCH_UP_POLL, "poll"),
+        (OperationPriority.INTERACTIVE_READ, "read"),
+        (OperationPriority.INTERACTIVE_WRITE, "write"),
+        (OperationPriority.INTERACTIVE_WRITE, "write2"),
+    ):
+        tasks.append(asyncio.ensure_future(_run(queue, priority, name, order)))
+    await asyncio.sleep(0)
+    assert queue.queue_depth == 4
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert order == ["sync", "write", "write2", "read", "poll"]
+    assert not queue.locked()
+
+
+async def test_checkpoint_lets_urgent_operations_through():
+    queue = OperationQueue()
+    order = []
+    step = asyncio.Event()
+
+    async def _bulk():
+        for i in range(3):
+            await queue.checkpoint()
+            order.append(f"read {i}")
+            await step.wait()
+            step.clear()
+
+    bulk = asyncio.ensure_future(
+        _run(queue, OperationPriority.CATCH_UP_POLL, "poll", order, _bulk)
+    )
+    await asyncio.sleep(0)
+
+    # Another poll queues behind, a write has to wait for the read in flight
+    other = asyncio.ensure_future(
+        _run(queue, OperationPriority.CATCH_UP_POLL, "other poll", order)
+    )
+    write = asyncio.ensure_future(
+        _run(queue, OperationPriority.INTERACTIVE_WRITE, "write", order)
+    )
+    await asyncio.sleep(0)
+    assert order == ["poll", "read 0"]
+
+    step.set()
+    await write
+    assert order[:3] == ["poll", "read 0", "write"]
+
+    # The paused poll carries on ahead of the one that queued behind it
+    while not bulk.done():
+        step.set()
+        await asyncio.sleep(0)
+    await other
+    assert order == ["poll", "read 0", "write", "read 1", "read 2", "other poll"]
+
+
+async def test_checkpoint_without_waiters_carries_on():
+    queue = OperationQueue()
+    order = []
+
+    async def _bulk():
+        await queue.checkpoint()
+        order.append("read")
+
+    await _run(queue, OperationPriority.CONFIG_SYNC, "sync", order, _bulk)
+    assert order == ["sync", "read"]
+
+    # Outside of an operation there is nothing to yield
+    await queue.checkpoint()
+    assert not queue.should_yield()
+
+
+async def test_nested_operations_inherit_priority():
+    queue = OperationQueue()
+
+    @operation_priority(OperationPriority.CATCH_UP_POLL)
+    async def _catch_up():
+        operation = await queue.acquire(OperationPriority.INTERACTIVE_READ)
+        queue.release(operation)
+        return operation.priority
+
+    assert await _catch_up() == OperationPriority.CATCH_UP_POLL
+
+    operation = await queue.acquire(OperationPriority.INTERACTIVE_READ)
+    queue.release(operation)
+    assert operation.priority == OperationPriority.INTERACTIVE_READ
+
+
+async def test_cancelled_operation_is_skipped():
+    queue = OperationQueue()
+    running = await queue.acquire(OperationPriority.CONFIG_SYNC)
+
+    cancelled = asyncio.ensure_future(
+        queue.acquire(OperationPriority.INTERACTIVE_WRITE)
+    )
+    waiting = asyncio.ensure_future(queue.acquire(OperationPriority.CATCH_UP_POLL))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    queue.release(running)
+    operation = await waiting
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert operation.priority == OperationPriority.CATCH_UP_POLL
+    assert queue.queue_depth == 0
+
+    # Releasing a turn that was already passed on does nothing
+    queue.release(running)
+    assert queue.locked()
+
+
+async def test_tasks_do_not_inherit_priority():
+    queue = OperationQueue()
+
+    async def _acquire():
+        operation = await queue.acquire(OperationPriority.INTERACTIVE_WRITE)
+        queue.release(operation)
+        return operation.priority
+
+    @operation_priority(OperationPriority.CATCH_UP_POLL)
+    async def _poll():
+        return await async_create_task(_acquire())
+
+    assert await _poll() == OperationPriority.INTERACTIVE_WRITE
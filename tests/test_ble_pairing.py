@@ -0,0 +1,347 @@
+import asyncio
+from unittest import mock
+
+from aiohomekit.controller.ble.operations import (
+    OperationPriority,
+    _requested,
+    operation_priority,
+)
+from aiohomekit.controller.ble.pairing import BlePairing
+from aiohomekit.controller.ble.signatures import SignatureCache
+from aiohomekit.controller.ble.slots import Priority, get_priority
+from aiohomekit.model import AccessoriesState
+from aiohomekit.model.characteristics import CharacteristicsTypes
+from aiohomekit.model.services import ServicesTypes
+from aiohomekit.pdu import OpCode
+from aiohomekit.protocol.tlv import TLV
+
+SIGNATURE = {"perms": ["pr", "ev"], "format": "bool"}
+
+
+def _pairing(controller, device_id):
+    pairing = BlePairing(
+        controller,
+        {"AccessoryPairingID": device_id, "AccessoryAddress": device_id},
+        description=mock.Mock(category=10, config_num=1),
+    )
+    char = mock.Mock(
+        uuid=CharacteristicsTypes.ON,
+        service_uuid=ServicesTypes.LIGHTBULB,
+    )
+    service = mock.Mock(uuid=ServicesTypes.LIGHTBULB, characteristics=[char])
+    pairing.client = mock.Mock(
+        get_services=mock.AsyncMock(return_value=[service]),
+        get_characteristic_iid=mock.AsyncMock(return_value=10),
+    )
+    return pairing
+
+
+async def test_identical_accessories_share_signatures():
+    controller = mock.Mock(signature_cache=SignatureCache())
+    first = _pairing(controller, "00:00:00:00:00:01")
+    second = _pairing(controller, "00:00:00:00:00:02")
+
+    with mock.patch.object(
+        BlePairing, "_async_read_signature", return_value=SIGNATURE
+    ) as read_signature:
+        first_db = await first._async_fetch_gatt_database()
+        assert read_signature.call_count == 1
+        second_db = await second._async_fetch_gatt_database()
+
+    # The second accessory only reads one signature to check the cached ones
+    assert read_signature.call_count == 2
+    assert first_db.serialize() == second_db.serialize()
+    char = second_db.aid(1).characteristics.iid(10)
+    assert char.perms == ["pr", "ev"]
+    assert char.perms is not first_db.aid(1).characteristics.iid(10).perms
+
+    # A different config number means the signatures may have changed
+    third = _pairing(controller, "00:00:00:00:00:03")
+    third.description.config_num = 2
+    with mock.patch.object(
+        BlePairing, "_async_read_signature", return_value=SIGNATURE
+    ) as read_signature:
+        await third._async_fetch_gatt_database()
+    read_signature.assert_called_once()
+
+
+async def test_different_signatures_with_same_layout_are_read():
+    controller = mock.Mock(signature_cache=SignatureCache())
+    first = _pairing(controller, "00:00:00:00:00:01")
+    second = _pairing(controller, "00:00:00:00:00:02")
+
+    with mock.patch.object(BlePairing, "_async_read_signature", return_value=SIGNATURE):
+        await first._async_fetch_gatt_database()
+
+    writable = {"perms": ["pr", "pw", "ev"], "format": "bool"}
+    with mock.patch.object(
+        BlePairing, "_async_read_signature", return_value=writable
+    ) as read_signature:
+        second_db = await second._async_fetch_gatt_database()
+
+    assert read_signature.call_count == 2
+    assert second_db.aid(1).characteristics.iid(10).perms == ["pr", "pw", "ev"]
+
+
+def test_signature_cache_forgets_least_recently_used():
+    cache = SignatureCache(max_size=2)
+    cache.set("a", {1: SIGNATURE})
+    cache.set("b", {1: SIGNATURE})
+    assert cache.get("a") is not None
+    cache.set("c", {1: SIGNATURE})
+
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+async def _synced_pairing():
+    pairing = _pairing(mock.Mock(signature_cache=SignatureCache()), "00:00:00:00:00:01")
+    with mock.patch.object(
+        BlePairing,
+        "_async_read_signature",
+        return_value={"perms": ["pr", "pw", "ev"], "format": "bool"},
+    ):
+        accessories = await pairing._async_fetch_gatt_database()
+    pairing._accessories_state = AccessoriesState(accessories, 1)
+    return pairing
+
+
+async def _writable_pairing():
+    pairing = await _synced_pairing()
+    pairing._populate_accessories_and_characteristics = mock.AsyncMock()
+    return pairing
+
+
+async def test_writes_do_not_wait_for_catch_up_poll():
+    pairing = await _writable_pairing()
+
+    requests = []
+    in_flight = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def _request(opcode, char, data=None):
+        requests.append(opcode)
+        if opcode == OpCode.CHAR_READ:
+            in_flight.set()
+            await finish.wait()
+            finish.clear()
+        return TLV.encode_list([(1, b"\x01")])
+
+    pairing._async_request_under_lock = _request
+
+    poll = asyncio.ensure_future(
+        operation_priority(OperationPriority.CATCH_UP_POLL)(
+            pairing.get_characteristics
+        )([(1, 10)] * 3)
+    )
+    await in_flight.wait()
+
+    write = asyncio.ensure_future(pairing.put_characteristics([(1, 10, True)]))
+    await asyncio.sleep(0)
+    finish.set()
+    await write
+
+    # The write only waited for the read that was already in flight
+    assert requests[:2] == [OpCode.CHAR_READ, OpCode.CHAR_WRITE]
+
+    while not poll.done():
+        finish.set()
+        await asyncio.sleep(0)
+    assert poll.result() == {(1, 10): {"value": True}}
+    assert requests.count(OpCode.CHAR_READ) == 3
+
+
+async def test_config_sync_pauses_for_writes():
+    pairing = await _synced_pairing()
+    pairing._encryption_key = mock.Mock()
+    service = pairing.accessories.aid(1).services.first(
+        service_type=ServicesTypes.LIGHTBULB
+    )
+    for iid in (11, 12):
+        char = service.add_char(CharacteristicsTypes.ON)
+        char.iid = iid
+        char.perms = ["pr", "pw", "ev"]
+        char.format = "bool"
+
+    requests = []
+    in_flight = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def _request(opcode, char, data=None):
+        requests.append(opcode)
+        if opcode == OpCode.CHAR_READ:
+            in_flight.set()
+            await finish.wait()
+            finish.clear()
+        return TLV.encode_list([(1, b"\x01")])
+
+    pairing._async_request_under_lock = _request
+
+    sync = asyncio.ensure_future(
+        pairing.async_populate_accessories_state(force_update=True)
+    )
+    await in_flight.wait()
+
+    write = asyncio.ensure_future(pairing.put_characteristics([(1, 10, True)]))
+    await asyncio.sleep(0)
+    finish.set()
+    await asyncio.wait_for(write, 1)
+
+    # The write only waited for the read that was already in flight
+    assert requests[:2] == [OpCode.CHAR_READ, OpCode.CHAR_WRITE]
+
+    while not sync.done():
+        finish.set()
+        await asyncio.sleep(0)
+    await sync
+    assert requests.count(OpCode.CHAR_READ) == 3
+    assert not pairing._config_lock.locked()
+
+
+async def test_listeners_do_not_get_catch_up_priority():
+    pairing = await _writable_pairing()
+    pairing.subscriptions.add((1, 10))
+
+    async def _request(opcode, char, data=None):
+        return TLV.encode_list([(1, b"\x01")])
+
+    pairing._async_request_under_lock = _request
+    priorities = []
+    pairing.listeners.add(lambda results: priorities.append(_requested.get()))
+
+    await pairing._async_process_disconnected_events()
+
+    assert priorities == [None]
+
+
+async def test_put_characteristics_coalesced():
+    pairing = await _writable_pairing()
+    pairing.write_coalesce_window = 0.01
+
+    requests = []
+    in_flight = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def _request(opcode, char, data=None):
+        requests.append((opcode, data, get_priority()))
+        if opcode == OpCode.CHAR_READ:
+            in_flight.set()
+            await finish.wait()
+        return TLV.encode_list([(1, b"\x01")])
+
+    pairing._async_request_under_lock = _request
+
+    poll = asyncio.ensure_future(
+        operation_priority(OperationPriority.CATCH_UP_POLL)(
+            pairing.get_characteristics
+        )([(1, 10)] * 2)
+    )
+    await in_flight.wait()
+
+    writes = asyncio.gather(
+        pairing.put_characteristics([(1, 10, False)]),
+        pairing.put_characteristics([(1, 10, True)]),
+    )
+    # Let the coalesce window pass and the write queue up behind the read
+    await asyncio.sleep(0.05)
+    finish.set()
+
+    assert await writes == [{}, {}]
+    await poll
+
+    # The last value is written once, with user priority and ahead of the
+    # rest of the poll
+    assert [opcode for opcode, _, _ in requests] == [
+        OpCode.CHAR_READ,
+        OpCode.CHAR_WRITE,
+        OpCode.CHAR_READ,
+    ]
+    _, payload, priority = requests[1]
+    assert dict(TLV.decode_bytes(payload))[1] == b"\x01"
+    assert priority == Priority.USER
+
+
+async def test_notifications_are_read_in_one_pass():
+    controller = mock.Mock(signature_cache=SignatureCache())
+    pairing = _pairing(controller, "00:00:00:00:00:01")
+    pairing.client.is_connected = True
+    listener = mock.Mock()
+    pairing.listeners.add(listener)
+
+    reads = []
+    in_flight = asyncio.Event()
+    finish = asyncio.Event()
+
+    async def _read(characteristics, skip_failed=False):
+        reads.append(characteristics)
+        in_flight.set()
+        await finish.wait()
+        finish.clear()
+        return {key: {"value": True} for key in characteristics}
+
+    pairing._get_characteristics_without_retry = _read
+
+    with mock.patch("aiohomekit.controller.ble.pairing.EVENT_COALESCE_WINDOW", 0):
+        for iid in (12, 10, 12):
+            pairing._async_queue_event(iid)
+        await in_flight.wait()
+
+        # Notifications during a read are merged into the next pass
+        pairing._async_queue_event(14)
+        pairing._async_queue_event(16)
+        finish.set()
+        while pairing._events_task:
+            finish.set()
+            await asyncio.sleep(0)
+
+    assert reads == [[(1, 10), (1, 12)], [(1, 14), (1, 16)]]
+    assert listener.call_args_list == [
+        mock.call({(1, 10): {"value": True}, (1, 12): {"value": True}}),
+        mock.call({(1, 14): {"value": True}, (1, 16): {"value": True}}),
+    ]
+
+
+async def test_notification_read_failure_keeps_other_events():
+    pairing = await _writable_pairing()
+    pairing.client.is_connected = True
+    service = pairing.accessories.aid(1).services.first(
+        service_type=ServicesTypes.LIGHTBULB
+    )
+    char = service.add_char(CharacteristicsTypes.ON)
+    char.iid = 11
+    char.perms = ["pr", "ev"]
+    char.format = "bool"
+    listener = mock.Mock()
+    pairing.listeners.add(listener)
+
+    async def _request(opcode, char, data=None):
+        if char.iid == 11:
+            raise ValueError("PDU status was not success")
+        return TLV.encode_list([(1, b"\x01")])
+
+    pairing._async_request_under_lock = _request
+
+    with mock.patch("aiohomekit.controller.ble.pairing.EVENT_COALESCE_WINDOW", 0):
+        pairing._async_queue_event(10)
+        pairing._async_queue_event(11)
+        while not pairing._events_task:
+            await asyncio.sleep(0)
+        await pairing._events_task
+
+    listener.assert_called_once_with({(1, 10): {"value": True}})
+
+
+async def test_pending_notifications_are_dropped_on_disconnect():
+    controller = mock.Mock(signature_cache=SignatureCache())
+    pairing = _pairing(controller, "00:00:00:00:00:01")
+    pairing._get_characteristics_without_retry = mock.AsyncMock()
+
+    pairing._async_queue_event(10)
+    pairing._async_reset_connection_state()
+    await asyncio.sleep(0)
+
+    assert pairing._events_timer is None
+    assert not pairing._pending_events
+    pairing._get_characteristics_without_retry.assert_not_called()
@@ -0,0 +1,131 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from aiohomekit.controller.ble.slots import (
+    ConnectionSlots,
+    Priority,
+    get_priority,
+    user_priority,
+)
+
+
+async def _hold(slots, key, started, release, priority=None):
+    await slots.acquire(key, mock.Mock(), priority)
+    started.append(key)
+    await release.wait()
+    slots.release(key)
+
+
+async def test_slots_limit_connections():
+    slots = ConnectionSlots(max_slots=2)
+    started = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.ensure_future(_hold(slots, key, started, release)) for key in range(4)
+    ]
+    await asyncio.sleep(0)
+
+    assert started == [0, 1]
+    assert slots.active == 2
+    assert slots.queue_depth == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert started == [0, 1, 2, 3]
+    assert slots.active == 0
+    assert slots.queue_depth == 0
+
+
+async def test_user_requests_go_first():
+    slots = ConnectionSlots(max_slots=1)
+    started = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.ensure_future(_hold(slots, "a", started, release)),
+        asyncio.ensure_future(_hold(slots, "poll", started, release)),
+    ]
+    await asyncio.sleep(0)
+
+    @user_priority
+    async def _write():
+        await _hold(slots, "write", started, release)
+
+    tasks.append(asyncio.ensure_future(_write()))
+    await asyncio.sleep(0)
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert started == ["a", "write", "poll"]
+
+
+async def test_connected_pairing_does_not_wait():
+    slots = ConnectionSlots(max_slots=1)
+    await slots.acquire("a", mock.Mock())
+
+    # Already holds the slot, so this doesn't queue behind anyone
+    await asyncio.wait_for(slots.acquire("a", mock.Mock()), 1)
+    assert slots.active == 1
+    assert slots.queue_depth == 0
+
+
+async def test_idle_holder_is_asked_to_yield():
+    slots = ConnectionSlots(max_slots=2)
+    yield_a, yield_b = mock.Mock(), mock.Mock()
+    await slots.acquire("a", yield_a)
+    await slots.acquire("b", yield_b)
+    # "a" used its connection more recently than "b"
+    slots.touch("a")
+
+    waiter = asyncio.ensure_future(slots.acquire("c", mock.Mock(), Priority.USER))
+    await asyncio.sleep(0)
+
+    yield_b.assert_called_once()
+    assert not yield_a.called
+
+    slots.release("b")
+    await waiter
+    assert slots.holds("c")
+    assert not slots.holds("b")
+
+
+async def test_cancelled_waiter_is_skipped():
+    slots = ConnectionSlots(max_slots=1)
+    await slots.acquire("a", mock.Mock())
+
+    cancelled = asyncio.ensure_future(slots.acquire("b", mock.Mock()))
+    waiting = asyncio.ensure_future(slots.acquire("c", mock.Mock()))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    slots.release("a")
+    await waiting
+
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    assert slots.holds("c")
+    assert slots.queue_depth == 0
+
+
+async def test_holder_does_not_get_priority_of_waiter():
+    slots = ConnectionSlots(max_slots=1)
+    priorities = []
+    await slots.acquire("a", lambda: priorities.append(get_priority()))
+
+    @user_priority
+    async def _write():
+        await slots.acquire("write", mock.Mock())
+
+    task = asyncio.ensure_future(_write())
+    await asyncio.sleep(0)
+
+    assert priorities == [Priority.BACKGROUND]
+
+    slots.release("a")
+    await task
@@ -240,3 +240,14 @@ def test_coap_pdu09_decode_1():
     saturation_char = lightbulb_service.characteristics[10]
 
     assert saturation_char.data_unit_str == "percentage"
+
+
+def test_coap_pdu09_database_find_characteristic():
+    info = Pdu09Database.decode(database_nanoleaf_bulb)
+    lightbulb_service = info.accessories[0].services[3]
+    on_char = lightbulb_service.find_characteristic_by_iid(51)
+
+    assert info.find_characteristic_by_aid_iid(1, 51) is on_char
+    assert info.find_characteristic_by_iid(51) is on_char
+    assert info.find_characteristic_by_aid_iid(2, 51) is None
+    assert info.find_characteristic_by_iid(999) is None
@@ -50,6 +50,8 @@ async def test_passing_in_async_zeroconf():
         controller_module, "BLE_TRANSPORT_SUPPORTED", False
     ), patch.object(controller_module, "COAP_TRANSPORT_SUPPORTED", False), patch.object(
         controller_module, "IP_TRANSPORT_SUPPORTED", False
+    ), patch(
+        "aiohomekit.zeroconf.AsyncServiceBrowser"
     ):
         controller = Controller(async_zeroconf_instance=AsyncMock())
         await controller.async_start()
@@ -1,8 +1,20 @@
+import asyncio
+from unittest import mock
+
+from aiocoap import Code
 import pytest
 
-from aiohomekit.controller.coap.connection import CoAPHomeKitConnection
+from aiohomekit.characteristic_cache import CharacteristicCacheMemory
+from aiohomekit.controller.coap.connection import (
+    CoAPHomeKitConnection,
+    EncryptionContext,
+    SharedCoAPContext,
+)
+from aiohomekit.controller.coap.pairing import CoAPPairing
 from aiohomekit.controller.coap.pdu import PDUStatus
 from aiohomekit.controller.coap.structs import Pdu09Database
+from aiohomekit.exceptions import AccessoryDisconnectedError
+from aiohomekit.model import Accessories
 
 database_nanoleaf_bulb = bytes.fromhex(
     """
@@ -166,3 +178,226 @@ def test_unsubscribe_from_single_failure(coap_controller):
 
     assert len(results) == 1
     assert isinstance(results[(1, 51)], dict)
+
+
+async def test_post_bytes_timeout():
+    response = asyncio.get_running_loop().create_future()
+    coap_ctx = mock.Mock()
+    coap_ctx.request.return_value.response = response
+    send_ctx = mock.Mock()
+    send_ctx.encrypt.return_value = b"encrypted"
+
+    ctx = EncryptionContext(mock.Mock(), send_ctx, mock.Mock(), "coap://any/", coap_ctx)
+
+    with pytest.raises(AccessoryDisconnectedError):
+        await ctx.post_bytes(b"payload", timeout=0.01)
+
+    assert response.cancelled()
+
+
+async def test_populate_accessories_state_from_cache():
+    controller = mock.Mock(discoveries={}, _char_cache=CharacteristicCacheMemory())
+    pairing = CoAPPairing(
+        controller,
+        {
+            "AccessoryPairingID": "00:00:00:00:00:01",
+            "AccessoryIP": "::1",
+            "AccessoryPort": 5683,
+        },
+    )
+    info = Pdu09Database.decode(database_nanoleaf_bulb)
+    controller._char_cache.async_create_or_update_map(
+        pairing.id,
+        2,
+        Accessories.from_list(info.to_dict()).serialize(),
+    )
+    controller._char_cache.async_update_map_metadata(
+        pairing.id, gatt_database=database_nanoleaf_bulb.hex()
+    )
+    pairing.description = mock.Mock(config_num=2)
+
+    with mock.patch.object(pairing, "list_accessories_and_characteristics") as fetch:
+        await pairing.async_populate_accessories_state()
+
+    assert not fetch.called
+    assert pairing.config_num == 2
+    assert pairing.accessories.aid(1)
+    assert pairing.connection.raw_info == database_nanoleaf_bulb
+    assert pairing.connection.info.find_characteristic_by_iid(51) is not None
+
+
+async def test_config_change_while_disconnected():
+    controller = mock.Mock(discoveries={}, _char_cache=CharacteristicCacheMemory())
+    pairing = CoAPPairing(
+        controller,
+        {
+            "AccessoryPairingID": "00:00:00:00:00:01",
+            "AccessoryIP": "::1",
+            "AccessoryPort": 5683,
+        },
+    )
+    connection = pairing.connection
+    info = Pdu09Database.decode(database_nanoleaf_bulb)
+    connection.info = info
+    connection.raw_info = database_nanoleaf_bulb
+    pairing.restore_accessories_state(info.to_dict(), 2)
+
+    pairing._async_description_update(
+        mock.Mock(addresses=["::1"], address="::1", port=5683, config_num=3)
+    )
+
+    # The stale database must not be used for the next session
+    assert connection.info is None
+
+    async def _connect(pairing_data):
+        if connection.info is None:
+            connection.info = info
+            connection.raw_info = database_nanoleaf_bulb
+        connection.enc_ctx = mock.Mock()
+
+    connection.connect = _connect
+    with mock.patch.object(pairing, "notify_config_changed") as notify_config_changed:
+        await pairing._ensure_connected()
+
+    notify_config_changed.assert_called_once_with(3)
+
+
+async def test_cache_with_original_interface():
+    # Caches written before the optional metadata existed only take 3 arguments
+    cache = mock.Mock(spec=["get_map", "async_create_or_update_map"])
+    cache.async_create_or_update_map.side_effect = (
+        lambda homekit_id, config_num, accessories: None
+    )
+    controller = mock.Mock(discoveries={}, _char_cache=cache)
+    pairing = CoAPPairing(
+        controller,
+        {
+            "AccessoryPairingID": "00:00:00:00:00:01",
+            "AccessoryIP": "::1",
+            "AccessoryPort": 5683,
+        },
+    )
+    info = Pdu09Database.decode(database_nanoleaf_bulb)
+    pairing.connection.info = info
+    pairing.connection.raw_info = database_nanoleaf_bulb
+
+    pairing.restore_accessories_state(info.to_dict(), 2)
+
+    cache.async_create_or_update_map.assert_called_once()
+
+
+async def test_address_change_reconnects_in_background():
+    controller = mock.Mock(
+        discoveries={}, _char_cache=CharacteristicCacheMemory(), coap_context=None
+    )
+    pairing = CoAPPairing(
+        controller,
+        {
+            "AccessoryPairingID": "00:00:00:00:00:01",
+            "AccessoryIP": "fd00::1",
+            "AccessoryPort": 5683,
+        },
+    )
+    connection = pairing.connection
+    connection.info = Pdu09Database.decode(database_nanoleaf_bulb)
+    old_ctx = connection.enc_ctx = mock.Mock(coap_ctx=mock.AsyncMock())
+    new_ctx = mock.Mock()
+
+    async def _pair_verify(pairing_data):
+        assert connection.address == "[fd00::2]:5683"
+        connection.enc_ctx = new_ctx
+
+    with mock.patch.object(
+        connection, "do_pair_verify", side_effect=_pair_verify
+    ) as pair_verify, mock.patch.object(connection, "get_accessory_info") as get_info:
+        # The accessory is still reachable on the address we already use
+        pairing._async_description_update(
+            mock.Mock(address="fd00::3", addresses=["fd00::3", "fd00::1"], port=5683)
+        )
+        await asyncio.sleep(0)
+        assert connection.enc_ctx is old_ctx
+
+        pairing._async_description_update(
+            mock.Mock(address="fd00::2", addresses=["fd00::2"], port=5683)
+        )
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    old_ctx.coap_ctx.shutdown.assert_awaited_once()
+    pair_verify.assert_called_once()
+    # The accessory database is reused
+    assert not get_info.called
+    assert connection.enc_ctx is new_ctx
+    assert pairing.pairing_data["AccessoryIP"] == "fd00::2"
+
+
+async def test_shared_context_routes_events():
+    context = SharedCoAPContext()
+    left = CoAPHomeKitConnection(None, "fd00::1", 5683, context)
+    right = CoAPHomeKitConnection(None, "192.168.1.2", 5683, context)
+
+    with mock.patch(
+        "aiohomekit.controller.coap.connection.Context.create_server_context"
+    ) as create:
+        create.return_value = coap_ctx = mock.AsyncMock()
+        assert await left._client_context() is coap_ctx
+        assert await right._client_context() is coap_ctx
+    assert create.call_count == 1
+
+    root = create.call_args[0][0]
+    router = root._resources[()]
+
+    for connection in (left, right):
+        connection.enc_ctx = mock.Mock(coap_ctx=coap_ctx)
+        connection.event_resource = mock.AsyncMock()
+        context.register(connection)
+
+    # IPv4 accessories show up as mapped addresses on the IPv6 socket
+    request = mock.Mock(remote=mock.Mock(sockaddr=("::ffff:192.168.1.2", 5683, 0, 0)))
+    await router.render_put(request)
+    right.event_resource.render_put.assert_awaited_once_with(request)
+    assert not left.event_resource.render_put.called
+
+    context.unregister(left)
+    request = mock.Mock(remote=mock.Mock(sockaddr=("fd00::1", 5683, 0, 0)))
+    assert (await router.render_put(request)).code == Code.NOT_FOUND
+
+    # Dropping a session leaves the shared context to the other connections
+    await left._release_context(coap_ctx)
+    assert not coap_ctx.shutdown.called
+
+    await context.shutdown()
+    coap_ctx.shutdown.assert_awaited_once()
+
+
+async def test_put_characteristics_coalesced():
+    controller = mock.Mock(
+        discoveries={}, _char_cache=CharacteristicCacheMemory(), coap_context=None
+    )
+    pairing = CoAPPairing(
+        controller,
+        {
+            "AccessoryPairingID": "00:00:00:00:00:01",
+            "AccessoryIP": "::1",
+            "AccessoryPort": 5683,
+        },
+    )
+    pairing.write_coalesce_window = 0.01
+    failed = {"status": -PDUStatus.INVALID_REQUEST.value, "description": "failed"}
+
+    with mock.patch.object(pairing, "_ensure_connected"), mock.patch.object(
+        pairing.connection,
+        "write_characteristics",
+        return_value={(1, 52): failed},
+    ) as write:
+        first, second, third = await asyncio.gather(
+            pairing.put_characteristics([(1, 51, True)]),
+            pairing.put_characteristics([(1, 52, 50)]),
+            pairing.put_characteristics([(1, 51, False)]),
+        )
+
+    # One write with the last value written to each characteristic
+    write.assert_called_once_with([(1, 51, False), (1, 52, 50)])
+    assert first == third == {}
+    assert second == {(1, 52): failed}
+    assert second[(1, 52)] is not failed
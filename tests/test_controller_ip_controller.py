@@ -200,3 +200,42 @@ async def test_discover_device_id_case_upper(mock_asynczeroconf):
         results = [d async for d in controller.async_discover()]
 
     assert results[0].description.id == "aa:aa:aa:aa:aa:aa"
+
+
+async def test_browser_tracks_services(mock_asynczeroconf):
+    controller = IpController(
+        char_cache=CharacteristicCacheMemory(), zeroconf_instance=mock_asynczeroconf
+    )
+
+    with _install_mock_service_info(mock_asynczeroconf) as svc_info, patch.object(
+        AsyncServiceInfo, "load_from_cache", return_value=True
+    ):
+        await controller.async_start()
+
+    result = await controller.async_find("00:00:01:00:00:02")
+    assert result.description.config_num == 1
+
+    # The cache isn't scanned again while the browser is running
+    mock_asynczeroconf.zeroconf.cache.get_all_by_details.reset_mock()
+    assert [d async for d in controller.async_discover()] == [result]
+    with pytest.raises(AccessoryNotFoundError):
+        await controller.async_find("00:00:00:00:00:00")
+    mock_asynczeroconf.zeroconf.cache.get_all_by_details.assert_not_called()
+
+    pairing = MagicMock()
+    controller.pairings["00:00:01:00:00:02"] = pairing
+    svc_info.properties[b"c#"] = b"2"
+    with patch("aiohomekit.zeroconf.AsyncServiceInfo", side_effect=[svc_info]):
+        with patch.object(AsyncServiceInfo, "load_from_cache", return_value=True):
+            controller._async_service_updated(
+                mock_asynczeroconf.zeroconf, "_hap._tcp.local.", svc_info.name
+            )
+
+    assert result.description.config_num == 2
+    pairing._async_description_update.assert_called_once_with(result.description)
+
+    controller._async_service_removed(svc_info.name)
+    with pytest.raises(AccessoryNotFoundError):
+        await controller.async_find("00:00:01:00:00:02")
+
+    await controller.async_stop()
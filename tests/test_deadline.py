@@ -0,0 +1,95 @@
+import asyncio
+import time
+
+import pytest
+
+from aiohomekit.deadline import (
+    deadline_scope,
+    get_deadline,
+    remaining,
+    wait_for,
+    wait_future,
+    with_deadline,
+)
+from aiohomekit.exceptions import DeadlineExceededError
+from aiohomekit.utils import async_create_task
+
+
+def test_deadline_scope_only_shortens():
+    now = time.monotonic()
+
+    with deadline_scope(now + 10):
+        assert get_deadline() == now + 10
+
+        with deadline_scope(now + 20):
+            assert get_deadline() == now + 10
+
+        with deadline_scope(now + 5):
+            assert get_deadline() == now + 5
+
+        assert get_deadline() == now + 10
+
+    assert get_deadline() is None
+
+
+def test_remaining():
+    assert remaining() is None
+    assert remaining(30) == 30
+
+    with deadline_scope(time.monotonic() + 10):
+        assert remaining(5) == 5
+        assert 9 < remaining(30) <= 10
+
+    with deadline_scope(time.monotonic() - 1):
+        with pytest.raises(DeadlineExceededError):
+            remaining(30)
+
+
+async def test_wait_for_deadline():
+    with deadline_scope(time.monotonic() + 0.01):
+        with pytest.raises(DeadlineExceededError):
+            await wait_for(asyncio.sleep(1), 30)
+
+
+async def test_wait_for_own_timeout():
+    with deadline_scope(time.monotonic() + 30):
+        with pytest.raises(asyncio.TimeoutError):
+            await wait_for(asyncio.sleep(1), 0.01)
+
+
+async def test_with_deadline_fails_fast():
+    calls = []
+
+    @with_deadline
+    async def operation(value):
+        calls.append(get_deadline())
+        return value
+
+    assert await operation(1) == 1
+    deadline = time.monotonic() + 10
+    assert await operation(2, deadline=deadline) == 2
+    assert calls == [None, deadline]
+
+    with pytest.raises(DeadlineExceededError):
+        await operation(3, deadline=time.monotonic() - 1)
+    assert len(calls) == 2
+
+
+async def test_tasks_do_not_inherit_deadline():
+    async def _get_deadline():
+        return get_deadline()
+
+    with deadline_scope(time.monotonic() + 10):
+        assert await async_create_task(_get_deadline()) is None
+
+
+async def test_wait_future():
+    future = asyncio.get_running_loop().create_future()
+    future.set_result(1)
+    assert await wait_future(future) == 1
+
+    future = asyncio.get_running_loop().create_future()
+    with deadline_scope(time.monotonic() + 0.01):
+        with pytest.raises(DeadlineExceededError):
+            await wait_future(future)
+    assert future.done()
@@ -331,3 +331,82 @@ def test_newline_in_payload():
         res.body
         == b'{"characteristics":[{"aid":1,"iid":10,"value":35},\r\n{"aid":1,"iid":13,"value":36.0999984741211}]}'
     )
+
+
+def _chunked(body: bytes, chunk_size: int) -> bytes:
+    out = bytearray(
+        b"HTTP/1.1 200 OK\r\n"
+        b"Content-Type: application/hap+json\r\n"
+        b"Transfer-Encoding: chunked\r\n"
+        b"\r\n"
+    )
+    for i in range(0, len(body), chunk_size):
+        chunk = body[i : i + chunk_size]
+        out += b"%x\r\n" % len(chunk) + chunk + b"\r\n"
+    out += b"0\r\n\r\n"
+    return bytes(out)
+
+
+def test_chunked_fixture_small_pieces():
+    body = json.dumps({"accessories": [{"aid": i} for i in range(200)]}).encode()
+    raw = _chunked(body, 1000)
+    parts = [raw[i : i + 7] for i in range(0, len(raw), 7)]
+
+    res = parse(parts)
+    assert res.code == 200
+    assert res.body == body
+
+
+def test_chunk_extension_and_trailer():
+    res = parse(
+        [
+            b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n",
+            b"5;name=value\r\nhello\r\n",
+            b"0\r\nX-Trailer: 1\r\n\r\n",
+        ]
+    )
+    assert res.body == b"hello"
+
+
+def test_leftover_returned_for_next_response():
+    first = b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n{}"
+    second = b"EVENT/1.0 200 OK\r\nContent-Length: 2\r\n\r\n[]"
+
+    response = HttpResponse()
+    leftover = response.parse(first + second[:10])
+    assert response.is_read_completely()
+    assert response.body == b"{}"
+    assert leftover == second[:10]
+
+    response = HttpResponse()
+    assert response.parse(leftover) == b""
+    assert response.parse(second[10:]) == b""
+    assert response.is_read_completely()
+    assert response.get_http_name() == "EVENT"
+    assert response.body == b"[]"
+
+
+def test_body_consumer():
+    chunked = (
+        b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n"
+        b"5\r\nhello\r\n6\r\n world\r\n0\r\n\r\n"
+    )
+    content_length = b"HTTP/1.1 200 OK\r\nContent-Length: 11\r\n\r\nhello world"
+
+    for data in (chunked, content_length):
+        received = []
+        heads = []
+
+        def _on_headers(response):
+            heads.append(response.code)
+            response.set_body_consumer(received.append)
+
+        response = HttpResponse(_on_headers)
+        for i in range(0, len(data), 4):
+            response.parse(data[i : i + 4])
+
+        assert response.is_read_completely()
+        assert heads == [200]
+        assert b"".join(received) == b"hello world"
+        assert len(received) > 1
+        assert response.body == b""
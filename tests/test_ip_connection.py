@@ -0,0 +1,298 @@
+import asyncio
+import socket
+import time
+from unittest import mock
+
+import pytest
+
+from aiohomekit.controller.ip import connection as connection_module
+from aiohomekit.controller.ip.connection import (
+    HomeKitConnection,
+    SecureHomeKitProtocol,
+    _order_addresses,
+    _race_sockets,
+)
+from aiohomekit.crypto.chacha20poly1305 import (
+    ChaCha20Poly1305Decryptor,
+    ChaCha20Poly1305Encryptor,
+)
+from aiohomekit.deadline import deadline_scope
+from aiohomekit.exceptions import AccessoryDisconnectedError, DeadlineExceededError
+
+A2C_KEY = bytes(range(32))
+C2A_KEY = bytes(range(32, 64))
+
+EVENT_BODY = b'{"characteristics":[{"aid":1,"iid":10,"value":35}]}'
+EVENT = (
+    b"EVENT/1.0 200 OK\r\n"
+    b"Content-Type: application/hap+json\r\n"
+    b"Content-Length: %d\r\n"
+    b"\r\n" % len(EVENT_BODY)
+) + EVENT_BODY
+
+
+def _accessory_frames(payload: bytes, counter: int = 0) -> bytes:
+    """Encrypt payload the way an accessory would send it to us."""
+    encryptor = ChaCha20Poly1305Encryptor(A2C_KEY)
+    out = bytearray()
+    for i in range(0, len(payload), 1024):
+        block = payload[i : i + 1024]
+        length = len(block).to_bytes(2, "little")
+        out += length
+        out += encryptor.encrypt(length, counter.to_bytes(8, "little"), bytes(4), block)
+        counter += 1
+    return bytes(out)
+
+
+def _make_protocol():
+    connection = mock.Mock(host="127.0.0.1", port=1234)
+    return connection, SecureHomeKitProtocol(connection, A2C_KEY, C2A_KEY)
+
+
+def test_data_received_many_frames_in_small_pieces():
+    connection, protocol = _make_protocol()
+
+    body = b'{"characteristics":[' + b",".join(
+        b'{"aid":1,"iid":%d,"value":0}' % iid for iid in range(200)
+    )
+    body += b"]}"
+    event = (b"EVENT/1.0 200 OK\r\nContent-Length: %d\r\n\r\n" % len(body)) + body
+    data = _accessory_frames(event * 3)
+
+    for i in range(0, len(data), 100):
+        protocol.data_received(data[i : i + 100])
+
+    assert connection.event_received.call_count == 3
+    assert connection.event_received.call_args[0][0].body == body
+    assert protocol.a2c_counter == len(data) // (1024 + 18) + 1
+    assert protocol._incoming_buffer == b""
+
+
+def test_data_received_multiple_events_in_one_call():
+    connection, protocol = _make_protocol()
+
+    protocol.data_received(_accessory_frames(EVENT * 5))
+
+    assert connection.event_received.call_count == 5
+    assert protocol._incoming_buffer == b""
+
+
+def test_data_received_bad_tag():
+    connection, protocol = _make_protocol()
+
+    data = bytearray(_accessory_frames(EVENT) + _accessory_frames(EVENT, 1))
+    data[-1] ^= 0xFF
+
+    with pytest.raises(RuntimeError):
+        protocol.data_received(data)
+
+    # The first event was intact and should still have been dispatched
+    assert connection.event_received.call_count == 1
+
+
+async def test_send_bytes_single_write():
+    connection, protocol = _make_protocol()
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+    protocol.connection_made(transport)
+
+    payload = bytes(range(256)) * 10
+    task = asyncio.ensure_future(protocol.send_bytes(payload))
+    await asyncio.sleep(0)
+
+    assert transport.write.call_count == 1
+    data = transport.write.call_args[0][0]
+    assert len(data) == len(payload) + 3 * 18
+
+    decryptor = ChaCha20Poly1305Decryptor(C2A_KEY)
+    plaintext = bytearray()
+    offset = 0
+    counter = 0
+    while offset < len(data):
+        length = int.from_bytes(data[offset : offset + 2], "little")
+        plaintext += decryptor.decrypt(
+            bytes(data[offset : offset + 2]),
+            counter.to_bytes(8, "little"),
+            bytes(4),
+            bytes(data[offset + 2 : offset + 2 + length + 16]),
+        )
+        offset += 2 + length + 16
+        counter += 1
+
+    assert plaintext == payload
+    assert protocol.c2a_counter == 3
+
+    protocol.result_cbs.pop(0).set_result(None)
+    await task
+
+
+async def test_send_bytes_response_timeout():
+    connection, protocol = _make_protocol()
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+    protocol.connection_made(transport)
+
+    with mock.patch("aiohomekit.controller.ip.connection.RESPONSE_TIMEOUT", 0.01):
+        with pytest.raises(AccessoryDisconnectedError):
+            await protocol.send_bytes(b"GET / HTTP/1.1\r\n\r\n")
+
+    assert transport.close.called
+
+
+async def test_send_bytes_deadline_keeps_connection():
+    connection, protocol = _make_protocol()
+    transport = mock.Mock()
+    transport.is_closing.return_value = False
+    protocol.connection_made(transport)
+
+    with deadline_scope(time.monotonic() + 0.01):
+        with pytest.raises(DeadlineExceededError):
+            await protocol.send_bytes(b"GET / HTTP/1.1\r\n\r\n")
+
+    assert not transport.close.called
+
+    # The late response goes to the abandoned request, not the next one
+    task = asyncio.ensure_future(protocol.send_bytes(b"GET / HTTP/1.1\r\n\r\n"))
+    await asyncio.sleep(0)
+    assert len(protocol.result_cbs) == 2
+    protocol.result_cbs.pop(0)
+    protocol.result_cbs.pop(0).set_result(None)
+    assert await task is None
+
+    protocol.close()
+
+
+def test_order_addresses_alternates_families():
+    addresses = ["fe80::1", "fe80::2", "192.168.1.2", "192.168.1.3"]
+
+    assert _order_addresses(addresses, socket.AF_UNSPEC) == [
+        "fe80::1",
+        "192.168.1.2",
+        "fe80::2",
+        "192.168.1.3",
+    ]
+    assert _order_addresses(addresses + ["192.168.1.2"], socket.AF_INET) == [
+        "192.168.1.2",
+        "fe80::1",
+        "192.168.1.3",
+        "fe80::2",
+    ]
+
+
+async def test_race_sockets_staggers_attempts():
+    started = []
+    hung = asyncio.Event()
+    good, peer = socket.socketpair()
+
+    async def _connect(host, port):
+        started.append((host, time.monotonic()))
+        if host == "unreachable":
+            try:
+                await asyncio.sleep(60)
+            finally:
+                hung.set()
+        return good
+
+    with mock.patch.object(connection_module, "_connect_socket", _connect):
+        host, sock = await _race_sockets(["unreachable", "reachable"], 1234)
+
+    assert (host, sock) == ("reachable", good)
+    assert [host for host, _ in started] == ["unreachable", "reachable"]
+    assert started[1][1] - started[0][1] >= connection_module.HAPPY_EYEBALLS_DELAY
+    # The losing attempt was abandoned
+    await asyncio.sleep(0)
+    assert hung.is_set()
+
+    good.close()
+    peer.close()
+
+
+async def test_race_sockets_moves_on_after_failure():
+    async def _connect(host, port):
+        if host == "refused":
+            raise ConnectionRefusedError()
+        await asyncio.sleep(0)
+        return host
+
+    with mock.patch.object(
+        connection_module, "HAPPY_EYEBALLS_DELAY", 60
+    ), mock.patch.object(connection_module, "_connect_socket", _connect):
+        assert await asyncio.wait_for(
+            _race_sockets(["refused", "ok"], 1234), timeout=1
+        ) == ("ok", "ok")
+
+        with pytest.raises(ConnectionRefusedError):
+            await _race_sockets(["refused"], 1234)
+
+
+async def test_connect_remembers_working_address():
+    server = await asyncio.start_server(lambda r, w: w.close(), "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    # Nothing listens on the first address, so the other one is used
+    connection = HomeKitConnection(
+        None, "127.0.0.2", port, addresses=["127.0.0.2", "127.0.0.1"]
+    )
+    await connection._connect_once()
+
+    assert connection.host == "127.0.0.1"
+    assert connection._preferred_family == socket.AF_INET
+
+    await connection.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_lowered_concurrency_limit_counts_running_requests():
+    connection = HomeKitConnection(None, "127.0.0.1", 1234, concurrency_limit=3)
+    in_flight = []
+    release = asyncio.Event()
+
+    async def _send_bytes(payload, body_consumer=None):
+        in_flight.append(payload)
+        await release.wait()
+        await asyncio.sleep(0)
+        # Only one of the requests that waited for the lower limit runs at once
+        if payload.startswith(b"GET /b"):
+            assert len(in_flight) == 1
+        in_flight.remove(payload)
+        return mock.Mock(code=200, body=b"")
+
+    connection.protocol = mock.Mock(send_bytes=_send_bytes)
+
+    running = [asyncio.ensure_future(connection.get("/a")) for _ in range(3)]
+    await asyncio.sleep(0)
+    assert len(in_flight) == 3
+
+    connection.set_concurrency_limit(1)
+    later = [asyncio.ensure_future(connection.get("/b")) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert len(in_flight) == 3
+
+    release.set()
+    await asyncio.gather(*running, *later)
+    assert not in_flight
+
+
+async def test_deadline_while_waiting_for_concurrency_limit():
+    connection = HomeKitConnection(None, "127.0.0.1", 1234, concurrency_limit=1)
+    release = asyncio.Event()
+
+    async def _send_bytes(payload, body_consumer=None):
+        await release.wait()
+        return mock.Mock(code=200, body=b"")
+
+    connection.protocol = mock.Mock(send_bytes=_send_bytes)
+
+    running = asyncio.ensure_future(connection.get("/a"))
+    await asyncio.sleep(0)
+
+    with deadline_scope(time.monotonic() + 0.01):
+        with pytest.raises(DeadlineExceededError):
+            await connection.get("/b")
+
+    # The request that gave up doesn't hold on to a slot
+    release.set()
+    await running
+    await connection.get("/c")
+    assert connection._concurrency_limit.active == 0
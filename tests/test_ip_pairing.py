@@ -1,12 +1,23 @@
 import asyncio
 from datetime import timedelta
+import socket
+import time
 from unittest import mock
 
 import pytest
+from zeroconf.asyncio import AsyncServiceInfo
 
 from aiohomekit.controller.ip.pairing import IpPairing
+from aiohomekit.exceptions import (
+    AccessoryDisconnectedError,
+    DeadlineExceededError,
+    HttpErrorResponse,
+    InvalidError,
+)
 from aiohomekit.model import Transport
+from aiohomekit.protocol import resume_m3
 from aiohomekit.protocol.statuscodes import HapStatusCode
+from aiohomekit.zeroconf import HomeKitService
 
 
 async def test_list_accessories(pairing):
@@ -110,6 +121,119 @@ async def test_reconnect_soon_after_device_is_offline_for_a_bit(pairing: IpPairi
     assert characteristics[(1, 9)] == {"value": False}
 
 
+async def test_reconnect_resumes_session(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    session_id = pairing.connection._session_id
+    assert session_id
+
+    resumed = []
+
+    def _resume_m3(*args):
+        resumed.append(resume_m3(*args))
+        return resumed[-1]
+
+    pairing.connection.transport.close()
+    await asyncio.sleep(0)
+
+    with mock.patch("aiohomekit.protocol.resume_m3", _resume_m3):
+        characteristics = await pairing.get_characteristics([(1, 9)])
+
+    assert characteristics[(1, 9)] == {"value": False}
+    assert resumed[0] is not None
+    assert pairing.connection._session_id not in (None, session_id)
+
+
+async def test_reconnect_unknown_session_does_full_verify(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    pairing.connection.transport.close()
+    await asyncio.sleep(0)
+    pairing.connection._session_id = bytes(8)
+
+    characteristics = await pairing.get_characteristics([(1, 9)])
+
+    assert characteristics[(1, 9)] == {"value": False}
+    assert pairing.connection._session_id not in (None, bytes(8))
+
+
+async def test_reconnect_failed_resume_falls_back(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    pairing.connection.transport.close()
+    await asyncio.sleep(0)
+
+    with mock.patch(
+        "aiohomekit.protocol.resume_m3", side_effect=InvalidError("resume failed")
+    ) as failed_resume:
+        characteristics = await pairing.get_characteristics([(1, 9)])
+
+    assert failed_resume.call_count == 1
+    assert characteristics[(1, 9)] == {"value": False}
+    assert pairing.connection._session_id is not None
+
+
+async def test_socket_options(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    sock = pairing.connection.transport.get_extra_info("socket")
+    assert sock.getsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE)
+    assert sock.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY)
+
+
+async def test_heartbeat_keeps_session(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    protocol = pairing.connection.protocol
+
+    with mock.patch.object(
+        pairing.connection, "get", wraps=pairing.connection.get
+    ) as get:
+        pairing.set_heartbeat_interval(0.05)
+        await asyncio.sleep(0.3)
+
+    assert get.call_count >= 1
+    get.assert_called_with("/characteristics?id=1.3")
+    assert pairing.connection.protocol is protocol
+    assert pairing.connection.is_connected
+
+    pairing.set_heartbeat_interval(None)
+    assert pairing.connection._heartbeat_task is None
+
+
+async def test_heartbeat_failure_reconnects(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    protocol = pairing.connection.protocol
+
+    async def _hang(target):
+        await asyncio.sleep(10)
+
+    pairing.connection.heartbeat_timeout = 0.05
+    with mock.patch.object(pairing.connection, "get", _hang):
+        pairing.set_heartbeat_interval(0.05)
+        await asyncio.sleep(0.2)
+
+    assert pairing.connection.protocol is not protocol
+
+    characteristics = await pairing.get_characteristics([(1, 9)])
+    assert characteristics[(1, 9)] == {"value": False}
+    assert pairing.connection.protocol is not protocol
+
+
+async def test_heartbeat_unexpected_error_reconnects(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    protocol = pairing.connection.protocol
+
+    with mock.patch.object(
+        pairing.connection, "get", side_effect=RuntimeError("Unexpected")
+    ):
+        pairing.set_heartbeat_interval(0.05)
+        await asyncio.sleep(0.2)
+
+    assert pairing.connection.protocol is not protocol
+
+    characteristics = await pairing.get_characteristics([(1, 9)])
+    assert characteristics[(1, 9)] == {"value": False}
+
+
 async def test_put_characteristics(pairing):
     characteristics = await pairing.put_characteristics([(1, 9, True)])
 
@@ -295,3 +419,397 @@ async def test_transport_property(pairing: IpPairing):
 
 async def test_polling_property(pairing: IpPairing):
     assert pairing.poll_interval == timedelta(seconds=60)
+
+
+async def test_pipelined_get_characteristics(pairing: IpPairing):
+    pairing.set_concurrency_limit(4)
+    assert pairing.connection.concurrency_limit == 4
+
+    results = await asyncio.gather(
+        *(pairing.get_characteristics([(1, 9)]) for _ in range(8))
+    )
+
+    assert all(result[(1, 9)] == {"value": False} for result in results)
+    assert pairing.connection.concurrency_limit == 4
+
+
+async def test_pipelining_falls_back_on_failure(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    pairing.set_concurrency_limit(4)
+
+    async def _send_bytes(payload, body_consumer=None):
+        await asyncio.sleep(0)
+        raise AccessoryDisconnectedError("Timeout while waiting for response")
+
+    with mock.patch.object(pairing.connection.protocol, "send_bytes", _send_bytes):
+        results = await asyncio.gather(
+            pairing.connection.get("/characteristics?id=1.9"),
+            pairing.connection.get("/characteristics?id=1.9"),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, AccessoryDisconnectedError) for r in results)
+    assert pairing.connection.concurrency_limit == 1
+
+    characteristics = await pairing.get_characteristics([(1, 9)])
+    assert characteristics[(1, 9)] == {"value": False}
+
+
+async def test_get_characteristics_deadline_already_passed(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    with mock.patch.object(
+        pairing.connection.protocol,
+        "send_bytes",
+        wraps=pairing.connection.protocol.send_bytes,
+    ) as send_bytes:
+        with pytest.raises(DeadlineExceededError):
+            await pairing.get_characteristics([(1, 9)], deadline=time.monotonic() - 1)
+
+    assert not send_bytes.called
+
+
+async def test_get_characteristics_deadline_exceeded(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    loop = asyncio.get_running_loop()
+    transport = pairing.connection.transport
+    write = transport.write
+
+    def _slow_write(data):
+        loop.call_later(0.2, write, data)
+
+    with mock.patch.object(transport, "write", _slow_write):
+        with pytest.raises(DeadlineExceededError):
+            await pairing.get_characteristics(
+                [(1, 9)], deadline=time.monotonic() + 0.05
+            )
+
+    # The late response is dropped and the session is still usable
+    assert pairing.connection.is_connected
+    await asyncio.sleep(0.3)
+    characteristics = await pairing.get_characteristics([(1, 9)])
+    assert characteristics[(1, 9)] == {"value": False}
+    assert pairing.connection.transport is transport
+
+
+async def test_pipelining_kept_when_deadline_expires(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    pairing.set_concurrency_limit(4)
+
+    async def _send_bytes(payload, body_consumer=None):
+        await asyncio.sleep(0)
+        raise DeadlineExceededError("Deadline exceeded")
+
+    with mock.patch.object(pairing.connection.protocol, "send_bytes", _send_bytes):
+        results = await asyncio.gather(
+            pairing.connection.get("/characteristics?id=1.9"),
+            pairing.connection.get("/characteristics?id=1.9"),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, DeadlineExceededError) for r in results)
+    assert pairing.connection.concurrency_limit == 4
+
+
+async def test_subscribe_deadline_keeps_push(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    with mock.patch.object(
+        pairing.connection,
+        "put_json",
+        side_effect=DeadlineExceededError("Deadline exceeded"),
+    ):
+        with pytest.raises(DeadlineExceededError):
+            await pairing.subscribe([(1, 9), (2, 9)])
+
+    assert pairing.supports_subscribe
+    assert pairing.batched_subscriptions is None
+
+
+async def test_get_characteristics_coalesced(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    with mock.patch.object(
+        pairing.connection, "get_json", wraps=pairing.connection.get_json
+    ) as get_json:
+        first, second, third = await asyncio.gather(
+            pairing.get_characteristics([(1, 9)]),
+            pairing.get_characteristics([(1, 3), (1, 9)]),
+            pairing.get_characteristics([(1, 4)]),
+        )
+
+    assert get_json.call_count == 1
+    assert first == {(1, 9): {"value": False}}
+    assert second == {(1, 3): {"value": "Testlicht"}, (1, 9): {"value": False}}
+    assert third == {(1, 4): {"value": "lusiardi.de"}}
+
+    # Each caller gets its own copy of the shared results
+    assert first[(1, 9)] is not second[(1, 9)]
+
+
+async def test_get_characteristics_coalesced_failure(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    with mock.patch.object(
+        pairing.connection,
+        "get_json",
+        side_effect=AccessoryDisconnectedError("Connection closed"),
+    ):
+        results = await asyncio.gather(
+            pairing.get_characteristics([(1, 9)]),
+            pairing.get_characteristics([(1, 3)]),
+            return_exceptions=True,
+        )
+
+    assert all(isinstance(r, AccessoryDisconnectedError) for r in results)
+
+
+async def test_put_characteristics_coalesced(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    pairing.write_coalesce_window = 0.01
+
+    with mock.patch.object(
+        pairing.connection, "put_json", wraps=pairing.connection.put_json
+    ) as put_json:
+        results = await asyncio.gather(
+            pairing.put_characteristics([(1, 9, True)]),
+            pairing.put_characteristics([(1, 9, False)]),
+            pairing.put_characteristics([(1, 9, True)]),
+        )
+
+    assert put_json.call_count == 1
+    assert put_json.call_args[0][1] == {
+        "characteristics": [{"aid": 1, "iid": 9, "value": True}]
+    }
+    assert results == [{}, {}, {}]
+
+    characteristics = await pairing.get_characteristics([(1, 9)])
+    assert characteristics[(1, 9)] == {"value": True}
+
+
+async def test_put_characteristics_coalesced_status(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    pairing.write_coalesce_window = 0.01
+
+    ok, failed = await asyncio.gather(
+        pairing.put_characteristics([(1, 9, True)]),
+        pairing.put_characteristics([(1, 999999, True)]),
+    )
+
+    assert ok == {
+        (1, 9): {
+            "status": 0,
+            "description": "This specifies a success for the request.",
+        }
+    }
+    assert failed == {
+        (1, 999999): {
+            "status": HapStatusCode.RESOURCE_NOT_EXIST.value,
+            "description": "Resource does not exist.",
+        }
+    }
+
+
+async def test_subscribe_batched_probe_success(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    assert pairing.batched_subscriptions is None
+
+    with mock.patch.object(pairing.connection, "put_json", return_value={}) as put:
+        await pairing.subscribe([(1, 9), (2, 9), (3, 9)])
+        assert put.call_count == 1
+        assert pairing.batched_subscriptions is True
+
+        await pairing.unsubscribe([(1, 9), (2, 9)])
+        assert put.call_count == 2
+
+    cache = pairing.controller._char_cache.get_map(pairing.id)
+    assert cache["batched_subscriptions"] is True
+
+
+async def test_subscribe_batched_probe_failure(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    calls = []
+
+    async def put_json(target, body):
+        calls.append(body)
+        if len({row["aid"] for row in body["characteristics"]}) > 1:
+            raise HttpErrorResponse("Bad request", response=None)
+        return {}
+
+    with mock.patch.object(pairing.connection, "put_json", put_json):
+        await pairing.subscribe([(1, 9), (2, 9)])
+        # One probe, then one request per aid
+        assert len(calls) == 3
+        assert pairing.batched_subscriptions is False
+
+        await pairing.subscribe([(1, 10), (2, 10)])
+        assert len(calls) == 5
+
+    cache = pairing.controller._char_cache.get_map(pairing.id)
+    assert cache["batched_subscriptions"] is False
+
+
+async def test_subscribe_batched_probe_disconnected(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+
+    with mock.patch.object(
+        pairing.connection,
+        "put_json",
+        side_effect=AccessoryDisconnectedError("Connection closed"),
+    ):
+        with pytest.raises(AccessoryDisconnectedError):
+            await pairing._update_subscriptions([(1, 9), (2, 9)], True)
+
+    # A lost connection is not an answer, so the accessory is probed again
+    assert pairing.batched_subscriptions is None
+    cache = pairing.controller._char_cache.get_map(pairing.id) or {}
+    assert "batched_subscriptions" not in cache
+
+
+async def test_subscribe_batched_from_cache(pairing: IpPairing):
+    await pairing.get_characteristics([(1, 9)])
+    pairing._batched_subscriptions = True
+    pairing._update_accessories_state_cache()
+
+    pairing._batched_subscriptions = None
+    assert pairing.batched_subscriptions is True
+
+
+async def test_subscribe_batched_with_original_cache_interface(pairing: IpPairing):
+    class OriginalCache:
+        def __init__(self):
+            self.maps = {}
+
+        def get_map(self, homekit_id):
+            return self.maps.get(homekit_id)
+
+        def async_create_or_update_map(self, homekit_id, config_num, accessories):
+            self.maps[homekit_id] = {
+                "config_num": config_num,
+                "accessories": accessories,
+            }
+            return self.maps[homekit_id]
+
+        def async_delete_map(self, homekit_id):
+            self.maps.pop(homekit_id, None)
+
+    await pairing.get_characteristics([(1, 9)])
+    pairing.controller._char_cache = OriginalCache()
+
+    pairing._set_batched_subscriptions(True)
+
+    assert pairing.batched_subscriptions is True
+    assert pairing.controller._char_cache.get_map(pairing.id)["config_num"] == (
+        pairing.config_num
+    )
+
+
+async def test_stream_accessories(pairing: IpPairing):
+    expected = await pairing.list_accessories_and_characteristics()
+    pairing._accessories_state = None
+
+    accessories = await pairing.async_stream_accessories()
+
+    assert pairing.accessories is accessories
+    assert accessories.serialize() == expected
+
+
+async def test_stream_accessories_filtered(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    current = pairing.accessories
+
+    accessories = await pairing.async_stream_accessories(aids={1})
+
+    assert [a.aid for a in accessories] == [1]
+    assert pairing.accessories is current
+    assert list(await pairing.async_stream_accessories(aids={2})) == []
+
+
+async def test_populate_accessories_state_from_cache(pairing: IpPairing):
+    accessories = await pairing.list_accessories_and_characteristics()
+    pairing.controller._char_cache.async_create_or_update_map(
+        pairing.id, 3, accessories
+    )
+    pairing._accessories_state = None
+    pairing.description = mock.Mock(config_num=3)
+
+    with mock.patch.object(pairing, "async_stream_accessories") as fetch:
+        await pairing.async_populate_accessories_state()
+
+    assert not fetch.called
+    assert pairing.config_num == 3
+    assert pairing.accessories.serialize() == accessories
+
+
+async def test_populate_accessories_state_config_num_changed(pairing: IpPairing):
+    accessories = await pairing.list_accessories_and_characteristics()
+    pairing.controller._char_cache.async_create_or_update_map(
+        pairing.id, 3, accessories
+    )
+    pairing._accessories_state = None
+    pairing.description = mock.Mock(config_num=4)
+    config_changed = mock.Mock()
+    pairing.config_changed_listeners.add(config_changed)
+
+    await pairing.async_populate_accessories_state()
+
+    assert pairing.config_num == 4
+    assert pairing.controller._char_cache.get_map(pairing.id)["config_num"] == 4
+    config_changed.assert_called_once_with(4)
+
+
+def _description(pairing: IpPairing, config_num: int, state_num: int = 1):
+    return HomeKitService.from_service_info(
+        AsyncServiceInfo(
+            "_hap._tcp.local.",
+            "foo._hap._tcp.local.",
+            addresses=[socket.inet_aton("127.0.0.1")],
+            port=pairing.connection.port,
+            properties={
+                b"c#": str(config_num).encode(),
+                b"id": pairing.id.encode(),
+                b"md": b"unittest",
+                b"s#": str(state_num).encode(),
+                b"ci": b"5",
+                b"sf": b"0",
+            },
+        )
+    )
+
+
+async def test_advertised_config_change_refreshes(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    description = _description(pairing, pairing.config_num + 1)
+
+    with mock.patch.object(pairing, "notify_config_changed") as notify:
+        pairing._async_description_update(description)
+
+    notify.assert_called_once_with(pairing.config_num + 1)
+    assert pairing.description is description
+
+
+async def test_state_num_drives_polling(pairing: IpPairing):
+    await pairing.list_accessories_and_characteristics()
+    pairing._async_description_update(_description(pairing, pairing.config_num))
+    await pairing.subscribe([(1, 9)])
+
+    # Events cover everything that is subscribed to
+    assert not pairing.should_poll([(1, 9)])
+    assert pairing.should_poll([(1, 9), (1, 10)])
+
+    events = []
+    pairing.dispatcher_connect(events.append)
+
+    pairing._async_description_update(_description(pairing, pairing.config_num, 2))
+    assert pairing.should_poll([(1, 9)])
+    await pairing._state_poll_task
+
+    assert events == [{(1, 9): {"value": False}}]
+    assert not pairing.should_poll([(1, 9)])
+
+    # A new session has to subscribe again before polls can be skipped
+    pairing.connection.transport.close()
+    await asyncio.sleep(0)
+    assert pairing.should_poll([(1, 9)])
@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+
+from aiohomekit.controller.ip.reconnect import (
+    RECONNECT_MAX_INTERVAL,
+    ReconnectScheduler,
+    reconnect_interval,
+)
+
+
+def test_reconnect_interval_jitter_and_cap():
+    for attempt in range(1, 30):
+        ceiling = min(RECONNECT_MAX_INTERVAL, 0.5 * 1.5**attempt)
+        interval = reconnect_interval(attempt)
+        assert ceiling / 2 <= interval <= ceiling
+
+    assert len({reconnect_interval(20) for _ in range(10)}) > 1
+
+
+async def _hold_slot(scheduler, key, started, release):
+    async with scheduler.slot(key):
+        started.append(key)
+        await release.wait()
+
+
+async def test_scheduler_limits_concurrency():
+    scheduler = ReconnectScheduler(max_concurrent=2)
+    started = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.ensure_future(_hold_slot(scheduler, key, started, release))
+        for key in range(5)
+    ]
+    await asyncio.sleep(0)
+
+    assert started == [0, 1]
+    assert scheduler.active == 2
+    assert scheduler.queue_depth == 3
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert started == [0, 1, 2, 3, 4]
+    assert scheduler.active == 0
+    assert scheduler.queue_depth == 0
+
+
+async def test_scheduler_prioritizes_recently_seen():
+    scheduler = ReconnectScheduler(max_concurrent=1)
+    started = []
+    release = asyncio.Event()
+
+    # "c" was seen before it started waiting, "b" was seen while waiting
+    scheduler.prioritize("c")
+    tasks = [
+        asyncio.ensure_future(_hold_slot(scheduler, key, started, release))
+        for key in ("a", "b", "c", "d")
+    ]
+    await asyncio.sleep(0)
+    scheduler.prioritize("b")
+
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert started == ["a", "c", "b", "d"]
+
+
+async def test_scheduler_cancelled_waiter_is_skipped():
+    scheduler = ReconnectScheduler(max_concurrent=1)
+    started = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.ensure_future(_hold_slot(scheduler, key, started, release))
+        for key in range(3)
+    ]
+    await asyncio.sleep(0)
+
+    tasks[1].cancel()
+    release.set()
+    await asyncio.gather(tasks[0], tasks[2])
+
+    with pytest.raises(asyncio.CancelledError):
+        await tasks[1]
+
+    assert started == [0, 2]
+    assert scheduler.active == 0
+    assert scheduler.queue_depth == 0
+
+
+async def test_pairings_share_scheduler(pairing):
+    scheduler = pairing.connection.reconnect_scheduler
+
+    assert scheduler is not None
+    assert scheduler is pairing.controller.reconnect_scheduler
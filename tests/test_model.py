@@ -16,7 +16,10 @@
 
 import base64
 
-from aiohomekit.model import Accessories
+import pytest
+
+import aiohomekit.hkjson as hkjson
+from aiohomekit.model import Accessories, Accessory
 from aiohomekit.model.characteristics import CharacteristicsTypes
 from aiohomekit.model.characteristics.const import (
     AudioCodecValues,
@@ -41,6 +44,7 @@ from aiohomekit.model.characteristics.structs import (
     VideoConfigConfiguration,
 )
 from aiohomekit.model.services import ServicesTypes
+from aiohomekit.model.stream import AccessoriesStreamParser
 from aiohomekit.protocol.statuscodes import HapStatusCode
 
 
@@ -470,3 +474,96 @@ def test_needs_polling():
 
     accessories = Accessories.from_file("tests/fixtures/nanoleaf_bulb.json")
     assert any(a.needs_polling for a in accessories) is False
+
+
+def test_process_changes_unknown_aid_iid():
+    accessories = Accessories.from_file("tests/fixtures/koogeek_ls1.json")
+
+    accessories.process_changes({(2, 8): {"value": True}, (1, 9999): {"value": 1}})
+
+    assert accessories.characteristic(2, 8) is None
+    assert accessories.characteristic(1, 9999) is None
+    assert accessories.aid(1).characteristics.iid(8).value is False
+
+
+def test_lookup_after_model_changes():
+    accessories = Accessories()
+    accessory = Accessory.create_with_info("Light", "Acme", "Bulb", "0001", "1.0")
+    accessory.aid = 2
+    accessories.add_accessory(accessory)
+
+    assert accessories.aid(2) is accessory
+    with pytest.raises(StopIteration):
+        accessories.aid(3)
+
+    service = accessory.add_service(ServicesTypes.LIGHTBULB)
+    on_char = service.add_char(CharacteristicsTypes.ON)
+    on_char.iid = 50
+
+    assert accessory.services.iid(service.iid) is service
+    assert accessory.characteristics.iid(50) is on_char
+    assert accessories.characteristic(2, 50) is on_char
+
+    accessories.process_changes({(2, 50): {"value": True}})
+    assert on_char.value is True
+
+    on_char.iid = 51
+    assert accessory.characteristics.iid(50) is None
+    assert accessories.characteristic(2, 50) is None
+    assert accessories.characteristic(2, 51) is on_char
+
+
+def _stream(document, piece_size=7, aids=None):
+    parser = AccessoriesStreamParser(aids)
+    for i in range(0, len(document), piece_size):
+        parser.feed(document[i : i + piece_size])
+    return parser.finish()
+
+
+def test_stream_parser_matches_from_list():
+    with open("tests/fixtures/hue_bridge.json", "rb") as fp:
+        data = fp.read()
+    document = b'{"accessories": ' + data + b"}"
+
+    expected = Accessories.from_list(hkjson.loads(data)).serialize()
+    for piece_size in (1, 7, 1024, len(document)):
+        assert _stream(document, piece_size).serialize() == expected
+
+
+def test_stream_parser_filters_aids():
+    with open("tests/fixtures/hue_bridge.json", "rb") as fp:
+        document = b'{"accessories": ' + fp.read() + b"}"
+
+    accessories = _stream(document, aids={6623462389072572})
+
+    assert [a.aid for a in accessories] == [6623462389072572]
+
+
+def test_stream_parser_brackets_in_strings_and_trailing_commas():
+    document = (
+        b'{"accessories": [{"aid": 1, "services": [{"iid": 1, "type": "3E",'
+        b' "characteristics": [{"iid": 2, "type": "23", "perms": ["pr"],'
+        b' "format": "string", "value": "a \\"}]\\" [{ name",},]}]},]}'
+    )
+
+    accessories = _stream(document, piece_size=3)
+
+    name = accessories.aid(1).characteristics.iid(2)
+    assert name.type == CharacteristicsTypes.NAME
+    assert name.value == 'a "}]" [{ name'
+
+
+def test_stream_parser_incomplete():
+    parser = AccessoriesStreamParser()
+    parser.feed(b'{"accessories": [{"aid": 1, "services": []}')
+
+    with pytest.raises(ValueError):
+        parser.finish()
+
+
+def test_stream_parser_unbalanced():
+    parser = AccessoriesStreamParser()
+    parser.feed(b'{"accessories": []}]}')
+
+    with pytest.raises(ValueError):
+        parser.finish()